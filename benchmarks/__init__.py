@@ -0,0 +1 @@
+"""ClipFlow 基准测试脚本（可在无 GUI 的 Linux 环境运行）"""
@@ -0,0 +1,199 @@
+"""
+在没有 rumps / PyObjC 的环境中导入 ClipFlow
+
+import_core() 只导入不依赖 GUI 框架的 clipflow 包，不注入任何桩模块；
+import_app() 在真实模块不存在时注入最小的桩模块，再导入包括界面在内的 clipboard_manager，
+macOS 上运行时不受影响。Checks 是各个基准脚本共用的检查结果收集器。
+"""
+
+import importlib.util
+import sys
+import types
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+
+class Checks:
+    """逐条打印检查结果并记下失败的；脚本最后以 sys.exit(1 if check.failures else 0) 退出"""
+
+    def __init__(self):
+        self.failures = []
+
+    def __call__(self, ok, message):
+        print(("ok   " if ok else "FAIL ") + message)
+        if not ok:
+            self.failures.append(message)
+
+
+class _Anything:
+    """任意属性访问 / 调用都返回自身的占位对象"""
+
+    def __getattr__(self, name):
+        return self
+
+    def __call__(self, *args, **kwargs):
+        return self
+
+    def __or__(self, other):
+        return self
+
+
+class _NSMenuItem:
+    """NSMenuItem 的最小替身，统计 AppKit 调用次数"""
+    calls = 0
+
+    def __init__(self, title=""):
+        self._title = title
+        self.hidden = False
+
+    def title(self):
+        return self._title
+
+    def setTitle_(self, title):
+        _NSMenuItem.calls += 1
+        self._title = title
+
+    def setHidden_(self, hidden):
+        _NSMenuItem.calls += 1
+        self.hidden = bool(hidden)
+
+
+class _NSMenu:
+    """NSMenu 的最小替身，只保存条目顺序"""
+    moves = 0
+
+    def __init__(self):
+        self.items = []
+
+    def addItem_(self, item):
+        self.items.append(item)
+
+    def indexOfItem_(self, item):
+        return next((i for i, x in enumerate(self.items) if x is item), -1)
+
+    def itemAtIndex_(self, index):
+        return self.items[index]
+
+    def removeItem_(self, item):
+        _NSMenu.moves += 1
+        self.items.remove(item)
+
+    def insertItem_atIndex_(self, item, index):
+        self.items.insert(index, item)
+
+
+class _Separator:
+    def __init__(self):
+        self._menuitem = _NSMenuItem()
+
+
+class _Menu(dict):
+    """模仿 rumps.Menu：按标题保存子项，分隔符按序号命名"""
+
+    def __init__(self):
+        super().__init__()
+        self._menu = _NSMenu()
+
+    def add(self, item):
+        if item is None:
+            key, item = f"separator_{len(self)}", _Separator()
+        else:
+            key = item.title
+        self[key] = item
+        self._menu.addItem_(item._menuitem)
+
+    def clear(self):
+        super().clear()
+        self._menu.items = []
+
+
+class _MenuItem(_Menu):
+    created = 0
+
+    def __init__(self, title="", callback=None, *args, **kwargs):
+        super().__init__()
+        _MenuItem.created += 1
+        self._menuitem = _NSMenuItem(title)
+        self.callback = callback
+
+    def __hash__(self):
+        return id(self)
+
+    def __eq__(self, other):
+        return self is other
+
+    @property
+    def title(self):
+        return self._menuitem.title()
+
+    @title.setter
+    def title(self, title):
+        self._menuitem.setTitle_(title)
+
+    def set_callback(self, callback):
+        self.callback = callback
+
+
+class _App:
+    def __init__(self, *args, **kwargs):
+        self.menu = _Menu()
+
+    def run(self):
+        pass
+
+
+class _Timer:
+    def __init__(self, callback, interval):
+        self.callback = callback
+        self.interval = interval
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+def _timer(interval):
+    def decorator(func):
+        return func
+    return decorator
+
+
+def _module(name, **attrs):
+    mod = types.ModuleType(name)
+    mod.__dict__.update(attrs)
+    return mod
+
+
+def install(stub_rumps=False):
+    """注入缺失的 GUI 依赖桩模块；stub_rumps=True 时总是替换 rumps 以便计数"""
+    if stub_rumps or importlib.util.find_spec("rumps") is None:
+        sys.modules["rumps"] = _module(
+            "rumps", App=_App, MenuItem=_MenuItem, separator=None,
+            Timer=_Timer, timer=_timer, notification=lambda *a, **k: None,
+            quit_application=lambda *a, **k: None,
+        )
+    if importlib.util.find_spec("AppKit") is None:
+        appkit = _module("AppKit")
+        appkit.__getattr__ = lambda name: _Anything()
+        sys.modules["AppKit"] = appkit
+    if importlib.util.find_spec("Foundation") is None:
+        sys.modules["Foundation"] = _module("Foundation", NSObject=object)
+    if importlib.util.find_spec("objc") is None:
+        sys.modules["objc"] = _module("objc", super=super, selector=lambda *a, **k: None)
+
+
+def import_app(stub_rumps=False):
+    install(stub_rumps)
+    import clipboard_manager
+    from clipflow import gui  # noqa: F401
+    return clipboard_manager
+
+
+def import_core():
+    import clipflow
+    return clipflow
@@ -0,0 +1,109 @@
+#!/usr/bin/env python3
+"""
+采集流水线基准：空闲 tick 与有新内容 tick 的成本
+
+对照组模拟 1.6.0：每个 tick 启动一个子进程读取剪贴板（Linux 上用 cat 代替 pbpaste）
+并对全文做 MD5；实验组是 ClipboardMonitor + FakeClipboardBackend 的变更计数路径。
+
+最后比较持续写入吞吐：每条同步提交 vs CaptureWriter 分批提交。
+
+用法: python benchmarks/bench_capture.py [--ticks 200] [--clip-kb 64] [--burst 2000]
+"""
+
+import argparse
+import hashlib
+import os
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import import_core
+
+cm = import_core()
+
+
+def cpu_time():
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def measure(label, ticks, tick):
+    wall, cpu = time.perf_counter(), cpu_time()
+    for i in range(ticks):
+        tick(i)
+    wall = (time.perf_counter() - wall) / ticks * 1e6
+    cpu = (cpu_time() - cpu) / ticks * 1e6
+    # 以 1 Hz 轮询计算的 CPU 占用
+    print(f"{label:<34}{wall:>12.1f}{cpu:>12.1f}{cpu / 1e6 * 100:>11.4f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ticks", type=int, default=200)
+    parser.add_argument("--clip-kb", type=int, default=64)
+    parser.add_argument("--burst", type=int, default=2000)
+    args = parser.parse_args()
+
+    content = ("x" * 1023 + "\n") * args.clip_kb
+    with tempfile.TemporaryDirectory() as tmp:
+        clip_file = Path(tmp) / "clipboard.txt"
+        clip_file.write_text(content)
+        store = cm.ClipStore(Path(tmp) / "capture.db")
+
+        print(f"{'tick':<34}{'wall µs':>12}{'cpu µs':>12}{'cpu @1Hz':>12}")
+
+        last = [None]
+
+        def legacy_tick(i):
+            out = subprocess.run(["cat", str(clip_file)], capture_output=True, text=True).stdout
+            digest = hashlib.md5(out.encode()).hexdigest()
+            if digest != last[0]:
+                last[0] = digest
+
+        measure("1.6.0 idle (subprocess + md5)", args.ticks, legacy_tick)
+
+        backend = cm.FakeClipboardBackend()
+        monitor = cm.ClipboardMonitor(backend, store.save_clip)
+        backend.copy(content)
+        monitor.poll()
+        measure("idle (change counter)", args.ticks * 100, lambda i: monitor.poll())
+
+        def capture_tick(i):
+            backend.copy(f"{i} {content}")
+            monitor.poll()
+
+        measure("new content (read + md5 + save)", args.ticks, capture_tick)
+        print(f"backend reads: {backend.reads}")
+        store.close()
+
+        print()
+        print(f"{'sustained writes':<34}{'clips/s':>12}{'caller µs':>12}{'commits':>12}")
+        clips = [(f"burst clip {i}", hashlib.md5(f"burst clip {i}".encode()).hexdigest())
+                 for i in range(args.burst)]
+
+        store = cm.ClipStore(Path(tmp) / "sync.db")
+        start = time.perf_counter()
+        for content, digest in clips:
+            store.save_clip(content, digest)
+        elapsed = time.perf_counter() - start
+        print(f"{'synchronous save_clip':<34}{args.burst / elapsed:>12.0f}"
+              f"{elapsed / args.burst * 1e6:>12.1f}{args.burst:>12}")
+        store.close()
+
+        store = cm.ClipStore(Path(tmp) / "batched.db")
+        writer = cm.CaptureWriter(store).start()
+        start = time.perf_counter()
+        for content, digest in clips:
+            writer.submit(content, digest)
+        caller = time.perf_counter() - start
+        writer.flush()
+        elapsed = time.perf_counter() - start
+        print(f"{'CaptureWriter (group commit)':<34}{args.burst / elapsed:>12.0f}"
+              f"{caller / args.burst * 1e6:>12.1f}{writer.batches:>12}")
+        writer.close()
+        store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+"""
+命令行客户端基准：Unix 套接字请求的延迟和 clipflow 命令的启动开销
+
+用 workloads.py 的分布填充 --rows 条历史，在临时套接字上启动 ControlServer，然后：
+  1. 进程内的 SocketClient 依次请求 list / search / get / put / pin，报告 p50 / p99，
+     并与直接调用 ClipCommands 比较，差值就是套接字和编解码的开销；
+  2. 子进程运行 python -m clipflow list，与只导入它用到的标准库模块的空进程比较墙钟时间，
+     并用 -X importtime 确认应用在运行时客户端不导入 sqlite3 / asyncio / 存储 / GUI 框架；
+  3. watch 收到另一个连接 put 的变更事件；
+  4. 关闭服务器后，list 改为只读打开数据库，put 以非零状态退出。
+套接字开销的 p50 超过 --max-overhead-ms，clipflow 本身的启动开销超过 --max-startup-ms，
+或以上任一项不满足时以非零状态退出。解释器和标准库的启动时间不计在内，它们与客户端的实现无关。
+
+用法: python benchmarks/bench_cli.py [--rows 20000] [--requests 500]
+"""
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from _headless import ROOT, Checks, import_core
+
+import workloads
+
+cm = import_core()
+from clipflow.cli import SocketClient  # noqa: E402
+
+HEAVY_MODULES = ("sqlite3", "asyncio", "clipflow.store", "rumps", "AppKit")
+# 客户端无论如何都要用到的标准库模块，作为启动时间的基线
+BASELINE = "import argparse, json, pathlib, socket, struct"
+
+
+def percentile(values, q):
+    values = sorted(values)
+    return values[min(int(len(values) * q), len(values) - 1)]
+
+
+def run_cli(socket_path, db_path, *args, python_args=(), stdin=None):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPATH"] = str(ROOT)
+    return subprocess.run([sys.executable, *python_args, "-m", "clipflow", "--socket", str(socket_path),
+                           "--db", str(db_path), *args],
+                          input=stdin, capture_output=True, text=True, env=env, cwd=ROOT)
+
+
+def wall_ms(argv, runs):
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    env["PYTHONPATH"] = str(ROOT)
+    times = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run(argv, capture_output=True, env=env, cwd=ROOT, check=True)
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--runs", type=int, default=7)
+    parser.add_argument("--max-overhead-ms", type=float, default=1.0)
+    parser.add_argument("--max-startup-ms", type=float, default=25.0)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        db_path, socket_path = tmp / "cli.db", tmp / "clipflow.sock"
+        store = cm.ClipStore(db_path)
+        workloads.populate(cm, store, args.rows)
+        server = cm.ControlServer(store, socket_path).start()
+        clip_id = store.page()[0][0][0]
+
+        # 1. 进程内请求延迟：经过套接字 / 直接调用
+        client = SocketClient.connect(socket_path)
+        commands = cm.ClipCommands(store)
+        requests = {
+            "list": lambda i: {"limit": 20},
+            "search": lambda i: {"q": workloads.WORDS[i % len(workloads.WORDS)], "limit": 20},
+            "get": lambda i: {"id": clip_id},
+            "put": lambda i: {"content": f"cli bench clip {i % 50}"},
+            "pin": lambda i: {"id": clip_id, "pinned": bool(i % 2)},
+        }
+        print(f"{'request':<8} {'p50 ms':>8} {'p99 ms':>8} {'direct p50':>11}")
+        for op, make in requests.items():
+            latencies, direct = [], []
+            for i in range(args.requests):
+                request = make(i)
+                started = time.perf_counter()
+                client.request(op, **request)
+                latencies.append((time.perf_counter() - started) * 1000)
+                started = time.perf_counter()
+                commands.call({"op": op, **request})
+                direct.append((time.perf_counter() - started) * 1000)
+            p50, direct_p50 = percentile(latencies, 0.5), percentile(direct, 0.5)
+            print(f"{op:<8} {p50:8.3f} {percentile(latencies, 0.99):8.3f} {direct_p50:11.3f}")
+            check(p50 - direct_p50 < args.max_overhead_ms,
+                  f"{op} socket overhead within {args.max_overhead_ms:.1f} ms ({p50 - direct_p50:.3f} ms)")
+        client.close()
+
+        # 2. 子进程的启动开销
+        bare = wall_ms([sys.executable, "-c", "pass"], args.runs)
+        baseline = wall_ms([sys.executable, "-c", BASELINE], args.runs)
+        cli = wall_ms([sys.executable, "-m", "clipflow", "--socket", str(socket_path), "list"], args.runs)
+        print(f"\npython -c pass {bare:.1f} ms, standard library baseline {baseline:.1f} ms, "
+              f"clipflow list {cli:.1f} ms (median of {args.runs})")
+        check(cli - baseline < args.max_startup_ms,
+              f"clipflow list adds at most {args.max_startup_ms:.0f} ms to the standard library baseline "
+              f"({cli - baseline:.1f} ms)")
+        result = run_cli(socket_path, db_path, "list", python_args=("-X", "importtime"))
+        imported = {line.split("|")[-1].strip() for line in result.stderr.splitlines() if "|" in line}
+        heavy = [name for name in HEAVY_MODULES if name in imported]
+        check(result.returncode == 0 and not heavy,
+              f"clipflow list through the socket imports no storage or GUI modules ({', '.join(heavy) or 'none'})")
+
+        # 3. watch
+        events = []
+        watcher = SocketClient.connect(socket_path)
+
+        def watch():
+            for event in watcher.watch():
+                events.append(event)
+                if event.get("type") == "upsert":
+                    return
+
+        thread = threading.Thread(target=watch, daemon=True)
+        thread.start()
+        time.sleep(0.1)
+        result = run_cli(socket_path, db_path, "put", stdin="watched clip")
+        thread.join(5)
+        check(result.returncode == 0 and any(e.get("type") == "upsert" for e in events),
+              f"watch receives the event of a put from another process ({len(events)} events)")
+        watcher.close()
+
+        # 4. 应用没有运行时
+        server.close()
+        result = run_cli(socket_path, db_path, "list", "-n", "3")
+        check(result.returncode == 0 and len(result.stdout.splitlines()) == 3,
+              "without the app, list reads the database directly")
+        result = run_cli(socket_path, db_path, "put", "x")
+        check(result.returncode != 0 and "read-only" in result.stderr,
+              "without the app, put is refused")
+        store.close()
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,246 @@
+#!/usr/bin/env python3
+"""
+热缓存基准：菜单、历史窗口和 Web 接口在稳定状态下是否还访问数据库
+
+每一轮模拟一次刷新：菜单 recent_clips(10)、窗口第一页 preview_rows(100)、
+Web 第一页和第二页 page()，可选地先保存一条新记录（写穿更新）。对照组关闭热缓存。
+报告每轮耗时和借出的只读连接数；另外用很小的缓存随机执行保存 / 重新复制 / 收藏 /
+删除 / 清空 / 保留策略，每一步都与直接查库的结果比对，并在多线程读写下检查一致性；
+最后检查 /api/clips 返回的 rev 和 ETag 不会越过查询之后才提交的修改。任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_hot_cache.py [--rows 20000] [--rounds 2000]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+
+from _headless import Checks
+from bench_search import cm, populate
+
+
+def save(store, content):
+    store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+
+def count_reads(store):
+    """统计借出只读连接的次数"""
+    original = store._read
+    counter = [0]
+
+    @contextmanager
+    def counting():
+        counter[0] += 1
+        with original() as conn:
+            yield conn
+
+    store._read = counting
+    return counter
+
+
+def refresh(store, capture, i):
+    if capture:
+        save(store, f"hot cache capture {i}")
+    store.recent_clips(cm.MENU_RECENT)
+    store.preview_rows(cm.ROW_PAGE_SIZE)
+    rows, cursor, _ = store.page(None, 50)
+    store.page(cursor, 50)
+    store.count()
+
+
+def measure(label, store, rounds, capture, reads):
+    refresh(store, capture, -1)
+    before = reads[0]
+    start = time.perf_counter()
+    for i in range(rounds):
+        refresh(store, capture, f"{label} {i}")
+    elapsed = (time.perf_counter() - start) / rounds * 1e6
+    per_round = (reads[0] - before) / rounds
+    print(f"{label:<34}{elapsed:>12.1f}{per_round:>14.2f}")
+    return per_round
+
+
+def direct(store, limit, offset=0):
+    """绕过缓存直接查库"""
+    with store._read() as conn:
+        return conn.execute(cm.ClipStore.SQL_PAGE_FIRST.replace("LIMIT ?", "LIMIT ? OFFSET ?"),
+                            (limit, offset)).fetchall()
+
+
+def random_ops(store, steps, check, seed=11):
+    rng = random.Random(seed)
+    seen = []
+    policy = cm.RetentionPolicy(max_rows=40)
+    mismatches = 0
+    for step in range(steps):
+        op = rng.random()
+        ids = [row[0] for row in direct(store, 1000)]
+        if op < 0.45 or not ids:
+            content = f"random clip {step}"
+            seen.append(content)
+            save(store, content)
+        elif op < 0.6:
+            save(store, rng.choice(seen))
+        elif op < 0.8:
+            store.toggle_pin(rng.choice(ids))
+        elif op < 0.9:
+            store.delete_clip(rng.choice(ids))
+        elif op < 0.97:
+            store.enforce_retention(policy, chunk=rng.randrange(1, 20))
+        else:
+            store.clear_history()
+        for limit, offset in ((3, 0), (10, 0), (8, 5), (200, 0)):
+            if store.preview_rows(limit, offset) != [(r[0], r[1], r[5], r[6]) for r in direct(store, limit, offset)]:
+                mismatches += 1
+        rows, cursor, _ = store.page(None, 4)
+        if rows != direct(store, 4) or (cursor and store.page(cursor, 4)[0] != direct(store, 4, 4)):
+            mismatches += 1
+    check(mismatches == 0, f"random operations: cache matches the database ({mismatches} mismatches)")
+
+
+def concurrent(store, check, seconds=1.0):
+    stop = threading.Event()
+    errors = []
+
+    def reader():
+        while not stop.is_set():
+            try:
+                rows = store.recent_clips(10)
+                if len({r[0] for r in rows}) != len(rows):
+                    errors.append("duplicate rows")
+            except Exception as e:
+                errors.append(repr(e))
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            save(store, f"concurrent {i}")
+            if i % 7 == 0:
+                store.toggle_pin(store.recent_clips(5)[-1][0])
+            if i % 11 == 0:
+                store.delete_clip(store.recent_clips(3)[-1][0])
+            i += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(3)] + [threading.Thread(target=writer)]
+    for t in threads:
+        t.start()
+    time.sleep(seconds)
+    stop.set()
+    for t in threads:
+        t.join()
+    check(not errors, f"concurrent readers see consistent rows ({len(errors)} errors)")
+    check(store.preview_rows(200) == [(r[0], r[1], r[5], r[6]) for r in direct(store, 200)],
+          "cache matches the database after concurrent writes")
+
+
+def web_snapshots(store, check):
+    """查询期间或查询之后提交的修改：返回的 rev 不能越过它，下一次 since=rev 的增量里一定有它"""
+    executor = ThreadPoolExecutor(max_workers=1)
+    handler = cm.ClipFlowWebHandler(store, executor)
+    loop = asyncio.new_event_loop()
+
+    def get(path):
+        response = loop.run_until_complete(handler.dispatch(cm.HTTPRequest("GET", path, "HTTP/1.1", {})))
+        data = json.loads(response.body)
+        return data, response.headers["ETag"] == f'W/"r{data["rev"]}"'
+
+    def then(method, write):
+        """让 store.method 返回之后、响应组装之前提交一次写入"""
+        original = getattr(store, method)
+
+        def wrapped(*args):
+            result = original(*args)
+            write()
+            return result
+        setattr(store, method, wrapped)
+
+    then("page", lambda: save(store, "committed after the first page query"))
+    first, etag_ok = get("/api/clips?limit=5")
+    del store.page
+    delta, _ = get(f"/api/clips?since={first['rev']}")
+    added = store.find_clip(hashlib.md5(b"committed after the first page query").hexdigest())
+    check(etag_ok and added in {c["id"] for c in delta["changed"]},
+          "a clip saved after the first-page query arrives in the next delta")
+
+    victim = store.recent_clips(1)[0][0]
+    then("changes_since", lambda: store.delete_clip(victim))
+    polled, etag_ok = get(f"/api/clips?since={delta['rev']}")
+    del store.changes_since
+    after, _ = get(f"/api/clips?since={polled['rev']}")
+    check(etag_ok and victim in polled["deleted"] + after["deleted"],
+          "a delete committed after the delta query arrives in the next delta")
+
+    # 写事务已经分配了修订号但还没提交时读第一页
+    inside, release = threading.Event(), threading.Event()
+    text = "committed while the first page was read"
+
+    def writer():
+        with store._write() as conn:
+            store._save(conn, *store._prepare(text, hashlib.md5(text.encode()).hexdigest()))
+            inside.set()
+            release.wait(5)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    inside.wait(5)
+    first, etag_ok = get("/api/clips?limit=5")
+    release.set()
+    thread.join()
+    delta, _ = get(f"/api/clips?since={first['rev']}")
+    check(etag_ok and store.find_clip(hashlib.md5(text.encode()).hexdigest()) in {c["id"] for c in delta["changed"]},
+          "a clip committed while the first page was read arrives in the next delta")
+    loop.close()
+    executor.shutdown()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "hot.db")
+        populate(store, args.rows)
+        for clip_id, *_ in store.recent_clips(30)[::3]:
+            store.toggle_pin(clip_id)
+        reads = count_reads(store)
+
+        print(f"{'refresh round':<34}{'µs/round':>12}{'db reads':>14}")
+        hot_read = store._hot_rows
+        store._hot_rows = lambda *a, **k: None
+        measure("no cache: idle", store, args.rounds, False, reads)
+        measure("no cache: capture + refresh", store, args.rounds // 4, True, reads)
+        store._hot_rows = hot_read
+        idle = measure("hot cache: idle", store, args.rounds, False, reads)
+        busy = measure("hot cache: capture + refresh", store, args.rounds // 4, True, reads)
+        stats = store.hot.stats()
+        print(f"\nhot cache: {stats['size']} rows ({stats['pinned']} pinned), hit rate {stats['hit_rate']:.1%}, "
+              f"{stats['reloads']} reloads\n")
+        check(idle == 0, "idle refreshes never touch the database")
+        check(busy == 0, "captures update the cache without a reload")
+        store.close()
+
+        small = cm.ClipStore(Path(tmp) / "small.db")
+        small.hot = cm.HotCache(size=6)
+        random_ops(small, 1500, check)
+        concurrent(small, check)
+        web_snapshots(small, check)
+        small.close()
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
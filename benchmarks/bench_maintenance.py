@@ -0,0 +1,182 @@
+#!/usr/bin/env python3
+"""
+后台数据库维护检查：增量 VACUUM 回收空间、每次运行不超出时间预算、不拖慢采集
+
+先写入 --rows 条记录再按保留策略删除大部分，然后反复调用 MaintenanceWorker.maintain()，
+同时在另一个线程里持续 save_clip，报告每次维护运行的耗时、采集延迟和文件大小变化。
+另外检查 1.6.0 的库会被转换为 auto_vacuum=INCREMENTAL（小库在空闲维护时，大库留到退出时）、ANALYZE / quick_check /
+检查点有结果、非空闲时不做维护、/api/status 能输出维护状态。任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_maintenance.py [--rows 20000] [--budget-ms 50]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _headless import Checks
+from bench_search import cm, populate
+
+
+def save(store, content):
+    store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def file_size(store):
+    return sum(os.path.getsize(store.db_path + suffix)
+               for suffix in ("", "-wal") if os.path.exists(store.db_path + suffix))
+
+
+def capture_loop(store, stop, samples):
+    i = 0
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        save(store, f"capture during maintenance {i}")
+        samples.append((time.perf_counter() - t0) * 1000)
+        i += 1
+        time.sleep(0.002)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--budget-ms", type=float, default=50.0)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "maintenance.db")
+        check(store.page_stats()["auto_vacuum"] == 2, "new databases use auto_vacuum=INCREMENTAL")
+        populate(store, args.rows)
+        store.checkpoint()
+        grown = file_size(store)
+
+        # 删除 90% 的记录，留下大量空闲页
+        worker = cm.MaintenanceWorker(store, cm.RetentionPolicy(max_rows=args.rows // 10),
+                                      budget=args.budget_ms / 1000)
+        worker.enforce_retention()
+        free = store.page_stats()["freelist_count"]
+
+        # 基线：没有维护时的采集延迟
+        baseline = []
+        stop = threading.Event()
+        thread = threading.Thread(target=capture_loop, args=(store, stop, baseline))
+        thread.start()
+        time.sleep(0.5)
+        stop.set()
+        thread.join()
+
+        samples, runs = [], []
+        stop = threading.Event()
+        thread = threading.Thread(target=capture_loop, args=(store, stop, samples))
+        thread.start()
+        while store.page_stats()["freelist_count"] and len(runs) < 1000:
+            worker.due = dict.fromkeys(worker.intervals, 0.0)
+            t0 = time.perf_counter()
+            worker.maintain()
+            runs.append((time.perf_counter() - t0) * 1000)
+        # 预算用完时剩下的任务留到下一次运行
+        while set(worker.tasks) != set(cm.MaintenanceWorker.TASKS) and len(runs) < 1000:
+            t0 = time.perf_counter()
+            worker.maintain()
+            runs.append((time.perf_counter() - t0) * 1000)
+        stop.set()
+        thread.join()
+        store.checkpoint()
+        shrunk = file_size(store)
+
+        print(f"\n{free} free pages after deleting {args.rows - args.rows // 10} rows; "
+              f"reclaimed in {len(runs)} maintenance runs")
+        print(f"maintenance run    p50 {percentile(runs, 0.5):7.2f} ms   max {max(runs):7.2f} ms")
+        print(f"capture, idle      p50 {percentile(baseline, 0.5):7.2f} ms   p99 {percentile(baseline, 0.99):7.2f} ms")
+        print(f"capture, vacuuming p50 {percentile(samples, 0.5):7.2f} ms   p99 {percentile(samples, 0.99):7.2f} ms")
+        print(f"database file      {grown / 2**20:.1f} MiB -> {shrunk / 2**20:.1f} MiB\n")
+
+        check(free > 0 and store.page_stats()["freelist_count"] == 0, "incremental vacuum reclaims all free pages")
+        check(shrunk < grown, "database file shrinks after deleting most rows")
+        # quick_check 不受预算限制，但只占用只读连接
+        vacuum_ms = max(runs[1:] or runs)
+        check(vacuum_ms < args.budget_ms * 3, f"maintenance runs stay near the budget ({vacuum_ms:.1f} ms)")
+        check(percentile(samples, 0.99) < max(percentile(baseline, 0.99) * 5, args.budget_ms),
+              "captures are not stalled by maintenance")
+        check(store.quick_check() == [], "quick_check reports no problems")
+        check(store._writer.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'").fetchone(),
+              "optimize leaves planner statistics")
+        check(set(worker.tasks) == set(cm.MaintenanceWorker.TASKS), "every task reports its result")
+
+        # 非空闲时只执行保留策略
+        busy = cm.MaintenanceWorker(store, is_idle=lambda: False)
+        busy.run_once()
+        check(busy.tasks == {}, "no maintenance while the clipboard is active")
+
+        # /api/status
+        executor = ThreadPoolExecutor(max_workers=1)
+        handler = cm.ClipFlowWebHandler(store, executor, status=lambda: {"maintenance": worker.status()})
+        request = cm.HTTPRequest("GET", "/api/status", "HTTP/1.1", {})
+        response = asyncio.run(handler.dispatch(request))
+        status = json.loads(response.body)
+        check(response.status == 200 and "vacuum" in status["maintenance"]["tasks"],
+              "/api/status exposes maintenance results")
+        executor.shutdown()
+        store.close()
+
+        # 1.6.0 创建的库没有 auto_vacuum，空闲时转换一次
+        legacy_path = Path(tmp) / "legacy.db"
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("CREATE TABLE clips (id INTEGER PRIMARY KEY AUTOINCREMENT, content TEXT NOT NULL, "
+                     "content_hash TEXT UNIQUE NOT NULL, content_type TEXT DEFAULT 'text', "
+                     "created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP, pinned INTEGER DEFAULT 0)")
+        conn.executemany("INSERT INTO clips (content, content_hash) VALUES (?, ?)",
+                         [(f"legacy {i} " + "y" * 500, f"h{i}") for i in range(2000)])
+        conn.execute("DELETE FROM clips WHERE id % 2 = 0")
+        conn.commit()
+        conn.close()
+        legacy = cm.ClipStore(legacy_path)
+        stats = legacy.page_stats()
+        size = stats["page_count"] * stats["page_size"]
+        check(stats["auto_vacuum"] == 0, "1.6.0 database starts without auto_vacuum")
+
+        # 超过 convert_max_bytes 的库：空闲维护不整库 VACUUM，退出时再转换
+        deferred = cm.MaintenanceWorker(legacy, convert_max_bytes=size - 1)
+        deferred.maintain()
+        check(legacy.page_stats()["auto_vacuum"] == 0 and deferred.convert_pending
+              and deferred.status()["convert_pending"],
+              "a 1.6.0 database above convert_max_bytes is left for the quit path")
+        messages = []
+        check(deferred.convert(messages.append) and not deferred.convert_pending and len(messages) == 2
+              and legacy.page_stats()["auto_vacuum"] == 2, "convert() on quit switches it to incremental vacuum")
+        legacy.close()
+
+        conn = sqlite3.connect(legacy_path)
+        conn.execute("PRAGMA auto_vacuum=NONE")
+        conn.execute("VACUUM")
+        conn.execute("DELETE FROM clips WHERE id % 4 = 1")
+        conn.commit()
+        conn.close()
+        legacy = cm.ClipStore(legacy_path)
+        cm.MaintenanceWorker(legacy, convert_max_bytes=size).maintain()
+        stats = legacy.page_stats()
+        check(stats["auto_vacuum"] == 2 and stats["freelist_count"] == 0 and legacy.count() == 500,
+              "a small 1.6.0 database is converted during idle maintenance without losing rows")
+        legacy.close()
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+状态栏菜单刷新基准：每次采集创建 / 改动了多少菜单项
+
+总是使用 _headless 里的 rumps 桩，统计 MenuItem 创建数、NSMenuItem 的
+setTitle_/setHidden_ 调用数和 NSMenu 中的移动次数。对照组按 1.6.0 的方式
+每次 clear() 后重建整个菜单。增量刷新在稳定状态下不应创建任何菜单项。
+
+用法: python benchmarks/bench_menu.py [--captures 200]
+"""
+
+import argparse
+import hashlib
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import _headless
+from _headless import import_app
+
+cm = import_app(stub_rumps=True)
+import rumps  # noqa: E402  import_app 注入的桩模块
+
+
+def legacy_refresh(app):
+    """1.6.0 的 refresh_menu：清空后重建全部菜单项"""
+    app.menu.clear()
+    header = rumps.MenuItem(f"ClipFlow v{cm.VERSION} · {app.store.count()} 条记录")
+    app.menu.add(header)
+    app.menu.add(rumps.separator)
+    clips = app.store.recent_clips(10)
+    pinned_clips = [c for c in clips if c[3]]
+    normal_clips = [c for c in clips if not c[3]]
+    for clip_id, content, created_at, pinned in pinned_clips:
+        item = rumps.MenuItem("⭐ " + cm.truncate_text(content))
+        item.add(rumps.MenuItem("取消收藏"))
+        app.menu.add(item)
+    if pinned_clips:
+        app.menu.add(rumps.separator)
+    for clip_id, content, created_at, pinned in normal_clips[:8]:
+        item = rumps.MenuItem(cm.truncate_text(content))
+        item.add(rumps.MenuItem("☆ 收藏"))
+        app.menu.add(item)
+    app.menu.add(rumps.separator)
+    favorites = rumps.MenuItem("⭐ 收藏夹")
+    for clip_id, content, created_at, pinned in pinned_clips[:5]:
+        item = rumps.MenuItem(cm.truncate_text(content))
+        item.add(rumps.MenuItem("取消收藏"))
+        favorites.add(item)
+    if not pinned_clips:
+        favorites.add(rumps.MenuItem("暂无收藏"))
+    app.menu.add(favorites)
+    for item in (app.view_all, app.view_web, app.clear_btn, app.toggle_btn, app.login_btn):
+        app.menu.add(item)
+    app.menu.add(rumps.MenuItem("⭐ GitHub"))
+    app.menu.add(app.quit_btn)
+
+
+def save(store, content):
+    store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+
+def snapshot():
+    return (rumps.MenuItem.created, _headless._NSMenuItem.calls, _headless._NSMenu.moves)
+
+
+def visible_titles(menu):
+    """按 NSMenu 中的实际顺序列出可见条目的标题"""
+    return [item.title() for item in menu._menu.items
+            if not item.hidden and item.title()]
+
+
+def run(label, app, refresh, captures, action):
+    before, start = snapshot(), time.perf_counter()
+    for i in range(captures):
+        action(i)
+        refresh()
+    elapsed = (time.perf_counter() - start) / captures * 1e6
+    created, calls, moves = (b - a for a, b in zip(before, snapshot()))
+    print(f"{label:<28}{created / captures:>10.1f}{calls / captures:>10.1f}"
+          f"{moves / captures:>8.1f}{elapsed:>12.1f}")
+    return created / captures
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--captures", type=int, default=200)
+    args = parser.parse_args()
+
+    # 菜单基准不需要 Web 服务器和写入线程
+    cm.ClipFlowApp.start_web_server = lambda self: None
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "menu.db")
+        cm.ClipStore._instance = store
+        for i in range(50):
+            save(store, f"seed clip {i}")
+        for clip_id, *_ in store.recent_clips(3):
+            store.toggle_pin(clip_id)
+
+        app = cm.ClipFlowApp()
+        app.writer.close()
+        legacy_app = cm.ClipFlowApp()
+        legacy_app.writer.close()
+        n = args.captures
+
+        def capture(i):
+            save(store, f"captured clip #{i} " + "lorem ipsum " * (i % 7))
+
+        def pin(i):
+            clips = store.recent_clips(10)
+            store.toggle_pin(clips[len(clips) // 2][0])
+
+        print(f"{'scenario':<28}{'created':>10}{'appkit':>10}{'moves':>8}{'µs/refresh':>12}")
+        legacy = run("legacy: capture", legacy_app, lambda: legacy_refresh(legacy_app), n, capture)
+        run("legacy: idle", legacy_app, lambda: legacy_refresh(legacy_app), n, lambda i: None)
+
+        app.refresh_menu()
+        expected = visible_titles(app.menu)
+        worst = max(
+            run("diff: capture", app, app.refresh_menu, n, capture),
+            run("diff: pin toggle", app, app.refresh_menu, n, pin),
+            run("diff: idle", app, app.refresh_menu, n, lambda i: None),
+        )
+
+        # 增量结果必须和完整重建后看到的菜单一致
+        app.refresh_menu()
+        shown = visible_titles(app.menu) + visible_titles(app.favorites_menu)
+        probe = cm.ClipFlowApp()
+        probe.writer.close()
+        rebuilt = visible_titles(probe.menu) + visible_titles(probe.favorites_menu)
+        cm.ClipStore._instance = None
+        store.close()
+
+    print(f"\nlegacy creates {legacy:.1f} items per capture, diff creates {worst:.1f}")
+    failures = []
+    if worst:
+        failures.append("incremental refresh created menu items")
+    if shown != rebuilt:
+        failures.append(f"menu drifted from a fresh build:\n  {shown}\n  {rebuilt}")
+    if not expected:
+        failures.append("menu is empty")
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+"""
+运行指标检查：埋点的开销，以及 /metrics 和 /api/stats 的输出
+
+开销：同一条采集路径（FakeClipboardBackend → ClipboardMonitor.poll → ClipStore.save_clip）
+分三组交替运行 --rounds 轮——没有埋点的对照组（埋点前的 poll / save_clips）、关闭指标、
+开启指标——比较每次采集的中位耗时。另外单独测量一个关闭状态的埋点点位（start() + since()）
+的成本，乘以每次采集经过的点位数，得到与计时噪声无关的开销估计。
+关闭时的估计开销必须低于 1%，实测开销低于 1% 或落在轮间抖动范围内。
+
+输出：/metrics 是合法的 Prometheus 文本（直方图桶累计递增、_count 等于 +Inf 桶），
+/api/stats 的计数与实际采集条数一致，路由异常返回 500 并计入 clipflow_errors_total。
+任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_metrics.py [--rounds 15] [--ops 300]
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import statistics
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from _headless import Checks, import_core
+
+cm = import_core()
+
+# 每次采集经过的埋点：poll 里读取和 MD5 两处计时，save_clips 一处计时
+POINTS_PER_CAPTURE = 3
+
+
+class BareMonitor(cm.ClipboardMonitor):
+    """埋点之前的 poll"""
+
+    def poll(self):
+        self.last_delta = 0
+        change = self.backend.change_count()
+        if change is not None:
+            if change == self.last_change:
+                return False
+            self.last_delta = 1 if self.last_change is None else max(change - self.last_change, 1)
+            self.last_change = change
+        content = self.backend.read_text()
+        if not content or not content.strip():
+            return False
+        content_hash = hashlib.md5(content.encode()).hexdigest()
+        if content_hash == self.last_hash:
+            return False
+        self.last_hash = content_hash
+        if change is None:
+            self.last_delta = 1
+        self.on_capture(content, content_hash)
+        return True
+
+
+class BareStore(cm.ClipStore):
+    """埋点之前的 save_clips"""
+
+    def save_clips(self, clips):
+        prepared = [self._prepare(content, content_hash) for content, content_hash in clips]
+        with self._write() as conn:
+            for item in prepared:
+                self._save(conn, *item)
+
+
+def capture_run(monitor, backend, ops, tag):
+    start = time.perf_counter()
+    for i in range(ops):
+        backend.copy(f"{tag} clip {i} " + "lorem ipsum " * (i % 7))
+        monitor.poll()
+    return (time.perf_counter() - start) / ops * 1e6
+
+
+def point_cost(metrics, n=200_000):
+    """一个埋点点位（start() + since()）的平均成本，µs"""
+    histogram = metrics.histogram("clipflow_bench_point_seconds")
+    start = time.perf_counter()
+    for _ in range(n):
+        histogram.since(metrics.start())
+    return (time.perf_counter() - start) / n * 1e6
+
+
+def parse_prometheus(text):
+    """返回 {序列名: 值}；格式不对时抛出 ValueError"""
+    samples = {}
+    for line in text.splitlines():
+        if not line or line.startswith("#"):
+            continue
+        m = re.fullmatch(r'([a-zA-Z_:][a-zA-Z0-9_:]*(?:\{.*\})?) (\S+)', line)
+        if not m:
+            raise ValueError(line)
+        samples[m.group(1)] = float(m.group(2))
+    return samples
+
+
+def request(handler, path):
+    return asyncio.run(handler.dispatch(cm.HTTPRequest("GET", path, "HTTP/1.1", {})))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rounds", type=int, default=15)
+    parser.add_argument("--ops", type=int, default=300)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        off, on = cm.Metrics(enabled=False), cm.Metrics(enabled=True)
+        variants = {}
+        for label, store_cls, monitor_cls, metrics in (
+            ("no instrumentation", BareStore, BareMonitor, off),
+            ("metrics disabled", cm.ClipStore, cm.ClipboardMonitor, off),
+            ("metrics enabled", cm.ClipStore, cm.ClipboardMonitor, on),
+        ):
+            store = store_cls(Path(tmp) / f"{label}.db", metrics=metrics)
+            # 不等磁盘同步，让每次采集的耗时主要是 CPU，轮间抖动更小
+            store._writer.execute("PRAGMA synchronous=OFF")
+            backend = cm.FakeClipboardBackend()
+            variants[label] = (store, backend, monitor_cls(backend, store.save_clip, metrics=metrics), [])
+        for r in range(args.rounds):
+            # 轮流改变顺序，抵消预热和后台噪声
+            order = list(variants.items())
+            for label, (store, backend, monitor, samples) in order[r % 3:] + order[:r % 3]:
+                samples.append(capture_run(monitor, backend, args.ops, f"{label} {r}"))
+
+        print(f"{'capture path':<22}{'µs/capture':>12}{'overhead':>10}")
+        bare = statistics.median(variants["no instrumentation"][3])
+        overhead = {}
+        for label, (store, _, _, samples) in variants.items():
+            per = statistics.median(samples)
+            overhead[label] = (per - bare) / bare
+            print(f"{label:<22}{per:>12.2f}{overhead[label]:>10.2%}")
+            store.close()
+
+        disabled_point, enabled_point = point_cost(off), point_cost(on)
+        estimate = disabled_point * POINTS_PER_CAPTURE / bare
+        print(f"\none instrumentation point: {disabled_point * 1000:.0f} ns disabled, "
+              f"{enabled_point * 1000:.0f} ns enabled; estimated disabled overhead {estimate:.4%}\n")
+
+        check(estimate < 0.01, f"disabled instrumentation costs under 1% of a capture ({estimate:.4%})")
+        # 每次采集都要提交事务，实测值的轮间抖动通常比 1% 大：超出 1% 时还要求落在抖动范围之内
+        samples = variants["no instrumentation"][3]
+        noise = statistics.median(abs(s - bare) for s in samples) / bare
+        check(overhead["metrics disabled"] < max(0.01, 2 * noise),
+              f"measured disabled overhead under 1% or within noise "
+              f"({overhead['metrics disabled']:.2%}, round-to-round noise {noise:.2%})")
+        check(on.snapshot()["counters"]["clipflow_captures_total"] == args.rounds * args.ops
+              and not off.snapshot()["counters"].get("clipflow_captures_total"),
+              "only the enabled registry counts captures")
+
+        # /metrics 与 /api/stats
+        metrics = cm.Metrics(enabled=True)
+        store = cm.ClipStore(Path(tmp) / "http.db", metrics=metrics)
+        backend = cm.FakeClipboardBackend()
+        monitor = cm.ClipboardMonitor(backend, store.save_clip, metrics=metrics)
+        for i in range(50):
+            backend.copy(f"exported clip {i}")
+            monitor.poll()
+        executor = ThreadPoolExecutor(max_workers=1)
+
+        def broken_status():
+            raise RuntimeError("status failed")
+
+        handler = cm.ClipFlowWebHandler(store, executor, status=broken_status)
+        request(handler, "/api/clips")
+        request(handler, "/api/clips/1")
+        check(request(handler, "/api/status").status == 500, "an exception in a route returns 500")
+
+        response = request(handler, "/metrics")
+        text = response.body.decode()
+        try:
+            samples = parse_prometheus(text)
+            parsed = True
+        except ValueError as e:
+            samples, parsed = {}, False
+            print(f"     unparseable line: {e}")
+        check(response.status == 200 and response.headers["Content-Type"].startswith("text/plain; version=0.0.4")
+              and parsed, "/metrics serves Prometheus text")
+        buckets = [v for k, v in samples.items() if k.startswith("clipflow_clipboard_read_seconds_bucket")]
+        check(buckets == sorted(buckets) and buckets[-1] == samples.get("clipflow_clipboard_read_seconds_count") == 50,
+              "histogram buckets are cumulative and end at _count")
+        check(samples.get("clipflow_saved_clips_total") == 50 and samples.get("clipflow_clips") == 50,
+              "/metrics counts saved clips and exposes store gauges")
+        check(samples.get('clipflow_http_requests_total{route="/api/clips/{id}",status="200"}') == 1,
+              "HTTP requests are labelled by route template and status")
+
+        stats = json.loads(request(handler, "/api/stats").body)
+        check(stats["counters"]["clipflow_captures_total"] == 50
+              and stats["histograms"]["clipflow_save_seconds"]["count"] == 50
+              and stats["histograms"]["clipflow_save_seconds"]["p99"] is not None,
+              "/api/stats reports counters and latency quantiles")
+        check(stats["counters"].get('clipflow_errors_total{where="http"}') == 1
+              and "status failed" in stats["recent_errors"][-1]["error"],
+              "swallowed exceptions are counted with their cause")
+        executor.shutdown()
+        store.close()
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
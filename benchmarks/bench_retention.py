@@ -0,0 +1,175 @@
+#!/usr/bin/env python3
+"""
+保留策略基准：采集延迟是否随历史规模增长，以及策略执行是否正确
+
+第一部分在不同规模的历史库上测量 save_clip 的延迟（策略由后台 MaintenanceWorker
+分块执行），对照组是 1.6.0 在 save_clip 里执行的 NOT IN 全表删除；同时记录每个
+淘汰事务持有写锁的最长时间。第二部分在小库上检查条数、容量、天数、按类型上限
+以及收藏豁免，并检查 retention.json 里类型不对的项各自回退到默认值。任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_retention.py [--sizes 10000,100000] [--captures 200]
+"""
+
+import argparse
+import hashlib
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import Checks
+from bench_search import cm, populate
+
+LEGACY_EVICT = """
+    DELETE FROM clips WHERE pinned = 0 AND id NOT IN (
+        SELECT id FROM clips WHERE pinned = 0 ORDER BY created_at DESC LIMIT ?
+    )
+"""
+
+
+def save(store, content):
+    store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def capture_latency(tmp, size, captures):
+    store = cm.ClipStore(Path(tmp) / f"retention-{size}.db")
+    populate(store, size)
+
+    # 对照组：1.6.0 每次保存后在同一个事务里做 NOT IN 删除
+    legacy = []
+    for i in range(min(captures, 20)):
+        t0 = time.perf_counter()
+        with store._write() as conn:
+            content = f"legacy capture {i}"
+            conn.execute(cm.ClipStore.SQL_INSERT, (content, hashlib.md5(content.encode()).hexdigest(),
+                                                   *cm.clip_metadata(content), len(content.encode()),
+                                                   cm.now_ms(), 0, 0))
+            conn.execute(LEGACY_EVICT, (size,))
+        legacy.append((time.perf_counter() - t0) * 1000)
+    store._load_state()
+
+    # 实验组：保存只做插入，后台线程把超出的部分分块删除
+    policy = cm.RetentionPolicy(max_rows=size)
+    worker = cm.MaintenanceWorker(store, policy, interval=0.05).start()
+    samples = []
+    for i in range(captures):
+        t0 = time.perf_counter()
+        save(store, f"capture {size} #{i}")
+        samples.append((time.perf_counter() - t0) * 1000)
+        worker.wake()
+    worker.close()
+
+    # 一次性超出很多时，每个淘汰事务持有写锁的时间
+    policy.max_rows = size - 5 * cm.RETENTION_CHUNK
+    chunks = []
+    while True:
+        t0 = time.perf_counter()
+        deleted = store.enforce_retention(policy)
+        chunks.append((time.perf_counter() - t0) * 1000)
+        if deleted < cm.RETENTION_CHUNK:
+            break
+    store.close()
+    return statistics.median(legacy), percentile(samples, 0.5), percentile(samples, 0.99), max(chunks)
+
+
+def check_policies(tmp, check):
+    store = cm.ClipStore(Path(tmp) / "policies.db")
+    for i in range(60):
+        save(store, f"https://example.com/{i}" if i % 3 == 0 else f"note {i} " + "x" * (i * 10))
+    pinned_id = store.recent_clips(60)[-1][0]
+    store.toggle_pin(pinned_id)
+    with store._write() as conn:
+        conn.execute("UPDATE clips SET created_ms = 946684800000 WHERE id <= 10")  # 2000-01-01
+
+    def consistent():
+        total, pinned, unpinned_bytes = store._writer.execute(cm.ClipStore.SQL_COUNTS).fetchone()
+        return store.count() == total and store._unpinned_bytes == unpinned_bytes
+
+    def unpinned(where="1"):
+        return store._writer.execute(f"SELECT COUNT(*) FROM clips WHERE pinned = 0 AND {where}").fetchone()[0]
+
+    store.enforce_retention(cm.RetentionPolicy(max_rows=None, max_age_days=30))
+    check(unpinned("created_ms < 978307200000") == 0, "max_age_days removes old rows")
+    check(store.get_content(pinned_id) is not None, "pinned rows are exempt from max_age_days")
+
+    store.enforce_retention(cm.RetentionPolicy(max_rows=None, per_type={"url": 5}))
+    check(unpinned("content_type = 'url'") == 5, "per_type caps url clips at 5")
+
+    save(store, "中文内容" * 100)
+    sizes = store._writer.execute("SELECT length, size_bytes FROM clips WHERE content LIKE '中文内容%'").fetchone()
+    check(sizes == (400, 1200), f"max_bytes counts UTF-8 bytes, not characters ({sizes})")
+    store.enforce_retention(cm.RetentionPolicy(max_rows=None, max_bytes=4000))
+    check(3 < unpinned() and store._unpinned_bytes <= 4000, "max_bytes keeps unpinned content under the quota")
+
+    store.enforce_retention(cm.RetentionPolicy(max_rows=3))
+    check(unpinned() == 3, "max_rows keeps 3 unpinned rows")
+    check(store.get_content(pinned_id) is not None, "pinned rows survive every policy")
+    check(consistent(), "in-memory counters match the table")
+
+    # 分块：每次最多删 chunk 条
+    for i in range(50):
+        save(store, f"chunk {i}")
+    deleted = store.enforce_retention(cm.RetentionPolicy(max_rows=0), chunk=7)
+    check(deleted == 7, "one call deletes at most one chunk")
+    store.close()
+
+
+def check_policy_files(tmp, check):
+    """retention.json 里类型不对的项各自回退到默认值，加载出的策略能正常执行"""
+    path = Path(tmp) / "retention.json"
+    store = cm.ClipStore(Path(tmp) / "policy-files.db")
+    for i in range(20):
+        save(store, f"https://example.com/{i}" if i % 2 else f"note {i}")
+    cases = [
+        ("[1, 2]", {}),
+        ('{"per_type": [1, 2]}', {}),
+        ('{"max_rows": "100", "max_bytes": true, "max_age_days": -1}', {}),
+        ('{"max_rows": 10, "per_type": {"url": "5", "text": 3, "code": null}}',
+         {"max_rows": 10, "per_type": {"text": 3}}),
+        ('{"max_rows": null, "max_age_days": 1e999}', {"max_rows": None}),
+        ("{broken", {}),
+    ]
+    defaults = cm.RetentionPolicy().to_json()
+    for text, expected in cases:
+        path.write_text(text)
+        try:
+            policy = cm.RetentionPolicy.load(path)
+            store.enforce_retention(policy)
+            loaded = policy.to_json()
+        except Exception as e:
+            loaded = repr(e)
+        check(loaded == {**defaults, **expected}, f"retention.json {text} loads as {loaded}")
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--sizes", default="10000,100000")
+    parser.add_argument("--captures", type=int, default=200)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        print(f"{'rows':>8}{'1.6.0 ms':>12}{'p50 ms':>10}{'p99 ms':>10}{'max chunk ms':>15}")
+        results = []
+        for size in map(int, args.sizes.split(",")):
+            legacy, p50, p99, chunk = capture_latency(tmp, size, args.captures)
+            results.append(p50)
+            print(f"{size:>8}{legacy:>12.2f}{p50:>10.2f}{p99:>10.2f}{chunk:>15.2f}")
+        print()
+        check(max(results) < 5 * min(results) + 1, "capture latency does not grow with history size")
+        check_policies(tmp, check)
+        check_policy_files(tmp, check)
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+全文搜索延迟基准：在合成的大历史库上测量 ClipStore.search 的 p50 / p99
+
+查询包括常见词、两个字符的短词（展开成 trigram 走索引）、单个字符（只能逐行检查最近的记录）和长短词混合。
+另外按 --page 条一页翻完前 --walk 条结果，检查没有重复、和一次取出的结果相同，
+纯全文查询还要正好是最近的 --walk 条命中。最后检查唯一的命中早于单字扫描窗口
+（ClipStore.SEARCH_SCAN_ROWS 条）时：两个字符的词和长短词混合的查询都找得到，
+全是单个字符的查询报告结果不完整。
+
+用法: python benchmarks/bench_search.py [--rows 500000] [--budget-ms 10]
+p99 超出预算或任一检查失败时以非零状态退出。
+"""
+
+import argparse
+import hashlib
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import Checks, import_core
+
+cm = import_core()
+
+WORDS = (
+    "git commit push pull merge rebase docker kubectl deploy error warning "
+    "function return import class python swift https github token config "
+    "剪贴板 会议 文档 地址 密码 邮件 项目 需求 修复 发布 测试 服务器 数据库"
+).split()
+
+QUERIES = ["docker", "commit push", "github token", "剪贴板", "服务器 发布",
+           "error", "kubectl deploy", "数据库", "https", "zzzz-no-hit",
+           # 短词：常见的、罕见的、和长词混合，单个字符
+           "密码", "zz", "go", "密钥", "docker zz", "github 密码", "k", "钥"]
+PAGED = ["docker", "密码", "github 密码", "commit push"]
+
+
+def synthetic_clip(rng, i):
+    n = int(rng.lognormvariate(2.5, 1.0)) + 1
+    return f"{i} " + " ".join(rng.choice(WORDS) for _ in range(min(n, 400)))
+
+
+def populate(store, rows, seed=42):
+    rng = random.Random(seed)
+    batch = []
+    # 每条间隔 1 毫秒，保证时间顺序与插入顺序一致
+    start = cm.now_ms() - rows
+    with store._write() as conn:
+        for i in range(rows):
+            content = synthetic_clip(rng, i)
+            batch.append((content, hashlib.md5(content.encode()).hexdigest(), *cm.clip_metadata(content),
+                          len(content.encode()), start + i, 0, 0))
+            if len(batch) == 10000:
+                conn.executemany(cm.ClipStore.SQL_INSERT, batch)
+                batch.clear()
+        conn.executemany(cm.ClipStore.SQL_INSERT, batch)
+    store._load_state()
+
+
+def walk_pages(store, query, total, page):
+    ids, offset = [], 0
+    while offset < total:
+        rows, _ = store.search(query, page, offset)
+        if not rows:
+            break
+        ids.extend(row[0] for row in rows)
+        offset += page
+    return ids
+
+
+def check_scan_window(store, check):
+    """唯一的命中比最近 SEARCH_SCAN_ROWS 条记录都旧"""
+    content = "10.0.0.1 gateway ip 密钥"
+    # 和保存一样分配修订号：搜索按修订号缓存两个字符的词展开的 trigram
+    with store._write() as conn:
+        old_id = conn.execute(cm.ClipStore.SQL_INSERT, (
+            content, hashlib.md5(content.encode()).hexdigest(), *cm.clip_metadata(content),
+            len(content.encode()), 0, store._bump(conn), 0)).lastrowid
+    store._load_state()
+    for query in ("密钥", "ip", "gateway ip", "ip 密钥"):
+        rows, scanned = store.search(query)
+        check(scanned is None and [r[0] for r in rows] == [old_id],
+              f"{query!r} finds a match older than the scan window")
+    rows, scanned = store.search("钥")
+    check(scanned == cm.ClipStore.SEARCH_SCAN_ROWS and old_id not in [r[0] for r in rows],
+          f"single-character query past the scan window reports partial results (scanned_rows={scanned})")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--budget-ms", type=float, default=10.0)
+    parser.add_argument("--walk", type=int, default=300)
+    parser.add_argument("--page", type=int, default=20)
+    args = parser.parse_args()
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "search.db")
+        start = time.perf_counter()
+        populate(store, args.rows)
+        print(f"populated {args.rows} clips in {time.perf_counter() - start:.1f}s "
+              f"(tokenizer={store.fts_tokenizer})")
+
+        # 预热：先让页缓存 / mmap 就位，测的是常驻进程的稳态延迟
+        for query in QUERIES:
+            store.search(query, 20)
+
+        samples = []
+        print(f"{'query':<16}{'hits':>6}{'p50 ms':>10}{'p99 ms':>10}")
+        for query in QUERIES:
+            timings = []
+            for _ in range(args.repeat):
+                t0 = time.perf_counter()
+                hits, _ = store.search(query, 20)
+                timings.append((time.perf_counter() - t0) * 1000)
+            timings.sort()
+            samples.extend(timings)
+            p99 = timings[min(len(timings) - 1, int(len(timings) * 0.99))]
+            print(f"{query:<16}{len(hits):>6}{statistics.median(timings):>10.2f}{p99:>10.2f}")
+
+        print()
+        for query in PAGED:
+            ids = walk_pages(store, query, args.walk, args.page)
+            whole = [row[0] for row in store.search(query, args.walk)[0]]
+            ok = len(ids) == len(set(ids)) and ids == whole
+            if len(query) >= 3 and " " not in query:
+                with store._read() as conn:
+                    recent = {r[0] for r in conn.execute(
+                        "SELECT rowid FROM clips_fts WHERE clips_fts MATCH ? ORDER BY rowid DESC LIMIT ?",
+                        (f'"{query}"', args.walk))}
+                ok = ok and set(ids) == recent
+            check(ok, f"paging {query!r} by {args.page}: {len(ids)} rows, {len(set(ids))} unique")
+        check_scan_window(store, check)
+        store.close()
+
+    samples.sort()
+    p99 = samples[int(len(samples) * 0.99) - 1]
+    print(f"overall p50 {statistics.median(samples):.2f} ms, p99 {p99:.2f} ms "
+          f"(budget {args.budget_ms} ms)")
+    check(p99 <= args.budget_ms, f"overall p99 within {args.budget_ms} ms")
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
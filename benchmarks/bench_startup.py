@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+启动基准：核心包的导入耗时和进程启动到第一次轮询的时间
+
+每项都在新的解释器进程里测量 --runs 次取中位数：
+  1. python -X importtime -c "from clipflow import *"（应用导入的全部核心模块）报告的
+     累计导入耗时，以及自身耗时最多的模块；与交替运行的、只导入核心用到的标准库模块的进程比较，
+     差值才是 clipflow 自己的开销，机器快慢和负载对两边的影响相同；
+  2. 导入 clipflow / clipboard_manager 之后 rumps、AppKit、Foundation、objc 都没有被加载；
+  3. 从启动进程到打开数据库、启动写入线程、第一次 poll() 采集到内容并提交
+     （首次启动建库，以及库已存在的再次启动）。
+任一项超出预算或导入了 GUI 框架时以非零状态退出。
+
+用法: python benchmarks/bench_startup.py [--runs 11] [--import-overhead-ms 25] [--first-poll-budget-ms 250]
+"""
+
+import argparse
+import compileall
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import ROOT, Checks
+
+GUI_MODULES = ("rumps", "AppKit", "Foundation", "objc")
+# 核心模块直接导入的标准库模块，作为导入耗时的基线
+BASELINE = ("import base64, binascii, bisect, collections, contextlib, datetime, hashlib, html, json, "
+            "lzma, os, pathlib, queue, re, sqlite3, subprocess, threading, time, zlib")
+
+CHECK_GUI = """
+import sys
+import {module}
+print(",".join(m for m in {gui!r} if m in sys.modules))
+"""
+
+# 子进程在第一次 poll() 提交完成后打印各阶段距进程启动的毫秒数
+FIRST_POLL = """
+import sys, time
+started = float(sys.argv[1])
+import clipflow
+imported = time.time()
+store = clipflow.ClipStore(sys.argv[2])
+opened = time.time()
+writer = clipflow.CaptureWriter(store).start()
+backend = clipflow.FakeClipboardBackend()
+backend.copy("first clip after launch")
+monitor = clipflow.ClipboardMonitor(backend, writer.submit)
+captured = monitor.poll()
+polled = time.time()
+writer.flush()
+committed = time.time()
+assert captured and store.count() >= 1
+writer.close()
+store.close()
+print(" ".join(f"{(t - started) * 1000:.2f}" for t in (imported, opened, polled, committed)))
+"""
+
+
+def run_python(args):
+    # 按安装后的常态计算：使用已编译的字节码
+    env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+    return subprocess.run([sys.executable, *args], cwd=ROOT, capture_output=True, text=True, env=env, check=True)
+
+
+def import_time(statement):
+    """返回 (statement 的累计导入耗时 µs, [(自身耗时, 模块名)])
+
+    解释器启动时的导入（site 及之前）不计：之后位于顶层的条目都是 statement 引起的，
+    clipflow 的子模块在包的 __getattr__ 里按需导入，在 importtime 的输出里也各自位于顶层。
+    """
+    err = run_python(["-X", "importtime", "-c", statement]).stderr
+    modules, total, started = [], 0, False
+    for line in err.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        top_level = not name.startswith("  ")
+        if started:
+            modules.append((int(own), name.strip()))
+            if top_level:
+                total += int(cumulative)
+        elif top_level and name.strip() == "site":
+            started = True
+    return total, sorted(modules, reverse=True)
+
+
+def gui_modules_loaded(module):
+    out = run_python(["-c", CHECK_GUI.format(module=module, gui=GUI_MODULES)]).stdout.strip()
+    return [m for m in out.split(",") if m]
+
+
+def first_poll(db_path):
+    started = time.time()
+    out = run_python(["-c", FIRST_POLL, repr(started), str(db_path)]).stdout
+    return [float(x) for x in out.split()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--runs", type=int, default=11)
+    parser.add_argument("--import-overhead-ms", type=float, default=25.0)
+    parser.add_argument("--first-poll-budget-ms", type=float, default=250.0)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    compileall.compile_dir(ROOT / "clipflow", quiet=1)
+    compileall.compile_file(ROOT / "clipboard_manager.py", quiet=1)
+    totals, baselines = [], []
+    for _ in range(args.runs):
+        total, modules = import_time("from clipflow import *")
+        totals.append(total)
+        baselines.append(import_time(BASELINE)[0])
+    total, baseline = statistics.median(totals), statistics.median(baselines)
+    print(f"from clipflow import *: {total / 1000:.1f} ms cumulative, standard library baseline "
+          f"{baseline / 1000:.1f} ms (medians of {args.runs}); slowest modules:")
+    for own, name in modules[:8]:
+        print(f"  {own / 1000:8.2f} ms  {name}")
+    print()
+
+    phases = ("import", "open store", "first poll", "committed")
+    rows = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for label in ("first launch", "relaunch"):
+            samples = []
+            for i in range(args.runs):
+                db_path = Path(tmp) / (f"fresh-{i}.db" if label == "first launch" else "existing.db")
+                samples.append(first_poll(db_path))
+            rows[label] = [statistics.median(column) for column in zip(*samples)]
+    print(f"{'ms since process start':<24}" + "".join(f"{p:>12}" for p in phases))
+    for label, values in rows.items():
+        print(f"{label:<24}" + "".join(f"{v:>12.1f}" for v in values))
+    print()
+
+    check((total - baseline) / 1000 < args.import_overhead_ms,
+          f"from clipflow import * adds at most {args.import_overhead_ms:.0f} ms to the standard library baseline "
+          f"({(total - baseline) / 1000:.1f} ms)")
+    for module in ("clipflow", "clipboard_manager"):
+        loaded = gui_modules_loaded(module)
+        check(not loaded, f"import {module} loads no GUI framework ({', '.join(loaded) or 'none'})")
+    slowest = max(values[-1] for values in rows.values())
+    check(slowest < args.first_poll_budget_ms,
+          f"first capture committed within {args.first_poll_budget_ms:.0f} ms of launch ({slowest:.1f} ms)")
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+"""
+存储基准：有 / 没有 blob 层时的数据库大小和列表查询延迟
+
+合成语料以短文本为主，混入少量大段日志和 base64。对照组把阈值设为无穷大
+（全部内联存储，等同 1.6.0），实验组使用默认的 BLOB_THRESHOLD。
+报告数据库大小、写入耗时、1.6.0 的列表查询（SELECT id, content ...）、
+预览分页、复制大内容（解压）的延迟。大内容取回后与原文不一致，或者搜不到
+大内容末尾（内联的开头之外）的词时以非零状态退出。
+
+用法: python benchmarks/bench_storage.py [--clips 3000] [--large-ratio 0.04]
+"""
+
+import argparse
+import base64
+import hashlib
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from bench_search import cm, synthetic_clip
+
+LEGACY_LIST = """
+    SELECT id, content, created_at, pinned FROM clips
+    ORDER BY pinned DESC, created_at DESC, id DESC LIMIT 50
+"""
+
+
+def large_clip(rng, i):
+    """几百 KiB 的日志或 base64"""
+    if rng.random() < 0.5:
+        lines = [f"2026-10-17 12:{n // 60 % 60:02d}:{n % 60:02d} INFO worker-{rng.randrange(8)} "
+                 f"request {rng.getrandbits(32):08x} took {rng.randrange(900)} ms"
+                 for n in range(rng.randrange(1500, 6000))]
+        return f"log {i}\n" + "\n".join(lines)
+    return f"b64 {i} " + base64.b64encode(rng.randbytes(rng.randrange(50_000, 200_000))).decode()
+
+
+def corpus(count, large_ratio, seed=3):
+    rng = random.Random(seed)
+    return [large_clip(rng, i) if rng.random() < large_ratio else synthetic_clip(rng, i)
+            for i in range(count)]
+
+
+def db_size(store):
+    store._writer.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    return sum(os.path.getsize(store.db_path + suffix)
+               for suffix in ("", "-wal") if os.path.exists(store.db_path + suffix))
+
+
+def timed(fn, repeat):
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - t0) * 1000)
+    return statistics.median(samples)
+
+
+def measure(label, clips, threshold, repeat, tmp):
+    store = cm.ClipStore(Path(tmp) / f"{label}.db", blob_threshold=threshold)
+    start = time.perf_counter()
+    for i in range(0, len(clips), 64):
+        batch = clips[i:i + 64]
+        store.save_clips([(c, hashlib.md5(c.encode()).hexdigest()) for c in batch])
+    ingest = time.perf_counter() - start
+
+    large_ids = [r[0] for r in store._writer.execute(
+        "SELECT id FROM clips WHERE length > ? ORDER BY id", (cm.BLOB_THRESHOLD,))]
+    offsets = range(0, store.count(), 50)
+
+    def legacy_list():
+        with store._read() as conn:
+            conn.execute(LEGACY_LIST).fetchall()
+
+    def scan_lists():
+        for offset in offsets:
+            store.preview_rows(50, offset=offset)
+
+    result = {
+        "size": db_size(store) / 2**20,
+        "ingest": ingest,
+        "legacy": timed(legacy_list, repeat),
+        "page": timed(lambda: store.page(None, 50), repeat),
+        "scan": timed(scan_lists, max(repeat // 10, 1)),
+        "copy": timed(lambda: [store.get_content(i) for i in large_ids[:20]], max(repeat // 10, 1))
+                / max(min(len(large_ids), 20), 1),
+    }
+    by_content = {c: True for c in clips}
+    result["ok"] = all(store.get_content(i) in by_content for i in large_ids)
+    result["large"] = len(large_ids)
+    # 在一条大内容的末尾补一个只出现一次的词，另存为新的一条，应该能搜到
+    result["tail"] = True
+    if large_ids:
+        tail = store.get_content(large_ids[0]) + f"\ntailmarker{label}"
+        content_hash = hashlib.md5(tail.encode()).hexdigest()
+        store.save_clip(tail, content_hash)
+        found = [row[0] for row in store.search(f"tailmarker{label}")[0]]
+        result["tail"] = found == [store.find_clip(content_hash)]
+    store.close()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--clips", type=int, default=3000)
+    parser.add_argument("--large-ratio", type=float, default=0.04)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    # 基准需要完整的历史，不做淘汰
+    cm.MAX_HISTORY = args.clips * 2
+    clips = corpus(args.clips, args.large_ratio)
+    raw = sum(len(c.encode()) for c in clips) / 2**20
+    print(f"{len(clips)} clips, {raw:.1f} MiB of text\n")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        results = {
+            "inline (1.6.0)": measure("inline", clips, float("inf"), args.repeat, tmp),
+            "blob tier": measure("blob", clips, cm.BLOB_THRESHOLD, args.repeat, tmp),
+        }
+
+    print(f"{'':<16}{'db MiB':>9}{'ingest s':>10}{'legacy list':>13}{'page ms':>9}"
+          f"{'scan all':>10}{'copy large':>12}")
+    for label, r in results.items():
+        print(f"{label:<16}{r['size']:>9.1f}{r['ingest']:>10.2f}{r['legacy']:>13.3f}"
+              f"{r['page']:>9.3f}{r['scan']:>10.2f}{r['copy']:>12.3f}")
+    print("\n(latencies in ms; legacy list = 1.6.0's SELECT id, content ... LIMIT 50, "
+          "scan all = every preview page, copy large = get_content per large clip)")
+
+    failures = [label for label, r in results.items() if not r["ok"]]
+    for label in failures:
+        print(f"FAIL: {label} returned content that does not match the original")
+    for label, r in results.items():
+        if not r["tail"]:
+            failures.append(label)
+            print(f"FAIL: {label} search misses the end of a large clip")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
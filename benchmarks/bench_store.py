@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+存储层微基准：1.6.0 的“每次操作开关一次连接” vs ClipStore 长连接
+
+用法: python benchmarks/bench_store.py [--ops 2000] [--rows 20000]
+
+--rows 先灌入指定数量的历史记录，并把 MAX_HISTORY 调到同样大小，
+用来观察历史变大后每次写入的淘汰成本。
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import import_core
+
+cm = import_core()
+
+
+class LegacyStore:
+    """1.6.0 的存储访问方式，作为对照组"""
+
+    def __init__(self, db_path):
+        self.db_path = str(db_path)
+        conn = sqlite3.connect(self.db_path)
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS clips (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                content TEXT NOT NULL,
+                content_hash TEXT UNIQUE NOT NULL,
+                content_type TEXT DEFAULT 'text',
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                pinned INTEGER DEFAULT 0
+            )
+        """)
+        conn.commit()
+        conn.close()
+
+    def save_clip(self, content, content_hash):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            conn.execute("""
+                INSERT INTO clips (content, content_hash, created_at)
+                VALUES (?, ?, datetime('now', 'localtime'))
+                ON CONFLICT(content_hash) DO UPDATE SET created_at = datetime('now', 'localtime')
+            """, (content, content_hash))
+            conn.execute("""
+                DELETE FROM clips WHERE id NOT IN (
+                    SELECT id FROM clips ORDER BY created_at DESC LIMIT ?
+                )
+            """, (cm.MAX_HISTORY,))
+            conn.commit()
+        finally:
+            conn.close()
+
+    def recent_clips(self, limit=8):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("""
+                SELECT id, content, created_at, pinned
+                FROM clips ORDER BY pinned DESC, created_at DESC LIMIT ?
+            """, (limit,)).fetchall()
+        finally:
+            conn.close()
+
+    def count(self):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            return conn.execute("SELECT COUNT(*) FROM clips").fetchone()[0]
+        finally:
+            conn.close()
+
+    def toggle_pin(self, clip_id):
+        conn = sqlite3.connect(self.db_path)
+        try:
+            current = conn.execute("SELECT pinned FROM clips WHERE id = ?", (clip_id,)).fetchone()
+            if current:
+                new_state = 0 if current[0] else 1
+                conn.execute("UPDATE clips SET pinned = ? WHERE id = ?", (new_state, clip_id))
+                conn.commit()
+                return new_state
+        finally:
+            conn.close()
+        return None
+
+    def close(self):
+        pass
+
+
+def prefill(store, rows):
+    for i in range(rows):
+        content = f"history {i}"
+        store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+
+def run(store, ops, rows=0):
+    results = {}
+    prefill(store, rows)
+
+    def timed(name, func):
+        start = time.perf_counter()
+        for i in range(ops):
+            func(i)
+        results[name] = (time.perf_counter() - start) / ops * 1e6
+
+    def save(i):
+        content = f"clip {i} " * 8
+        store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+
+    timed("save_clip", save)
+    timed("recent_clips(10)", lambda i: store.recent_clips(10))
+    timed("count", lambda i: store.count())
+    first_id = store.recent_clips(1)[0][0]
+    timed("toggle_pin", lambda i: store.toggle_pin(first_id))
+    store.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--ops", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=0)
+    args = parser.parse_args()
+    if args.rows:
+        cm.MAX_HISTORY = args.rows
+
+    with tempfile.TemporaryDirectory() as tmp:
+        legacy = run(LegacyStore(Path(tmp) / "legacy.db"), args.ops, args.rows)
+        current = run(cm.ClipStore(Path(tmp) / "store.db"), args.ops, args.rows)
+
+    print(f"{'operation':<18}{'1.6.0 (µs)':>14}{'ClipStore (µs)':>16}{'speedup':>10}")
+    for name, before in legacy.items():
+        after = current[name]
+        print(f"{name:<18}{before:>14.1f}{after:>16.1f}{before / after:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
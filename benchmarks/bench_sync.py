@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+实例间同步检查：两个本地实例（各自的库和 Web 端口）互相拉取变更日志并收敛
+
+  1. A 有 --rows 条历史、B 有一小部分不同的历史，双向同步后两边的 (content_hash, created_ms, pinned) 完全一致；
+  2. 马上再同步一次：不传任何变更，修订号不变；同一批变更重复合并全部跳过；
+  3. 两边各做 --ops 次随机操作（新内容、再次复制、收藏 / 取消收藏、删除），
+     再同步：只传这之后的变更，传输量不超过全量同步的 --max-delta-ratio，两边再次一致；
+  4. 冲突：A 收藏之后 B 再次复制同一内容，两边都保持收藏且时间取 B 的；
+     A 删除之后 B 再复制，内容回到两边；B 清空时 A 刚收藏的内容不会被删；
+  5. prune_changes 清理日志之后，新实例 C 从 A 全量拉取得到同样的状态；
+     保留策略淘汰了大部分记录、并且过了同步期限之后，日志条数不超过剩下的记录数；
+  6. clipflow sync 命令（CLIPFLOW_HOME 指向新目录、应用没有运行）把 A 的历史写进新库。
+任一项不满足时以非零状态退出。
+
+用法: python benchmarks/bench_sync.py [--rows 20000] [--ops 500]
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.request import urlopen
+
+from _headless import ROOT, Checks, import_core
+
+import workloads
+
+cm = import_core()
+from clipflow.sync import pull  # noqa: E402
+
+
+class Instance:
+    """一个库 + 一个监听随机端口的 Web 服务器"""
+
+    def __init__(self, path):
+        self.store = cm.ClipStore(path)
+        self.server = cm.ClipFlowWebServer(self.store, port=0)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        while self.server.server is None:
+            time.sleep(0.01)
+        self.url = f"http://127.0.0.1:{self.server.port}"
+
+
+class CountingFetch:
+    """和 fetch_changes 相同，另外统计传输的字节数和变更条数"""
+
+    def __init__(self):
+        self.bytes = 0
+        self.changes = 0
+
+    def __call__(self, url, since, exclude, limit):
+        with urlopen(f"{url}/api/changes?since={since}&limit={limit}&exclude={exclude}") as response:
+            body = response.read()
+        self.bytes += len(body)
+        data = json.loads(body)
+        self.changes += len(data["changes"])
+        return data
+
+
+def sync(a, b):
+    """双向同步，返回 (传输字节数, 传输的变更条数)"""
+    fetch = CountingFetch()
+    pull(b.store, a.url, fetch=fetch)
+    pull(a.store, b.url, fetch=fetch)
+    return fetch.bytes, fetch.changes
+
+
+def state(store):
+    return sorted((r["content_hash"], r["created_ms"], r["pinned"])
+                  for records in store.export_clips() for r in records)
+
+
+def save(store, text):
+    content_hash = hashlib.md5(text.encode()).hexdigest()
+    store.save_clip(text, content_hash)
+    return store.find_clip(content_hash)
+
+
+def random_ops(store, rng, ops, tag):
+    ids = [row[0] for row in store.page(limit=2000)[0]]
+    for i in range(ops):
+        choice = rng.random()
+        if choice < 0.4 or not ids:
+            ids.append(save(store, f"{tag} new clip {i} " + rng.choice(workloads.WORDS)))
+        elif choice < 0.6:
+            content = store.get_content(rng.choice(ids))
+            if content is not None:
+                store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+        elif choice < 0.85:
+            store.set_pinned(rng.choice(ids), None)
+        else:
+            store.delete_clip(ids.pop(rng.randrange(len(ids))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20_000)
+    parser.add_argument("--ops", type=int, default=500)
+    parser.add_argument("--max-delta-ratio", type=float, default=0.1)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp = Path(tmp)
+        a, b = Instance(tmp / "a.db"), Instance(tmp / "b.db")
+        workloads.populate(cm, a.store, args.rows)
+        b.store.save_clips(list(workloads.generate(args.rows // 20, seed=11)))
+        print(f"A {a.store.count()} clips on :{a.server.port}, B {b.store.count()} clips on :{b.server.port}")
+
+        # 1. 全量
+        started = time.perf_counter()
+        full_bytes, full_changes = sync(a, b)
+        print(f"full sync: {full_changes} changes, {full_bytes / 1e6:.1f} MB in {time.perf_counter() - started:.2f} s")
+        check(state(a.store) == state(b.store) and a.store.count() >= args.rows,
+              f"both instances hold the same {a.store.count()} clips after a full sync")
+
+        # 2. 幂等
+        revisions = a.store.revision, b.store.revision
+        idle_bytes, idle_changes = sync(a, b)
+        check(idle_changes == 0 and (a.store.revision, b.store.revision) == revisions,
+              f"syncing again transfers no changes and creates no revision ({idle_bytes} bytes)")
+        changes = a.store.change_log(0, 1000)[0]
+        check(b.store.merge_changes(changes) == (0, len(changes)),
+              "merging the same batch twice skips every change")
+
+        # 3. 双方各自修改后的增量
+        rng = random.Random(5)
+        random_ops(a.store, rng, args.ops, "a")
+        random_ops(b.store, rng, args.ops, "b")
+        produced = sum(len(s.change_log(since, 10 ** 9)[0]) for s, since in (
+            (a.store, a.store.sync_cursor(b.url)[1]), (b.store, b.store.sync_cursor(a.url)[1])))
+        started = time.perf_counter()
+        delta_bytes, delta_changes = sync(a, b)
+        print(f"delta sync: {delta_changes} changes, {delta_bytes / 1e3:.1f} kB in "
+              f"{time.perf_counter() - started:.2f} s ({delta_bytes / full_bytes:.1%} of the full sync)")
+        check(state(a.store) == state(b.store), f"both instances converge after concurrent edits ({a.store.count()} clips)")
+        check(delta_bytes < full_bytes * args.max_delta_ratio,
+              f"the delta sync transfers under {args.max_delta_ratio:.0%} of the full sync ({delta_bytes / full_bytes:.1%})")
+        check(delta_changes <= produced,
+              f"only changes made since the last sync are transferred ({delta_changes} of {produced} new log entries)")
+
+        # 4. 冲突
+        text = "conflict: pinned on A, copied again on B"
+        a_id = save(a.store, text)
+        save(b.store, text)
+        time.sleep(0.002)
+        a.store.set_pinned(a_id, True)
+        time.sleep(0.002)
+        save(b.store, text)
+        touched = b.store.get_clip(b.store.find_clip(hashlib.md5(text.encode()).hexdigest()))[5]
+        sync(a, b)
+        rows = [s.get_clip(s.find_clip(hashlib.md5(text.encode()).hexdigest())) for s in (a.store, b.store)]
+        check(all(row[6] and row[5] == touched for row in rows),
+              "a pin on A survives a later copy on B, which wins the timestamp")
+
+        text = "conflict: deleted on A, copied again on B"
+        save(a.store, text)
+        sync(a, b)
+        a.store.delete_clip(a.store.find_clip(hashlib.md5(text.encode()).hexdigest()))
+        time.sleep(0.002)
+        save(b.store, text)
+        sync(a, b)
+        check(all(s.find_clip(hashlib.md5(text.encode()).hexdigest()) for s in (a.store, b.store)),
+              "a copy on B after a delete on A brings the clip back on both")
+
+        text = "conflict: pinned on A, cleared on B"
+        save(a.store, text)
+        sync(a, b)
+        a.store.set_pinned(a.store.find_clip(hashlib.md5(text.encode()).hexdigest()), True)
+        time.sleep(0.002)
+        b.store.clear_history()
+        sync(a, b)
+        check(all(s.find_clip(hashlib.md5(text.encode()).hexdigest()) for s in (a.store, b.store))
+              and state(a.store) == state(b.store),
+              "clearing B keeps a clip pinned on A, on both sides")
+
+        # 5. 清理日志后的全量拉取
+        before = a.store._writer.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        pruned = 0
+        while True:
+            n = a.store.prune_changes()
+            pruned += n
+            if n < cm.CHANGES_PRUNE_CHUNK:
+                break
+        c = Instance(tmp / "c.db")
+        pull(c.store, a.url)
+        check(state(c.store) == state(a.store),
+              f"a new instance pulling from A after pruning {pruned} of {before} log entries gets the same clips")
+
+        # 淘汰不写日志：过了同步期限后，已经不在的内容的条目被清理，日志不会无限增长
+        d = cm.ClipStore(tmp / "d.db")
+        d.save_clips(list(workloads.generate(args.rows // 4, seed=13)))
+        d.enforce_retention(cm.RetentionPolicy(max_rows=100), chunk=args.rows)
+        recent = d.prune_changes()
+        started = time.perf_counter()
+        # 连续写入时版本时间会走在墙钟前面，期限取一天以后，相当于已经过了同步期限
+        while d.prune_changes(horizon_days=-1) == cm.CHANGES_PRUNE_CHUNK:
+            pass
+        elapsed = time.perf_counter() - started
+        logged = d._writer.execute("SELECT COUNT(*) FROM changes").fetchone()[0]
+        check(recent == 0 and logged <= d.count(),
+              f"after eviction past the sync horizon the log holds {logged} entries for {d.count()} clips "
+              f"({elapsed * 1000:.0f} ms to prune {args.rows // 4} captures)")
+        d.close()
+
+        # 6. 命令行，应用没有运行
+        home = tmp / "home"
+        env = {k: v for k, v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE"}
+        env.update(PYTHONPATH=str(ROOT), CLIPFLOW_HOME=str(home), CLIPFLOW_PORT="17999")
+        result = subprocess.run([sys.executable, "-m", "clipflow", "sync", a.url],
+                                capture_output=True, text=True, env=env, cwd=ROOT)
+        port = subprocess.run([sys.executable, "-c", "from clipflow.config import WEB_PORT; print(WEB_PORT)"],
+                              capture_output=True, text=True, env=env, cwd=ROOT).stdout.strip()
+        synced = cm.ClipStore(home / "history.db") if (home / "history.db").exists() else None
+        check(result.returncode == 0 and synced is not None and state(synced) == state(a.store) and port == "17999",
+              f"clipflow sync writes into $CLIPFLOW_HOME/history.db ({result.stdout.strip() or result.stderr.strip()})")
+
+        for store in (a.store, b.store, c.store, synced):
+            if store is not None:
+                store.close()
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""
+系统集成层检查：启动和菜单刷新不再等待 AppleScript
+
+用 FakeCommandRunner 模拟每次 osascript 耗时 --delay 秒，比较 1.6.0 的同步调用
+（启动时 is_login_item + add_login_item，每次刷新 is_login_item）与 SystemIntegration
+后台线程 + TTL 缓存的耗时和 osascript 调用次数。任一检查失败时以非零状态退出。
+
+用法: python benchmarks/bench_system.py [--delay 0.3] [--refreshes 50]
+"""
+
+import argparse
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+from _headless import Checks, import_app
+
+cm = import_app()
+
+APP_PATH = "/Applications/ClipFlow.app"
+
+
+def script_calls(runner, needle):
+    return sum(needle in args[-1] for args in runner.calls)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--delay", type=float, default=0.3)
+    parser.add_argument("--refreshes", type=int, default=50)
+    args = parser.parse_args()
+
+    cm.ClipFlowApp.start_web_server = lambda self: None
+    check = Checks()
+
+    # 对照组：1.6.0 在主线程上同步调用 osascript
+    legacy = cm.FakeCommandRunner(delay=args.delay)
+    start = time.perf_counter()
+    if not cm.is_login_item(legacy):
+        cm.add_login_item(legacy, APP_PATH)
+    legacy_startup = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(3):
+        cm.is_login_item(legacy)
+    legacy_refresh = (time.perf_counter() - start) / 3
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cm.ClipStore._instance = cm.ClipStore(Path(tmp) / "system.db")
+        runner = cm.FakeCommandRunner(delay=args.delay)
+        notices = []
+        system = cm.SystemIntegration(runner, lambda *a, **k: notices.append(a), APP_PATH)
+        cm.SystemIntegration._instance = system
+
+        start = time.perf_counter()
+        app = cm.ClipFlowApp()
+        startup = time.perf_counter() - start
+        app.writer.close()
+
+        start = time.perf_counter()
+        for _ in range(args.refreshes):
+            app.refresh_menu()
+        refresh = (time.perf_counter() - start) / args.refreshes
+
+        print(f"{'':<24}{'legacy ms':>12}{'async ms':>12}")
+        print(f"{'startup':<24}{legacy_startup * 1e3:>12.1f}{startup * 1e3:>12.1f}")
+        print(f"{'refresh_menu':<24}{legacy_refresh * 1e3:>12.1f}{refresh * 1e3:>12.2f}\n")
+
+        check(startup < args.delay, f"startup does not wait on osascript ({startup * 1e3:.0f} ms)")
+        check(refresh < args.delay / 10, f"refresh does not wait on osascript ({refresh * 1e3:.2f} ms)")
+
+        # 等后台队列里的登录项检查完成
+        system.submit(lambda: None).result()
+        check("ClipFlow" in runner.login_items, "startup registers the login item in the background")
+        app.refresh_menu()
+        check(app.login_btn.title == "开机启动：已开启", "menu shows the cached login state")
+
+        gets = script_calls(runner, "every login item")
+        for _ in range(args.refreshes):
+            app.refresh_menu()
+        system.check_login_item().result()
+        check(script_calls(runner, "every login item") == gets, "refreshes within the TTL hit the cache")
+
+        app.toggle_login_item(None)
+        system.submit(lambda: None).result()
+        check("ClipFlow" not in runner.login_items and system.login_enabled is False,
+              "toggle removes the login item and updates the cache")
+        check(notices and notices[-1][2] == "已关闭开机启动", "toggle notification is sent off the UI thread")
+        check(app.need_update, "toggle schedules a menu refresh")
+
+        system.check_login_item().result()
+        check(script_calls(runner, "every login item") == gets, "toggle does not force a re-check")
+
+        system.ttl = 0
+        app.refresh_menu()
+        system.submit(lambda: None).result()
+        check(script_calls(runner, "every login item") == gets + 1, "expired cache is refreshed in the background")
+
+        system.close()
+        cm.ClipStore._instance.close()
+        cm.ClipStore._instance = None
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
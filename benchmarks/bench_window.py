@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+历史窗口数据源基准：打开窗口和滚动整个历史时每一帧的取数耗时
+
+对照组模拟 1.6.0：打开时 recent_clips(50) 读取全文，绘制每一行时再算时间标签和预览；
+实验组是 ClipRowSource 的分页预览 + LRU 页缓存。滚动按每帧可见 VISIBLE 行计算，
+包括从头到尾的顺序滚动和拖动滚动条的随机跳转。帧耗时 p99 超出预算时以非零状态退出。
+
+用法: python benchmarks/bench_window.py [--rows 50000] [--budget-ms 16]
+"""
+
+import argparse
+import hashlib
+import random
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+from bench_search import cm, populate
+
+VISIBLE = 8
+LEGACY_RECENT = """
+    SELECT id, content, created_at, pinned FROM clips
+    ORDER BY pinned DESC, created_at DESC, id DESC LIMIT 50
+"""
+
+
+def legacy_time_ago(timestamp_str):
+    """1.6.0 的 get_time_ago：每次绘制都解析时间文本"""
+    diff = datetime.now() - datetime.fromisoformat(str(timestamp_str))
+    if diff.days > 0:
+        return f"{diff.days}天前"
+    return f"{diff.seconds // 60}分钟前"
+
+
+def add_large_clips(store, every, size_kb):
+    """每隔 every 行放一条大内容，体现读取全文的代价"""
+    blob = "x" * 1023 + "\n"
+    with store._write() as conn:
+        rows = conn.execute("SELECT id, content FROM clips WHERE id % ? = 0", (every,)).fetchall()
+        for clip_id, content in rows:
+            content += blob * size_kb
+            conn.execute("UPDATE clips SET content = ? WHERE id = ?", (content, clip_id))
+            conn.execute(cm.ClipStore.SQL_SET_METADATA, (*cm.clip_metadata(content), clip_id))
+
+
+def percentile(samples, p):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+
+def frames(label, draw, positions):
+    timings = []
+    for top in positions:
+        t0 = time.perf_counter()
+        draw(top)
+        timings.append((time.perf_counter() - t0) * 1000)
+    print(f"{label:<32}{len(timings):>8}{percentile(timings, 0.5):>10.3f}"
+          f"{percentile(timings, 0.99):>10.3f}{max(timings):>10.3f}")
+    return percentile(timings, 0.99)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--large-every", type=int, default=100)
+    parser.add_argument("--large-kb", type=int, default=32)
+    parser.add_argument("--budget-ms", type=float, default=16.0)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "window.db")
+        populate(store, args.rows)
+        add_large_clips(store, args.large_every, args.large_kb)
+        total = store.count()
+        rng = random.Random(7)
+        print(f"{total} clips, every {args.large_every}th is {args.large_kb} KiB\n")
+        print(f"{'frame':<32}{'n':>8}{'p50 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+
+        # 对照组：只能看到 50 行，每次打开都重新读取全文
+        def legacy_open(_):
+            with store._read() as conn:
+                clips = conn.execute(LEGACY_RECENT).fetchall()
+            for clip_id, content, created_at, pinned in clips[:VISIBLE]:
+                legacy_time_ago(created_at)
+                content.replace('\n', ' ↵ ')[:60]
+            return clips
+
+        clips = legacy_open(0)
+
+        def legacy_draw(top):
+            for clip_id, content, created_at, pinned in clips[top:top + VISIBLE]:
+                legacy_time_ago(created_at)
+                content.replace('\n', ' ↵ ')[:60]
+
+        frames("legacy open (50 rows)", legacy_open, range(20))
+        frames("legacy scroll (50 rows)", legacy_draw, range(50 - VISIBLE))
+
+        def open_window(_):
+            source = cm.ClipRowSource(store)
+            source.count()
+            for i in range(VISIBLE):
+                source.row(i)
+
+        source = cm.ClipRowSource(store)
+
+        def draw(top):
+            source.count()
+            for i in range(top, min(top + VISIBLE, total)):
+                source.row(i)
+
+        worst = max(
+            frames("open", open_window, range(20)),
+            frames("scroll whole history", draw, range(0, total, 3)),
+            frames("scrollbar jumps", draw, [rng.randrange(total) for _ in range(500)]),
+        )
+        print(f"\npage cache: {source.hits} hits, {source.misses} misses, "
+              f"{len(source.pages)} pages resident")
+
+        # 修订号变化后缓存失效，看到新内容
+        content = "window benchmark fresh clip"
+        store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+        fresh = source.row(0)
+        copied = store.get_content(fresh[0])
+        store.close()
+
+    failures = []
+    if worst > args.budget_ms:
+        failures.append(f"frame p99 {worst:.2f} ms exceeds {args.budget_ms} ms")
+    if copied != content:
+        failures.append("row source did not pick up the new revision")
+    for failure in failures:
+        print("FAIL:", failure)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+结构迁移检查：用 1.6.0 的建表语句和写入语句生成夹具库，再用当前版本打开并升级
+
+检查 user_version、行数、内容（包括移进 blob 表的大内容）、收藏状态、created_ms 与
+created_at 文本换算一致、列表排序与 1.6.0 相同、新旧索引、重复打开不再迁移，
+以及迁移中途失败后下次启动能继续完成。同时报告大库迁移的总耗时和单个事务
+持有写锁的最长时间，以及 get_time_ago 解析文本和整数运算的耗时对比。
+任一检查失败时以非零状态退出。
+
+用法: python benchmarks/check_migrations.py [--rows 50000] [--chunk 5000]
+"""
+
+import argparse
+import hashlib
+import sqlite3
+import sys
+import tempfile
+import time
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from _headless import Checks, import_core
+
+cm = import_core()
+
+# 1.6.0 的 init_db() 和 save_clip()
+V160_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS clips (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        content TEXT NOT NULL,
+        content_hash TEXT UNIQUE NOT NULL,
+        content_type TEXT DEFAULT 'text',
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        pinned INTEGER DEFAULT 0
+    )
+"""
+V160_INSERT = """
+    INSERT INTO clips (content, content_hash, created_at)
+    VALUES (?, ?, ?)
+    ON CONFLICT(content_hash) DO UPDATE SET created_at = excluded.created_at
+"""
+V160_RECENT = "SELECT id, created_at, pinned FROM clips ORDER BY pinned DESC, created_at DESC LIMIT ?"
+
+
+def v160_time_ago(timestamp_str):
+    """1.6.0 的 get_time_ago"""
+    try:
+        dt = datetime.fromisoformat(str(timestamp_str).replace("Z", "+00:00"))
+        diff = datetime.now() - dt
+        if diff.days > 0:
+            return f"{diff.days}天前"
+        elif diff.seconds >= 3600:
+            return f"{diff.seconds // 3600}小时前"
+        elif diff.seconds >= 60:
+            return f"{diff.seconds // 60}分钟前"
+        else:
+            return "刚刚"
+    except:
+        return ""
+
+
+def fixture_clip(i):
+    if i % 97 == 0:
+        return f"large {i}\n" + "log line with some text 日志\n" * 3000 + f"tail{i:06d}"
+    if i % 5 == 0:
+        return f"https://example.com/item/{i}"
+    if i % 7 == 0:
+        return f"def f{i}():\n    return {i};\n"
+    return f"剪贴板内容 {i} " + "lorem ipsum " * (i % 13)
+
+
+def make_fixture(path, rows):
+    """1.6.0 写出的库：本地时间文本、没有任何新列和索引，一部分收藏、一部分被重新复制过"""
+    conn = sqlite3.connect(path)
+    conn.execute(V160_SCHEMA)
+    start = datetime.now() - timedelta(seconds=rows * 2)
+    contents = [fixture_clip(i) for i in range(rows)]
+    conn.executemany(V160_INSERT, [
+        (content, hashlib.md5(content.encode()).hexdigest(),
+         (start + timedelta(seconds=2 * i)).strftime("%Y-%m-%d %H:%M:%S"))
+        for i, content in enumerate(contents)
+    ])
+    if rows < 2:
+        conn.commit()
+        conn.close()
+        return {}
+    # 重新复制旧内容，时间戳更新为最新
+    again = (start + timedelta(seconds=2 * rows + 1)).strftime("%Y-%m-%d %H:%M:%S")
+    conn.execute(V160_INSERT, (contents[1], hashlib.md5(contents[1].encode()).hexdigest(), again))
+    conn.execute("UPDATE clips SET pinned = 1 WHERE id % 11 = 0")
+    conn.commit()
+    conn.close()
+    return {hashlib.md5(c.encode()).hexdigest(): c for c in contents}
+
+
+def snapshot(path):
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, content_hash, created_at, pinned FROM clips ORDER BY id").fetchall()
+    order = [r[0] for r in conn.execute(V160_RECENT, (len(rows),))]
+    conn.close()
+    return rows, order
+
+
+class TimedStore(cm.ClipStore):
+    """记录每个写事务（含提交）持有写锁的时间"""
+
+    chunk = cm.MIGRATION_CHUNK
+    holds = []
+
+    @contextmanager
+    def _write(self):
+        t0 = time.perf_counter()
+        with super()._write() as conn:
+            yield conn
+        self.holds.append((time.perf_counter() - t0) * 1000)
+
+    def _migrate(self, chunk=None):
+        super()._migrate(self.chunk)
+
+
+def local_ms(text):
+    return int(datetime.strptime(text, "%Y-%m-%d %H:%M:%S").timestamp() * 1000)
+
+
+def verify(check, label, path, before, contents):
+    rows, order = before
+    store = cm.ClipStore(path)
+    conn = store._writer
+    check(conn.execute("PRAGMA user_version").fetchone()[0] == len(cm.ClipStore.MIGRATIONS),
+          f"{label}: user_version is {len(cm.ClipStore.MIGRATIONS)}")
+    check(store.count() == len(rows), f"{label}: row count preserved ({len(rows)})")
+    migrated = {r[0]: r for r in conn.execute(
+        "SELECT id, content_hash, created_ms, pinned, preview, length FROM clips")}
+    check(all(migrated[i][1] == h and migrated[i][3] == p for i, h, _, p in rows),
+          f"{label}: hashes and pinned flags preserved")
+    check(all(migrated[i][2] == local_ms(t) for i, _, t, _ in rows),
+          f"{label}: created_ms matches the local created_at text")
+    check(all(r[4] is not None and r[5] is not None for r in migrated.values()),
+          f"{label}: preview and length backfilled")
+    check(all(store.get_content(i) == contents[h] for i, h, _, _ in rows),
+          f"{label}: content (including blobs) unchanged")
+    sizes = dict(conn.execute("SELECT id, size_bytes FROM clips"))
+    check(all(sizes[i] == len(contents[h].encode()) for i, h, _, _ in rows),
+          f"{label}: size_bytes is the UTF-8 size (including blobs)")
+    recent = [r[0] for r in store.recent_clips(len(rows))]
+    check(recent == order, f"{label}: list order matches 1.6.0")
+    indexes = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+    check({"idx_clips_pinned_created_ms", "idx_clips_created_ms", "idx_clips_type_created_ms"} <= indexes
+          and "idx_clips_pinned_created" not in indexes, f"{label}: indexes on created_ms only")
+    try:
+        # 外部内容表的 integrity-check 会逐行比对索引和 clips 的内容
+        conn.execute("INSERT INTO clips_fts(clips_fts) VALUES ('integrity-check')")
+        conn.execute("INSERT INTO clips_blob_fts(clips_blob_fts) VALUES ('integrity-check')")
+        fts_ok = conn.execute(cm.ClipStore.SQL_GET_META, ("fts_backfill",)).fetchone() is None
+    except sqlite3.DatabaseError:
+        fts_ok = False
+    check(fts_ok, f"{label}: full-text index covers every row")
+    # 大内容末尾的词在内联的开头之外，只有按全文建索引才搜得到
+    tails = [(i, contents[h][-10:]) for i, h, _, _ in rows if contents[h].startswith("large ")][:5]
+    check(all([r[0] for r in store.search(tail)[0]] == [i] for i, tail in tails),
+          f"{label}: search finds text past the inline prefix of blob clips")
+    logged = dict(conn.execute("SELECT content_hash, op FROM changes"))
+    check(store.origin and logged == {h: "insert" for _, h, _, _ in rows},
+          f"{label}: change log has one insert per clip")
+    store.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--chunk", type=int, default=cm.MIGRATION_CHUNK)
+    args = parser.parse_args()
+
+    check = Checks()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        # 空的 1.6.0 库
+        empty = str(Path(tmp) / "empty.db")
+        make_fixture(empty, 0)
+        verify(check, "empty 1.6.0", empty, snapshot(empty), {})
+
+        # 小库，分块大小 7，覆盖多个块和块边界
+        small = str(Path(tmp) / "small.db")
+        contents = make_fixture(small, 300)
+        before = snapshot(small)
+        TimedStore.chunk = 7
+        TimedStore(small).close()
+        verify(check, "1.6.0 in 7-row chunks", small, before, contents)
+
+        # 重复打开不再迁移
+        store = cm.ClipStore(small)
+        rev = store.revision
+        store.close()
+        check(rev == 0, "reopening a migrated database does not touch rows")
+
+        # 迁移中途失败：下次启动继续完成
+        broken = str(Path(tmp) / "broken.db")
+        contents = make_fixture(broken, 300)
+        before = snapshot(broken)
+        original, calls = cm.store.clip_metadata, [0]
+
+        def failing(content):
+            calls[0] += 1
+            if calls[0] > 120:
+                raise RuntimeError("simulated crash")
+            return original(content)
+
+        # 迁移在 clipflow.store 里查找 clip_metadata
+        cm.store.clip_metadata = failing
+        try:
+            TimedStore(broken)
+            crashed = False
+        except RuntimeError:
+            crashed = True
+        cm.store.clip_metadata = original
+        conn = sqlite3.connect(broken)
+        version = conn.execute("PRAGMA user_version").fetchone()[0]
+        conn.close()
+        check(crashed and version == 0, "interrupted migration leaves user_version at 0")
+        verify(check, "resumed after crash", broken, before, contents)
+
+        # 大库：总耗时和单个事务的最长持锁时间
+        large = str(Path(tmp) / "large.db")
+        contents = make_fixture(large, args.rows)
+        before = snapshot(large)
+        TimedStore.chunk, TimedStore.holds = args.chunk, []
+        start = time.perf_counter()
+        TimedStore(large).close()
+        elapsed = time.perf_counter() - start
+        print(f"\nmigrated {args.rows} rows in {elapsed:.2f} s, {len(TimedStore.holds)} write transactions, "
+              f"longest holds the lock {max(TimedStore.holds):.1f} ms\n")
+        verify(check, f"{args.rows}-row 1.6.0", large, before, contents)
+
+        # 渲染时间标签：解析文本 vs 整数运算
+        texts = [t for _, _, t, _ in before[0][:1000]]
+        millis = [local_ms(t) for t in texts]
+        t0 = time.perf_counter()
+        for _ in range(20):
+            for text in texts:
+                v160_time_ago(text)
+        legacy = (time.perf_counter() - t0) / (20 * len(texts)) * 1e6
+        t0 = time.perf_counter()
+        for _ in range(20):
+            for ms in millis:
+                cm.get_time_ago(ms)
+        current = (time.perf_counter() - t0) / (20 * len(millis)) * 1e6
+        print(f"\nget_time_ago: 1.6.0 {legacy:.2f} µs/row, created_ms {current:.2f} µs/row")
+
+    sys.exit(1 if check.failures else 0)
+
+
+if __name__ == "__main__":
+    main()
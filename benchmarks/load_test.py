@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Web 服务器压测：1 / 10 / 100 个并发 keep-alive 客户端的 p50 / p99 延迟
+
+用法:
+  python benchmarks/load_test.py                       # 启动临时服务器（合成数据）
+  python benchmarks/load_test.py --url http://127.0.0.1:17890/api/clips   # 压测正在运行的 ClipFlow
+"""
+
+import argparse
+import asyncio
+import hashlib
+import statistics
+import tempfile
+import threading
+import time
+from pathlib import Path
+from urllib.parse import urlsplit
+
+from _headless import import_core
+
+cm = import_core()
+
+
+async def client(host, port, target, deadline, latencies):
+    reader, writer = await asyncio.open_connection(host, port)
+    request = f"GET {target} HTTP/1.1\r\nHost: {host}\r\nConnection: keep-alive\r\n\r\n".encode()
+    try:
+        while time.perf_counter() < deadline:
+            start = time.perf_counter()
+            writer.write(request)
+            await writer.drain()
+            length = 0
+            while True:
+                line = await reader.readline()
+                if line in (b"\r\n", b""):
+                    break
+                if line.lower().startswith(b"content-length:"):
+                    length = int(line.split(b":")[1])
+            await reader.readexactly(length)
+            latencies.append((time.perf_counter() - start) * 1000)
+    finally:
+        writer.close()
+
+
+async def run_level(host, port, target, concurrency, duration):
+    latencies = []
+    deadline = time.perf_counter() + duration
+    await asyncio.gather(*(client(host, port, target, deadline, latencies)
+                           for _ in range(concurrency)))
+    return latencies
+
+
+def start_server(rows):
+    tmp = tempfile.mkdtemp()
+    store = cm.ClipStore(Path(tmp) / "load.db")
+    cm.MAX_HISTORY = max(cm.MAX_HISTORY, rows)
+    for i in range(rows):
+        content = f"load test clip {i} " * 10
+        store.save_clip(content, hashlib.md5(content.encode()).hexdigest())
+    server = cm.ClipFlowWebServer(store, "127.0.0.1", 0)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    while server.server is None:
+        time.sleep(0.01)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="压测已运行的实例，而不是启动临时服务器")
+    parser.add_argument("--path", default="/api/clips?limit=50")
+    parser.add_argument("--rows", type=int, default=1000)
+    parser.add_argument("--duration", type=float, default=3.0)
+    parser.add_argument("--levels", default="1,10,100")
+    args = parser.parse_args()
+
+    if args.url:
+        url = urlsplit(args.url)
+        host, port = url.hostname, url.port or 80
+        target = url.path + (f"?{url.query}" if url.query else "")
+    else:
+        server = start_server(args.rows)
+        host, port, target = "127.0.0.1", server.port, args.path
+
+    print(f"target {target}")
+    print(f"{'clients':>8}{'requests':>10}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}")
+    for level in (int(x) for x in args.levels.split(",")):
+        latencies = asyncio.run(run_level(host, port, target, level, args.duration))
+        latencies.sort()
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"{level:>8}{len(latencies):>10}{len(latencies) / args.duration:>10.0f}"
+              f"{statistics.median(latencies):>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+断言热点查询走索引、不产生临时排序
+
+用法: python benchmarks/query_plans.py   （有不符合预期的计划时以非零状态退出）
+"""
+
+import sys
+import tempfile
+from pathlib import Path
+
+from _headless import import_core
+
+cm = import_core()
+
+# (名称, SQL, 参数, 计划中必须出现的片段, 计划中不允许出现的片段)
+CHECKS = [
+    ("recent list", cm.ClipStore.SQL_RECENT, (10,),
+     "idx_clips_pinned_created_ms", "TEMP B-TREE"),
+    ("page after cursor", cm.ClipStore.SQL_PAGE_AFTER, (0, 1704067200000, 1, 50),
+     "idx_clips_pinned_created_ms", "TEMP B-TREE"),
+    ("changes since", cm.ClipStore.SQL_CHANGED, (0, 500),
+     "idx_clips_rev", "TEMP B-TREE"),
+    ("eviction", cm.ClipStore.SQL_EVICT, (1,),
+     "idx_clips_pinned_created_ms", "TEMP B-TREE"),
+    ("expiry", cm.ClipStore.SQL_EXPIRED, (1704067200000, 1),
+     "idx_clips_pinned_created_ms", "TEMP B-TREE"),
+    ("per-type eviction", cm.ClipStore.SQL_EVICT_TYPE, ("url", 1),
+     "idx_clips_type_created_ms", "TEMP B-TREE"),
+    ("dedupe lookup", cm.ClipStore.SQL_FIND_HASH, ("x",),
+     "sqlite_autoindex_clips", "SCAN"),
+]
+
+
+def query_plan(conn, sql, params):
+    rows = conn.execute("EXPLAIN QUERY PLAN " + sql, params).fetchall()
+    return " | ".join(row[-1] for row in rows)
+
+
+def main():
+    failures = 0
+    with tempfile.TemporaryDirectory() as tmp:
+        store = cm.ClipStore(Path(tmp) / "plans.db")
+        for name, sql, params, required, forbidden in CHECKS:
+            plan = query_plan(store._writer, sql, params)
+            ok = required in plan and forbidden not in plan
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name:<18} {plan}")
+        store.close()
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+轮询策略仿真：用虚拟时钟回放复制事件轨迹，比较固定 1 Hz 与自适应轮询
+
+对每种策略输出采集率（被读到的复制 / 全部复制）、每小时唤醒次数和平均发现延迟。
+结果完全确定；任一轨迹上自适应策略的采集率低于固定 1 Hz 或唤醒次数更多时以非零状态退出。
+
+traces/synthetic_copy_events.csv 是 generate_trace(--hours 8 --seed 7) 合成的轨迹，
+不是真实录制；为避免只对这一条轨迹调参，另外用 --seeds 指定的种子各合成一条一起检查。
+有真实录制时用 --trace 回放（每行一个复制时刻，首行 duration=秒数）。
+
+用法:
+  python benchmarks/sim_polling.py [--trace benchmarks/traces/synthetic_copy_events.csv] [--seeds 1,2,3]
+  python benchmarks/sim_polling.py --generate traces/new.csv --hours 8 --seed 7
+"""
+
+import argparse
+import random
+import sys
+from pathlib import Path
+
+from _headless import import_core
+
+cm = import_core()
+
+DEFAULT_TRACE = Path(__file__).resolve().parent / "traces" / "synthetic_copy_events.csv"
+
+
+def generate_trace(hours, seed):
+    """合成一段办公场景的复制轨迹：长时间空闲 + 工作时段 + 连续快速复制"""
+    rng = random.Random(seed)
+    end = hours * 3600
+    t = rng.expovariate(1 / 600)
+    events = []
+    while t < end:
+        session_end = t + rng.uniform(120, 900)
+        while t < min(session_end, end):
+            events.append(t)
+            if rng.random() < 0.25:
+                # 连续复制，间隔不到一秒
+                for _ in range(rng.randint(1, 2)):
+                    t += rng.uniform(0.15, 1.0)
+                    events.append(t)
+            t += rng.lognormvariate(2.0, 1.0)
+        t += rng.expovariate(1 / 1200)
+    return [e for e in events if e < end], end
+
+
+def load_trace(path):
+    lines = Path(path).read_text().split()
+    duration = float(lines[0].split("=")[1])
+    return [float(x) for x in lines[1:]], duration
+
+
+def save_trace(path, events, duration):
+    body = "\n".join(f"{e:.3f}" for e in events)
+    Path(path).write_text(f"duration={duration:.0f}\n{body}\n")
+
+
+def simulate(events, duration, scheduler):
+    backend = cm.FakeClipboardBackend()
+    monitor = cm.ClipboardMonitor(backend, lambda content, digest: None)
+    monitor.poll()
+    latencies = []
+    captured = 0
+    now, i = 0.0, 0
+    while now < duration:
+        now += scheduler.interval
+        last_event = None
+        while i < len(events) and events[i] <= now:
+            backend.copy(f"clip {i}")
+            last_event = events[i]
+            i += 1
+        if monitor.poll():
+            captured += 1
+            latencies.append(now - last_event)
+        scheduler.record(monitor.last_delta)
+    hours = duration / 3600
+    return {
+        "capture_rate": captured / len(events),
+        "wakeups_per_hour": scheduler.wakeups / hours,
+        "mean_latency_ms": sum(latencies) / len(latencies) * 1000,
+        "missed": scheduler.missed_changes,
+    }
+
+
+def run_trace(label, events, duration):
+    print(f"trace {label}: {len(events)} copies over {duration / 3600:.1f} h")
+    policies = {
+        "fixed 1 Hz (1.6.0)": cm.AdaptivePollScheduler(floor=1.0, ceiling=1.0, hold=0, linger=0),
+        "adaptive (default)": cm.AdaptivePollScheduler(),
+    }
+    results = {}
+    print(f"{'policy':<22}{'capture':>9}{'wakeups/h':>11}{'latency ms':>12}{'missed':>8}")
+    for name, scheduler in policies.items():
+        r = results[name] = simulate(events, duration, scheduler)
+        print(f"{name:<22}{r['capture_rate']:>8.1%}{r['wakeups_per_hour']:>11.0f}"
+              f"{r['mean_latency_ms']:>12.0f}{r['missed']:>8}")
+    fixed, adaptive = results.values()
+    return (adaptive["capture_rate"] >= fixed["capture_rate"]
+            and adaptive["wakeups_per_hour"] <= fixed["wakeups_per_hour"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--trace", default=str(DEFAULT_TRACE))
+    parser.add_argument("--generate", metavar="PATH")
+    parser.add_argument("--hours", type=float, default=8)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--seeds", default="1,2,3", help="额外合成轨迹的种子，逗号分隔，空串表示不加")
+    args = parser.parse_args()
+
+    if args.generate:
+        events, duration = generate_trace(args.hours, args.seed)
+        save_trace(args.generate, events, duration)
+        print(f"wrote {len(events)} events over {duration / 3600:.1f} h to {args.generate}")
+        return
+
+    traces = {Path(args.trace).name: load_trace(args.trace)}
+    for seed in filter(None, args.seeds.split(",")):
+        traces[f"synthetic seed {seed}"] = generate_trace(args.hours, int(seed))
+    ok = True
+    for label, (events, duration) in traces.items():
+        ok = run_trace(label, events, duration) and ok
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+基准套件：在 100 / 1 万 / 100 万条合成历史上测量主要路径，结果写成 JSON，可比较两次运行
+
+每个规模新建一个库，用 workloads.py 的分布填充，然后在无界面环境（桩 rumps / AppKit、
+FakeClipboardBackend）里驱动真实的 ClipFlowApp：
+  capture_idle      check_clipboard 空闲 tick（剪贴板没有变化）
+  capture_new       复制新内容后的 check_clipboard（读取、MD5、放入写入队列）
+  save_clip         同步保存一条新内容（计算元数据、提交事务）
+  refresh_menu      保存一条新内容后刷新菜单
+  window_open       历史窗口 refresh_data 等价的查询：行数 + 第一屏 30 行
+  window_scroll     跳到随机位置读取一屏
+  window_search     搜索后的行数 + 第一屏
+  api_clips         GET /api/clips?limit=50（gzip）
+  api_clips_next    按游标取第二页
+  api_clip          GET /api/clips/<随机 id>
+每项重复测量 --repeat 轮，报告各轮 p50 / p90 / p99 / 平均耗时（µs）的中位数，
+并记录各轮 p50 / p99 的最小和最大值作为这次运行的波动范围。另外按空闲 tick 的 CPU 时间和最长轮询间隔
+换算空闲时的 CPU 占用，检查 README 里「< 0.1% CPU」的说法。
+
+用法:
+  python benchmarks/suite.py [--scales 100,10000,1000000] [--ops 300] [--repeat 5] [--output results.json]
+  python benchmarks/suite.py --compare base1.json,base2.json,base3.json new1.json,new2.json,new3.json
+                             [--threshold 0.25] [--min-us 20]
+同一棵树在不同进程里的结果也会差出几十个百分点，比较时每边最好给出几次独立运行（逗号分隔），
+各轮合在一起取中位数和范围。任一项 p50 或 p99 的中位数变慢超过 threshold 和两边自身的波动
+幅度（且绝对值超过 min-us），并且新结果最快的一轮也慢于基准最慢的一轮，才视为回归，以非零
+状态退出；运行模式下说法不成立时以非零状态退出。
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from urllib.parse import quote
+
+from _headless import import_app
+
+import workloads
+
+cm = import_app(stub_rumps=True)
+
+CPU_CLAIM_PERCENT = 0.1
+
+
+def percentiles(samples):
+    samples = sorted(samples)
+
+    def pick(p):
+        return samples[min(len(samples) - 1, int(len(samples) * p))]
+
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "mean": statistics.fmean(samples)}
+
+
+def summarize(rounds):
+    """每轮分别求分位数，取各轮的中位数；p50 / p99 另外记录各轮的最小和最大值"""
+    per_round = [percentiles(samples) for samples in rounds]
+    summary = {"n": sum(len(samples) for samples in rounds), "rounds": len(rounds)}
+    for key in ("p50", "p90", "p99", "mean"):
+        summary[key] = round(statistics.median(r[key] for r in per_round), 2)
+    for key in ("p50", "p99"):
+        summary[f"{key}_range"] = [round(min(r[key] for r in per_round), 2), round(max(r[key] for r in per_round), 2)]
+    return summary
+
+
+def measure(ops, op, setup=None, warmup=5):
+    """调用 op(i) ops 次，返回每次的耗时（µs）；setup(i) 在计时之外执行"""
+    samples = []
+    for i in range(-warmup, ops):
+        if setup:
+            setup(i)
+        start = time.perf_counter()
+        op(i)
+        if i >= 0:
+            samples.append((time.perf_counter() - start) * 1e6)
+    return samples
+
+
+def measure_rounds(repeat, ops, op, setup=None):
+    return [measure(ops, op, setup) for _ in range(repeat)]
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=Path(__file__).parent,
+                              capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def run_scale(tmp, rows, ops, seed, repeat):
+    store = cm.ClipStore(Path(tmp) / f"suite-{rows}.db")
+    started = time.perf_counter()
+    workloads.populate(cm, store, rows, seed)
+    populate_s = time.perf_counter() - started
+    cm.ClipStore._instance = store
+    backend = cm.FakeClipboardBackend()
+    cm.set_backend(backend)
+    app = cm.ClipFlowApp()
+    app.maintenance.close()
+    rng = random.Random(seed)
+    # capture_new、save_clip、refresh_menu 每轮各取 ops + 5 条新内容
+    fresh = workloads.generate(3 * (ops + 5) * repeat + 100, seed + 1, start=rows)
+    results = {}
+
+    def bench(op, setup=None, n=ops):
+        return summarize(measure_rounds(repeat, n, op, setup))
+
+    # 采集：空闲 tick 和新内容 tick
+    app.refresh_menu()
+    app.check_clipboard(None)
+    cpu = time.process_time()
+    results["capture_idle"] = bench(lambda i: app.check_clipboard(None), n=ops * 10)
+    idle_cpu = (time.process_time() - cpu) / ((ops * 10 + 5) * repeat)
+
+    def copy(i):
+        backend.copy(next(fresh)[0])
+        app.need_update = False
+
+    results["capture_new"] = bench(lambda i: app.check_clipboard(None), setup=copy)
+    app.writer.flush()
+    app.writer.close()
+
+    def save(i):
+        store.save_clip(*next(fresh))
+
+    results["save_clip"] = bench(save)
+    results["refresh_menu"] = bench(lambda i: app.refresh_menu(), setup=save)
+
+    # 历史窗口：ClipFlowWindow.refresh_data 之后 TableView 绘制第一屏
+    source = cm.ClipRowSource(store)
+
+    def window_open(i):
+        source.set_query("")
+        source.invalidate()
+        for n in range(min(30, source.count())):
+            source.row(n)
+
+    def window_scroll(i):
+        top = rng.randrange(max(source.count() - 30, 1))
+        for n in range(top, min(top + 30, source.count())):
+            source.row(n)
+
+    def window_search(i):
+        source.set_query(rng.choice(workloads.WORDS))
+        for n in range(min(30, source.count())):
+            source.row(n)
+
+    results["window_open"] = bench(window_open)
+    source.set_query("")
+    results["window_scroll"] = bench(window_scroll)
+    results["window_search"] = bench(window_search)
+
+    # Web 接口：直接调用路由，不经过套接字
+    executor = ThreadPoolExecutor(max_workers=2)
+    handler = cm.ClipFlowWebHandler(store, executor, status=app.status)
+    loop = asyncio.new_event_loop()
+    ids = [row[0] for row in store.recent_clips(min(rows, 1000))]
+
+    def get(path, headers=None):
+        request = cm.HTTPRequest("GET", path, "HTTP/1.1", {"accept-encoding": "gzip"} if headers is None else headers)
+        return loop.run_until_complete(handler.dispatch(request))
+
+    cursor = json.loads(get("/api/clips?limit=50", {}).body)["next_cursor"]
+    results["api_clips"] = bench(lambda i: get("/api/clips?limit=50"))
+    if cursor:
+        results["api_clips_next"] = bench(lambda i: get(f"/api/clips?limit=50&after={quote(cursor)}"))
+    results["api_clip"] = bench(lambda i: get(f"/api/clips/{rng.choice(ids)}"))
+    loop.close()
+    executor.shutdown()
+
+    cm.ClipStore._instance = None
+    store.close()
+    derived = {
+        "populate_s": round(populate_s, 2),
+        "idle_tick_cpu_us": round(idle_cpu * 1e6, 2),
+        # 空闲时调度器把轮询间隔放宽到 POLL_CEILING
+        "idle_cpu_percent": round(idle_cpu / cm.POLL_CEILING * 100, 5),
+    }
+    return results, derived
+
+
+def run(args):
+    scales = [int(s) for s in args.scales.split(",")]
+    report = {
+        "version": cm.VERSION,
+        "revision": git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "ops": args.ops,
+        "repeat": args.repeat,
+        "seed": args.seed,
+        "scales": {},
+    }
+    # 菜单、Web 服务器和登录项都不需要真实的系统调用
+    cm.ClipFlowApp.start_web_server = lambda self: None
+    cm.SystemIntegration._instance = cm.SystemIntegration(runner=cm.FakeCommandRunner(), notifier=lambda *a, **k: None)
+    with tempfile.TemporaryDirectory() as tmp:
+        for rows in scales:
+            print(f"== {rows} rows", flush=True)
+            results, derived = run_scale(tmp, rows, args.ops, args.seed, args.repeat)
+            report["scales"][str(rows)] = {"results": results, "derived": derived}
+            print(f"{'scenario':<18}{'p50 µs':>10}{'p90 µs':>10}{'p99 µs':>10}{'mean µs':>10}")
+            for name, r in results.items():
+                print(f"{name:<18}{r['p50']:>10.1f}{r['p90']:>10.1f}{r['p99']:>10.1f}{r['mean']:>10.1f}")
+            print(f"populated in {derived['populate_s']} s; idle tick {derived['idle_tick_cpu_us']} µs CPU "
+                  f"= {derived['idle_cpu_percent']:.4f}% CPU at {cm.POLL_CEILING:g} s polling\n")
+    cm.SystemIntegration._instance.close()
+
+    worst = max(s["derived"]["idle_cpu_percent"] for s in report["scales"].values())
+    report["claims"] = {"idle_cpu_under_0.1_percent": worst < CPU_CLAIM_PERCENT}
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False) + "\n")
+        print(f"wrote {args.output}")
+    ok = all(report["claims"].values())
+    print(("ok   " if ok else "FAIL ") + f"idle CPU under {CPU_CLAIM_PERCENT}% ({worst:.4f}%)")
+    return 0 if ok else 1
+
+
+def spread(summary, key):
+    """一次运行里各轮之间的相对波动；旧格式的结果没有范围，按单轮处理"""
+    lo, hi = summary.get(f"{key}_range", (summary[key], summary[key]))
+    return (hi - lo) / summary[key] if summary[key] else 0.0
+
+
+def regressed(b, r, key, threshold, min_us):
+    """中位数变慢超过阈值和两边自身的波动，且新运行最快的一轮也慢于基准最慢的一轮"""
+    if not b[key] or r[key] - b[key] <= min_us:
+        return False
+    limit = max(threshold, spread(b, key), spread(r, key))
+    if (r[key] - b[key]) / b[key] <= limit:
+        return False
+    return r.get(f"{key}_range", (r[key],))[0] > b.get(f"{key}_range", (b[key], b[key]))[1]
+
+
+def pool(summaries):
+    """合并几次独立运行的同一项：各次中位数再取中位数，范围取全部轮次的最小和最大值"""
+    pooled = {"n": sum(s["n"] for s in summaries)}
+    for key in ("p50", "p90", "p99", "mean"):
+        pooled[key] = round(statistics.median(s[key] for s in summaries), 2)
+    for key in ("p50", "p99"):
+        ranges = [s.get(f"{key}_range", (s[key], s[key])) for s in summaries]
+        pooled[f"{key}_range"] = [min(lo for lo, _ in ranges), max(hi for _, hi in ranges)]
+    return pooled
+
+
+def load_runs(spec):
+    """读取逗号分隔的一组 JSON，合并成一份结果；说法只要有一次不成立就算不成立"""
+    reports = [json.loads(Path(p).read_text()) for p in spec.split(",")]
+    merged = {"revision": reports[0].get("revision"), "time": reports[-1].get("time"),
+              "runs": len(reports), "scales": {}, "claims": {}}
+    for rows in reports[0]["scales"]:
+        scales = [r["scales"][rows] for r in reports if rows in r["scales"]]
+        names = scales[0]["results"]
+        merged["scales"][rows] = {"results": {
+            name: pool([s["results"][name] for s in scales if name in s["results"]]) for name in names}}
+    for report in reports:
+        for claim, ok in report.get("claims", {}).items():
+            merged["claims"][claim] = merged["claims"].get(claim, True) and ok
+    return merged
+
+
+def compare(args):
+    base, new = (load_runs(spec) for spec in args.compare)
+    print(f"base {base['revision']} ({base['runs']} run(s), {base['time']})  vs  "
+          f"new {new['revision']} ({new['runs']} run(s), {new['time']})\n")
+    if min(base["runs"], new["runs"]) < 2:
+        print("note: a single run per side does not capture run-to-run variance; pass several runs\n")
+    print(f"{'rows':>8} {'scenario':<18}{'base p50':>10}{'new p50':>10}{'Δ p50':>9}"
+          f"{'base p99':>10}{'new p99':>10}{'Δ p99':>9}")
+    regressions = []
+    for rows, scale in new["scales"].items():
+        before = base["scales"].get(rows)
+        if before is None:
+            continue
+        for name, r in scale["results"].items():
+            b = before["results"].get(name)
+            if b is None:
+                continue
+            flags = [key for key in ("p50", "p99") if regressed(b, r, key, args.threshold, args.min_us)]
+            d50 = (r["p50"] - b["p50"]) / b["p50"] if b["p50"] else 0.0
+            d99 = (r["p99"] - b["p99"]) / b["p99"] if b["p99"] else 0.0
+            mark = "  REGRESSION " + "/".join(flags) if flags else ""
+            print(f"{rows:>8} {name:<18}{b['p50']:>10.1f}{r['p50']:>10.1f}{d50:>9.1%}"
+                  f"{b['p99']:>10.1f}{r['p99']:>10.1f}{d99:>9.1%}{mark}")
+            if flags:
+                regressions.append(f"{rows} {name}")
+    for claim, ok in new.get("claims", {}).items():
+        if not ok:
+            regressions.append(claim)
+            print(f"claim failed: {claim}")
+    print(f"\n{len(regressions)} regression(s)" + (": " + ", ".join(regressions) if regressions else ""))
+    return 1 if regressions else 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", default="100,10000,1000000")
+    parser.add_argument("--ops", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5, help="每项重复测量的轮数")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", help="把结果写成 JSON")
+    parser.add_argument("--compare", nargs=2, metavar=("BASE", "NEW"), help="比较两组运行的 JSON，每组可用逗号分隔多次运行")
+    parser.add_argument("--threshold", type=float, default=0.25, help="比较时视为回归的相对变慢幅度")
+    parser.add_argument("--min-us", type=float, default=20.0, help="比较时忽略小于这个绝对值（µs）的变化")
+    args = parser.parse_args()
+    sys.exit(compare(args) if args.compare else run(args))
+
+
+if __name__ == "__main__":
+    main()
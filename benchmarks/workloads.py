@@ -0,0 +1,73 @@
+"""
+合成剪贴板工作负载：按真实使用中常见的比例和长度分布生成内容
+
+大多数复制是一个词、一行命令或一个链接；少数是代码片段和段落；极少数是几十 KB 到
+上百 KB 的日志或文档（超过 BLOB_THRESHOLD，会进入 blob 表）。长度取对数正态分布，
+同一个种子总是生成同样的序列。
+"""
+
+import hashlib
+import random
+
+WORDS = (
+    "git commit push pull merge rebase docker kubectl deploy error warning "
+    "function return import class python swift https github token config "
+    "剪贴板 会议 文档 地址 密码 邮件 项目 需求 修复 发布 测试 服务器 数据库"
+).split()
+HOSTS = ("github.com", "example.com", "docs.python.org", "stackoverflow.com", "mail.google.com")
+CODE_LINES = (
+    "def handle(request):", "    return response", "if (err != nil) { return err }",
+    "const data = await fetch(url);", "SELECT id, name FROM users WHERE id = ?;",
+    "for i in range(n):", "    total += i", "}", "import os", "let x = try decoder.decode(T.self, from: d)",
+)
+
+# (类型, 占比)
+MIX = (
+    ("word", 0.30),
+    ("line", 0.25),
+    ("url", 0.15),
+    ("code", 0.12),
+    ("paragraph", 0.175),
+    ("large", 0.005),
+)
+
+
+def words(rng, n):
+    return " ".join(rng.choice(WORDS) for _ in range(n))
+
+
+def clip(rng, i):
+    """第 i 条合成内容；i 保证内容互不相同"""
+    kind = rng.choices([k for k, _ in MIX], [w for _, w in MIX])[0]
+    if kind == "word":
+        return f"{rng.choice(WORDS)}{i}"
+    if kind == "line":
+        return f"{i} " + words(rng, min(int(rng.lognormvariate(2.0, 0.6)) + 1, 60))
+    if kind == "url":
+        return f"https://{rng.choice(HOSTS)}/{words(rng, 2).replace(' ', '/')}/{i}?q={rng.randrange(10**6)}"
+    if kind == "code":
+        lines = min(int(rng.lognormvariate(2.2, 0.8)) + 2, 400)
+        return f"# snippet {i}\n" + "\n".join(rng.choice(CODE_LINES) for _ in range(lines))
+    if kind == "paragraph":
+        return f"{i} " + words(rng, min(int(rng.lognormvariate(4.0, 0.7)) + 10, 2000))
+    # 日志 / 文档：32 KB ~ 约 256 KB
+    lines = min(int(rng.lognormvariate(7.3, 0.6)), 6000) + 800
+    return f"log {i}\n" + "\n".join(f"[{n:06d}] {words(rng, 5)}" for n in range(lines))
+
+
+def generate(count, seed=1, start=0):
+    """依次产出 (content, content_hash)"""
+    rng = random.Random(seed)
+    for i in range(start, start + count):
+        content = clip(rng, i)
+        yield content, hashlib.md5(content.encode()).hexdigest()
+
+
+def populate(cm, store, rows, seed=1):
+    """按采集顺序写入 rows 条历史：每条间隔 1 毫秒，大内容进 blob 表，每 997 条收藏一条
+
+    走 ClipStore.import_clips 的批量导入路径。
+    """
+    start = cm.now_ms() - rows
+    store.import_clips((content, start + i, (i + 1) % 997 == 0)
+                       for i, (content, _) in enumerate(generate(rows, seed)))
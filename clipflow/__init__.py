@@ -0,0 +1,91 @@
+"""
+ClipFlow 核心：存储、采集、保留策略、系统调用和 Web 接口
+
+这里的模块都不导入 rumps / PyObjC，可以在 Linux 上导入、测试和压测；
+菜单栏界面在 clipflow.gui，由 clipboard_manager.py 按需导入。
+包本身不导入任何子模块：下面的名字第一次被访问时才导入所在的模块，
+命令行客户端这类只用到一小部分的场合不为整个核心付出启动时间。
+"""
+
+# 模块 -> 它提供的名字
+EXPORTS = {
+    "config": (
+        "VERSION", "DB_PATH", "MAX_HISTORY", "MAX_HISTORY_BYTES", "MAX_HISTORY_DAYS",
+        "MAX_PER_TYPE", "RETENTION_PATH", "MAINTENANCE_INTERVAL", "RETENTION_CHUNK",
+        "RETENTION_PAUSE", "MAINTENANCE_IDLE", "MAINTENANCE_BUDGET", "VACUUM_STEP_PAGES", "VACUUM_CONVERT_MAX_BYTES",
+        "CHECKPOINT_INTERVAL", "OPTIMIZE_INTERVAL", "QUICK_CHECK_INTERVAL", "ANALYSIS_LIMIT",
+        "MIGRATION_CHUNK", "EXPORT_CHUNK", "IMPORT_BATCH", "IMPORT_BLOB_LEVEL", "POLL_FLOOR", "POLL_CEILING",
+        "POLL_BACKOFF", "POLL_HOLD", "POLL_LINGER", "POLL_LINGER_CEILING", "CAPTURE_MAX_BATCH",
+        "CAPTURE_FLUSH_INTERVAL",
+        "CAPTURE_QUEUE_SIZE", "MAX_DISPLAY_LENGTH", "PREVIEW_LENGTH", "BLOB_THRESHOLD",
+        "BLOB_INLINE_CHARS", "BLOB_CODEC", "MENU_RECENT", "MENU_NORMAL", "MENU_FAVORITES",
+        "ROW_PAGE_SIZE", "ROW_CACHE_PAGES", "ROW_TIME_TTL", "HOT_CACHE_SIZE", "WEB_PORT",
+        "SYNC_BATCH", "SYNC_TIMEOUT", "CHANGES_PRUNE_INTERVAL", "CHANGES_PRUNE_CHUNK", "CHANGES_HORIZON_DAYS",
+        "SOCKET_PATH", "CONTROL_MAX_FRAME", "CONTROL_TIMEOUT", "SSE_HEARTBEAT", "KEEPALIVE_TIMEOUT",
+        "GZIP_MIN_SIZE", "LOGIN_ITEM_TTL", "METRICS_ENABLED", "LATENCY_BUCKETS",
+        "METRICS_RECENT_ERRORS",
+    ),
+    "text": (
+        "encode_cursor", "decode_cursor", "truncate_text", "make_preview", "shorten",
+        "CONTENT_TYPE_PATTERNS", "CODE_PATTERN", "detect_content_type", "BLOB_CODECS", "pack_blob",
+        "inflate_content", "clip_metadata", "clip_to_json", "now_ms", "format_ms", "get_time_ago",
+    ),
+    "metrics": (
+        "series_name", "Counter", "Histogram", "Metrics",
+    ),
+    "store": (
+        "EventBus", "HotCache", "ClipStore", "toggle_pin", "delete_clip", "highlight_html",
+        "strip_marks",
+    ),
+    "capture": (
+        "ClipboardBackend", "NSPasteboardBackend", "PbpasteBackend", "FakeClipboardBackend",
+        "get_backend", "set_backend", "get_clipboard", "set_clipboard", "ClipboardMonitor",
+        "CaptureWriter", "AdaptivePollScheduler",
+    ),
+    "maintenance": (
+        "RetentionPolicy", "MaintenanceWorker",
+    ),
+    "system": (
+        "get_app_path", "rumps_notification", "LOGIN_ITEMS_SCRIPT", "CommandRunner",
+        "SubprocessRunner", "FakeCommandRunner", "is_login_item", "add_login_item",
+        "remove_login_item", "SystemIntegration",
+    ),
+    "rows": (
+        "ClipRowSource",
+    ),
+    "transfer": (
+        "export_chunks", "read_records", "open_input", "export_file", "import_file",
+    ),
+    "control": (
+        "CommandError", "ClipCommands", "ControlServer",
+    ),
+    "sync": (
+        "fetch_changes", "pull",
+    ),
+    "web": (
+        "AsyncSubscription", "WEB_PAGE_HTML", "accepts_gzip", "etag_matches", "HTTPRequest",
+        "HTTPResponse", "ClipFlowWebHandler", "ClipFlowWebServer",
+    ),
+}
+NAMES = {name: module for module, names in EXPORTS.items() for name in names}
+# import * 不包括 Web 接口、命令接口和同步：它们依赖 asyncio / socket / urllib，用到时才导入
+__all__ = [name for name, module in NAMES.items() if module not in ("web", "control", "sync")]
+
+
+def _load(module):
+    return __import__(f"{__name__}.{module}", fromlist=["*"])
+
+
+def __getattr__(name):
+    module = NAMES.get(name)
+    if module is not None:
+        value = getattr(_load(module), name)
+        globals()[name] = value
+        return value
+    if name in EXPORTS:
+        return _load(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__():
+    return sorted(set(globals()) | set(NAMES))
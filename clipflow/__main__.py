@@ -0,0 +1,7 @@
+"""python -m clipflow：命令行客户端，见 clipflow.cli"""
+
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,304 @@
+"""剪贴板读取后端、采集写入队列和自适应轮询"""
+
+import threading
+import time
+import hashlib
+import subprocess
+import queue
+
+from .config import (
+    CAPTURE_FLUSH_INTERVAL, CAPTURE_MAX_BATCH, CAPTURE_QUEUE_SIZE, POLL_BACKOFF, POLL_CEILING,
+    POLL_FLOOR, POLL_HOLD, POLL_LINGER, POLL_LINGER_CEILING,
+)
+from .metrics import Metrics
+
+
+class ClipboardBackend:
+    """剪贴板访问接口"""
+
+    def change_count(self):
+        """返回剪贴板变更计数；不支持时返回 None，调用方每次都需要读取内容"""
+        return None
+
+    def read_text(self):
+        raise NotImplementedError
+
+    def write_text(self, text):
+        raise NotImplementedError
+
+
+class NSPasteboardBackend(ClipboardBackend):
+    """直接读写 NSPasteboard，用 changeCount 判断是否有新内容，不再启动子进程
+
+    AppKit 在第一次创建时才导入，没有 PyObjC 的环境里 get_backend() 会退回 pbpaste。
+    """
+
+    def __init__(self):
+        from AppKit import NSPasteboard, NSPasteboardTypeString
+        self.pasteboard = NSPasteboard.generalPasteboard()
+        self.string_type = NSPasteboardTypeString
+
+    def change_count(self):
+        return self.pasteboard.changeCount()
+
+    def read_text(self):
+        text = self.pasteboard.stringForType_(self.string_type)
+        return str(text) if text is not None else None
+
+    def write_text(self, text):
+        self.pasteboard.clearContents()
+        return bool(self.pasteboard.setString_forType_(text, self.string_type))
+
+
+class PbpasteBackend(ClipboardBackend):
+    """pbpaste / pbcopy 子进程实现，NSPasteboard 不可用时的兜底"""
+
+    def read_text(self):
+        try:
+            result = subprocess.run(["pbpaste"], capture_output=True, text=True, timeout=1)
+            return result.stdout if result.returncode == 0 else None
+        except:
+            return None
+
+    def write_text(self, text):
+        try:
+            process = subprocess.Popen(["pbcopy"], stdin=subprocess.PIPE)
+            process.communicate(text.encode("utf-8"))
+            return True
+        except:
+            return False
+
+
+class FakeClipboardBackend(ClipboardBackend):
+    """内存剪贴板，用于在 Linux 上无界面地驱动和压测采集流程"""
+
+    def __init__(self, text=None):
+        self.text = text
+        self.count = 0
+        self.reads = 0
+
+    def copy(self, text):
+        """模拟用户复制"""
+        self.text = text
+        self.count += 1
+
+    def change_count(self):
+        return self.count
+
+    def read_text(self):
+        self.reads += 1
+        return self.text
+
+    def write_text(self, text):
+        self.copy(text)
+        return True
+
+
+_backend = None
+
+
+def get_backend():
+    global _backend
+    if _backend is None:
+        try:
+            _backend = NSPasteboardBackend()
+        except Exception:
+            _backend = PbpasteBackend()
+    return _backend
+
+
+def set_backend(backend):
+    global _backend
+    _backend = backend
+
+
+def get_clipboard():
+    return get_backend().read_text()
+
+
+def set_clipboard(text):
+    return get_backend().write_text(text)
+
+
+class ClipboardMonitor:
+    """剪贴板采集流水线：变更计数 → 读取 → 去重 → 保存"""
+
+    def __init__(self, backend, on_capture, metrics=None):
+        self.backend = backend
+        self.on_capture = on_capture
+        self.metrics = metrics or Metrics.shared()
+        self.read_seconds = self.metrics.histogram(
+            "clipflow_clipboard_read_seconds", "读取剪贴板内容（NSPasteboard / pbpaste）的耗时")
+        self.hash_seconds = self.metrics.histogram("clipflow_clipboard_hash_seconds", "计算内容 MD5 的耗时")
+        self.captures = self.metrics.counter("clipflow_captures_total", "采集到的新内容条数")
+        self.last_change = None
+        self.last_hash = None
+        # 上一次 poll 观察到的剪贴板变更次数（>1 说明两次轮询之间有复制被覆盖）
+        self.last_delta = 0
+
+    def poll(self):
+        """检查一次剪贴板，采集到新内容时返回 True"""
+        self.last_delta = 0
+        change = self.backend.change_count()
+        if change is not None:
+            if change == self.last_change:
+                # 空闲 tick：只读了一个整数
+                return False
+            self.last_delta = 1 if self.last_change is None else max(change - self.last_change, 1)
+            self.last_change = change
+        start = self.metrics.start()
+        content = self.backend.read_text()
+        self.read_seconds.since(start)
+        if not content or not content.strip():
+            return False
+        start = self.metrics.start()
+        content_hash = hashlib.md5(content.encode()).hexdigest()
+        self.hash_seconds.since(start)
+        if content_hash == self.last_hash:
+            return False
+        self.last_hash = content_hash
+        if change is None:
+            self.last_delta = 1
+        if start:
+            self.captures.inc()
+        self.on_capture(content, content_hash)
+        return True
+
+
+class CaptureWriter:
+    """后台写入线程：采集结果进入有界队列，按批在一个事务里提交"""
+
+    _STOP = object()
+
+    def __init__(self, store, on_batch=None, max_batch=CAPTURE_MAX_BATCH,
+                 flush_interval=CAPTURE_FLUSH_INTERVAL, maxsize=CAPTURE_QUEUE_SIZE, metrics=None):
+        self.store = store
+        self.metrics = metrics or store.metrics
+        self.on_batch = on_batch
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self.queue = queue.Queue(maxsize)
+        self.thread = threading.Thread(target=self._run, name="clipflow-writer", daemon=True)
+        self.batches = 0
+        self.written = 0
+        self.dropped = 0
+        self.dropped_total = self.metrics.counter(
+            "clipflow_capture_dropped_total", "写入队列已满或保存失败而丢弃的采集条数")
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def submit(self, content, content_hash, timeout=1.0):
+        """放入写队列；队列满时最多阻塞 timeout 秒，仍然满则丢弃并返回 False"""
+        try:
+            self.queue.put((content, content_hash), timeout=timeout)
+            return True
+        except queue.Full:
+            self.dropped += 1
+            self.dropped_total.inc()
+            return False
+
+    def flush(self, timeout=5.0):
+        """等待此前提交的内容全部落盘"""
+        if not self.thread.is_alive():
+            return False
+        done = threading.Event()
+        self.queue.put(done)
+        return done.wait(timeout)
+
+    def close(self, timeout=5.0):
+        """退出前调用：写完队列里剩余的内容后停止线程"""
+        if self.thread.is_alive():
+            self.queue.put(self._STOP)
+            self.thread.join(timeout)
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            batch, markers = [], []
+            deadline = time.monotonic() + self.flush_interval
+            # 第一条到达后再等 flush_interval，把这段时间内的采集合并到同一个事务
+            while True:
+                if item is self._STOP or isinstance(item, threading.Event):
+                    markers.append(item)
+                    if item is self._STOP:
+                        break
+                else:
+                    batch.append(item)
+                    if len(batch) >= self.max_batch:
+                        break
+                if markers:
+                    # flush 请求：不再等待，立即提交
+                    try:
+                        item = self.queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    continue
+                remaining = deadline - time.monotonic()
+                try:
+                    item = self.queue.get(timeout=remaining) if remaining > 0 else self.queue.get_nowait()
+                except queue.Empty:
+                    break
+            if batch:
+                try:
+                    self.store.save_clips(batch)
+                    self.batches += 1
+                    self.written += len(batch)
+                    if self.on_batch:
+                        self.on_batch(len(batch))
+                except Exception as e:
+                    self.dropped += len(batch)
+                    self.dropped_total.inc(len(batch))
+                    self.metrics.error("save", e)
+            for marker in markers:
+                if marker is self._STOP:
+                    return
+                marker.set()
+
+
+class AdaptivePollScheduler:
+    """自适应轮询间隔：有活动后立即回到最快频率，空闲时分两段指数退避到上限"""
+
+    def __init__(self, floor=POLL_FLOOR, ceiling=POLL_CEILING, backoff=POLL_BACKOFF, hold=POLL_HOLD,
+                 linger=POLL_LINGER, linger_ceiling=POLL_LINGER_CEILING):
+        self.floor = floor
+        self.ceiling = ceiling
+        self.backoff = backoff
+        self.hold = hold
+        self.linger = linger
+        self.linger_ceiling = linger_ceiling
+        self.interval = floor
+        self.idle_for = 0.0
+        self.wakeups = 0
+        self.active_wakeups = 0
+        self.changes_seen = 0
+        self.missed_changes = 0
+
+    def record(self, delta):
+        """记录一次轮询观察到的变更次数，返回下一次轮询的间隔"""
+        self.wakeups += 1
+        if delta > 0:
+            self.active_wakeups += 1
+            self.changes_seen += delta
+            # 两次轮询之间发生多次复制，只有最后一次能被读到
+            self.missed_changes += delta - 1
+            self.interval = self.floor
+            self.idle_for = 0.0
+        else:
+            # 复制经常成串出现，活动后先保持最快频率一小段时间再退避
+            self.idle_for += self.interval
+            if self.idle_for >= self.hold:
+                # 工作时段的复制间隔多在一分钟内，先不超过 linger_ceiling，真正空闲后再放宽
+                cap = self.linger_ceiling if self.idle_for < self.linger else self.ceiling
+                self.interval = min(cap, self.interval * self.backoff)
+        return self.interval
+
+    def stats(self):
+        return {
+            "interval": self.interval,
+            "wakeups": self.wakeups,
+            "active_wakeups": self.active_wakeups,
+            "changes_seen": self.changes_seen,
+            "missed_changes": self.missed_changes,
+        }
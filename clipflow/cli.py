@@ -0,0 +1,240 @@
+"""
+clipflow 命令行：查询和操作剪贴板历史
+
+  clipflow list [-n 20] [--after CURSOR]    最近的记录（收藏的在前）
+  clipflow search QUERY [-n 20]             全文搜索
+  clipflow get ID                           输出全文，适合接管道
+  clipflow put [TEXT] [--copy]              保存一条记录（省略 TEXT 时读标准输入）
+  clipflow pin ID [--off]                   收藏 / 取消收藏
+  clipflow watch                            持续输出变更事件，每行一个 JSON
+  clipflow status                           运行状态
+  clipflow sync URL                         合并另一个实例（如 http://127.0.0.1:17891）的变更
+  clipflow export / import                  NDJSON 导出 / 导入，见 clipflow export -h
+
+ClipFlow 在运行时通过 Unix 套接字请求它；没有运行时直接只读打开数据库，
+此时 put / pin / watch 不可用，sync 直接写数据库。--json 让 list / search / get 输出原始 JSON。
+这个模块只导入标准库里很小的一部分，不导入存储和 GUI，直接只读访问数据库时才导入存储。
+"""
+
+import json
+import socket
+import sys
+import time
+
+from .config import CONTROL_TIMEOUT, DB_PATH, SOCKET_PATH
+from .protocol import ProtocolError, recv_frame, send_frame
+
+EXIT_ERROR = 1
+
+
+class ClipFlowError(Exception):
+    pass
+
+
+class SocketClient:
+    """连接运行中的应用"""
+
+    def __init__(self, sock):
+        self.sock = sock
+
+    @classmethod
+    def connect(cls, path=SOCKET_PATH, timeout=CONTROL_TIMEOUT):
+        """应用没有运行（套接字不存在或没人监听）时返回 None"""
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.settimeout(timeout)
+        try:
+            sock.connect(str(path))
+        except (FileNotFoundError, ConnectionRefusedError):
+            sock.close()
+            return None
+        return cls(sock)
+
+    def request(self, op, **args):
+        send_frame(self.sock, {"op": op, **args})
+        response = recv_frame(self.sock)
+        if response is None:
+            raise ClipFlowError("ClipFlow closed the connection")
+        if not response.pop("ok", False):
+            raise ClipFlowError(response.get("error", "request failed"))
+        return response
+
+    def watch(self):
+        """产出变更事件，直到连接断开"""
+        self.request("watch")
+        self.sock.settimeout(None)
+        while True:
+            event = recv_frame(self.sock)
+            if event is None:
+                return
+            yield event
+
+    def close(self):
+        self.sock.close()
+
+
+class LocalClient:
+    """应用没有运行时：直接在数据库上执行同样的命令，除 sync 之外都只读打开"""
+
+    def __init__(self, db_path=DB_PATH, readonly=True):
+        from pathlib import Path
+        if readonly and not Path(db_path).exists():
+            raise ClipFlowError(f"ClipFlow is not running and {db_path} does not exist")
+        from .control import ClipCommands
+        from .metrics import Metrics
+        from .store import ClipStore
+        self.store = ClipStore(db_path, metrics=Metrics(enabled=False), readonly=readonly)
+        self.commands = ClipCommands(self.store)
+
+    def request(self, op, **args):
+        response = self.commands.call({"op": op, **args})
+        if not response.pop("ok"):
+            raise ClipFlowError(response["error"])
+        return response
+
+    def watch(self):
+        raise ClipFlowError("ClipFlow is not running; watch needs the app")
+
+    def close(self):
+        self.store.close()
+
+
+def open_client(socket_path=SOCKET_PATH, db_path=DB_PATH, readonly=True):
+    return SocketClient.connect(socket_path) or LocalClient(db_path, readonly)
+
+
+def time_ago(ms):
+    seconds = max(time.time() - ms / 1000, 0)
+    for unit, size in (("d", 86400), ("h", 3600), ("m", 60)):
+        if seconds >= size:
+            return f"{int(seconds // size)}{unit}"
+    return f"{int(seconds)}s"
+
+
+def one_line(text, width=100):
+    text = " ".join(text.split())
+    return text if len(text) <= width else text[:width - 1] + "…"
+
+
+def print_json(data):
+    print(json.dumps(data, ensure_ascii=False))
+
+
+def run(args, client):
+    if args.command == "list":
+        data = client.request("list", limit=args.limit, after=args.after)
+        if args.json:
+            print_json(data)
+            return 0
+        for clip in data["clips"]:
+            mark = "*" if clip["pinned"] else " "
+            print(f"{clip['id']:>7} {mark} {time_ago(clip['created_ms']):>4}  {one_line(clip['preview'] or '')}")
+        if data["next_cursor"]:
+            print(f"# more: clipflow list --after {data['next_cursor']}", file=sys.stderr)
+    elif args.command == "search":
+        data = client.request("search", q=" ".join(args.query), limit=args.limit)
+        if args.json:
+            print_json(data)
+            return 0
+        for result in data["results"]:
+            mark = "*" if result["pinned"] else " "
+            print(f"{result['id']:>7} {mark} {time_ago(result['created_ms']):>4}  {one_line(result['snippet'])}")
+        if data.get("partial"):
+            print(f"# partial: single-character terms only search the newest {data['scanned_rows']} clips; "
+                  "add a longer word to search all history", file=sys.stderr)
+    elif args.command == "get":
+        data = client.request("get", id=args.id)
+        if args.json:
+            print_json(data)
+        else:
+            sys.stdout.write(data["content"])
+            sys.stdout.flush()
+    elif args.command == "put":
+        content = " ".join(args.text) if args.text else sys.stdin.read()
+        print(client.request("put", content=content, copy=args.copy)["id"])
+    elif args.command == "pin":
+        data = client.request("pin", id=args.id, pinned=not args.off)
+        print(f"{data['id']} {'pinned' if data['pinned'] else 'unpinned'}")
+    elif args.command == "watch":
+        for event in client.watch():
+            print_json(event)
+            sys.stdout.flush()
+    elif args.command == "status":
+        print(json.dumps(client.request("status"), ensure_ascii=False, indent=2))
+    elif args.command == "sync":
+        if isinstance(client, SocketClient):
+            # 首次同步可能要拉取整个历史，不受请求超时限制
+            client.sock.settimeout(None)
+        data = client.request("sync", url=args.url)
+        if args.json:
+            print_json(data)
+        else:
+            print(f"applied {data['applied']} changes from {args.url}, skipped {data['skipped']} "
+                  f"({data['batches']} batches)")
+    return 0
+
+
+def build_parser():
+    import argparse
+    parser = argparse.ArgumentParser(prog="clipflow", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--socket", default=str(SOCKET_PATH), help="应用的 Unix 套接字")
+    parser.add_argument("--db", default=str(DB_PATH), help="应用没有运行时只读打开的数据库")
+    parser.add_argument("--json", action="store_true", help="输出原始 JSON")
+    commands = parser.add_subparsers(dest="command", required=True)
+    p = commands.add_parser("list", help="最近的记录")
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p.add_argument("--after", help="上一页输出的游标")
+    p = commands.add_parser("search", help="全文搜索")
+    p.add_argument("query", nargs="+")
+    p.add_argument("-n", "--limit", type=int, default=20)
+    p = commands.add_parser("get", help="输出一条记录的全文")
+    p.add_argument("id", type=int)
+    p = commands.add_parser("put", help="保存一条记录")
+    p.add_argument("text", nargs="*", help="省略时读标准输入")
+    p.add_argument("--copy", action="store_true", help="同时写入系统剪贴板")
+    p = commands.add_parser("pin", help="收藏一条记录")
+    p.add_argument("id", type=int)
+    p.add_argument("--off", action="store_true", help="取消收藏")
+    commands.add_parser("watch", help="持续输出变更事件")
+    commands.add_parser("status", help="运行状态")
+    p = commands.add_parser("sync", help="合并另一个实例的变更")
+    p.add_argument("url", help="对方的 Web 地址，如 http://127.0.0.1:17891")
+    # 其余参数由 clipflow.transfer 解析
+    commands.add_parser("export", help="NDJSON 导出", add_help=False)
+    commands.add_parser("import", help="NDJSON 导入", add_help=False)
+    return parser
+
+
+def transfer(args, extra):
+    # 运行中的应用不会察觉其他进程写入的记录，导入只能在它退出之后进行
+    if args.command == "import" and not {"-h", "--help"} & set(extra):
+        client = SocketClient.connect(args.socket)
+        if client:
+            client.close()
+            print("clipflow: quit ClipFlow before importing", file=sys.stderr)
+            return EXIT_ERROR
+    from .transfer import main as transfer_main
+    return transfer_main(["--db", args.db, args.command, *extra])
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, extra = parser.parse_known_args(argv)
+    if args.command in ("export", "import"):
+        return transfer(args, extra)
+    if extra:
+        parser.error(f"unrecognized arguments: {' '.join(extra)}")
+    try:
+        client = open_client(args.socket, args.db, readonly=args.command != "sync")
+    except ClipFlowError as e:
+        print(f"clipflow: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    try:
+        return run(args, client)
+    except (ClipFlowError, ProtocolError, OSError) as e:
+        print(f"clipflow: {e}", file=sys.stderr)
+        return EXIT_ERROR
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        client.close()
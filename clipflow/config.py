@@ -0,0 +1,98 @@
+"""ClipFlow 配置常量"""
+
+import os
+from pathlib import Path
+
+VERSION = "1.6.0"
+# CLIPFLOW_HOME / CLIPFLOW_PORT 可以把数据目录和 Web 端口换掉，同一台机器上能同时运行两个实例
+DB_PATH = Path(os.environ.get("CLIPFLOW_HOME") or Path.home() / ".clipflow") / "history.db"
+MAX_HISTORY = 100
+# 保留策略的默认值（收藏的记录不受限制，None 表示不限；MAX_HISTORY_BYTES 按 UTF-8 字节数计）；
+# 可以在 ~/.clipflow/retention.json 里覆盖，见 RetentionPolicy.load()
+MAX_HISTORY_BYTES = None
+MAX_HISTORY_DAYS = None
+MAX_PER_TYPE = {}
+RETENTION_PATH = DB_PATH.parent / "retention.json"
+# 后台维护：每 MAINTENANCE_INTERVAL 秒或有新写入时运行；
+# 每个事务最多删除 RETENTION_CHUNK 条，两个事务之间让出写锁 RETENTION_PAUSE 秒
+MAINTENANCE_INTERVAL = 60.0
+RETENTION_CHUNK = 200
+RETENTION_PAUSE = 0.01
+# 数据库维护只在剪贴板空闲 MAINTENANCE_IDLE 秒后进行，每次最多占用 MAINTENANCE_BUDGET 秒；
+# 增量 VACUUM 每步回收 VACUUM_STEP_PAGES 页，其余任务按各自的间隔（秒）执行
+MAINTENANCE_IDLE = 30.0
+MAINTENANCE_BUDGET = 0.2
+VACUUM_STEP_PAGES = 256
+# 1.6.0 的库要整库 VACUUM 一次才能切换到增量模式，期间一直持有写锁：
+# 不超过 VACUUM_CONVERT_MAX_BYTES 的库（约一个 MAINTENANCE_BUDGET 内完成）在空闲维护时转换，更大的留到退出时
+VACUUM_CONVERT_MAX_BYTES = 8 << 20
+CHECKPOINT_INTERVAL = 300.0
+OPTIMIZE_INTERVAL = 6 * 3600.0
+QUICK_CHECK_INTERVAL = 24 * 3600.0
+ANALYSIS_LIMIT = 1000
+# 结构迁移中的数据回填每个事务处理 MIGRATION_CHUNK 行
+MIGRATION_CHUNK = 5000
+# NDJSON 导出每次从读游标取 EXPORT_CHUNK 行编码输出；导入每个事务写入 IMPORT_BATCH 条
+EXPORT_CHUNK = 500
+IMPORT_BATCH = 20000
+# 导入时大内容用更快的压缩级别：级别 6 在大批量导入里占了约五分之一的时间，换来的体积只小约五分之一
+IMPORT_BLOB_LEVEL = 1
+# 自适应轮询：复制后以 POLL_FLOOR 快速轮询并保持 POLL_HOLD 秒，
+# 之后每次空闲乘以 POLL_BACKOFF；复制后 POLL_LINGER 秒内最长 POLL_LINGER_CEILING，
+# 之后最长 POLL_CEILING（changeCount 只会增加，迟到的复制在下一次轮询补上）
+POLL_FLOOR = 0.25
+POLL_CEILING = 10.0
+POLL_BACKOFF = 1.5
+POLL_HOLD = 1.0
+POLL_LINGER = 60.0
+POLL_LINGER_CEILING = 1.0
+# 写入队列：最多攒 CAPTURE_MAX_BATCH 条或等待 CAPTURE_FLUSH_INTERVAL 秒合并为一个事务
+CAPTURE_MAX_BATCH = 64
+CAPTURE_FLUSH_INTERVAL = 0.05
+CAPTURE_QUEUE_SIZE = 1024
+MAX_DISPLAY_LENGTH = 40
+# 采集时预先算好的单行预览长度；列表、菜单和网页都只读预览，全文按 id 单独获取
+PREVIEW_LENGTH = 200
+# 超过 BLOB_THRESHOLD 个字符的内容压缩后存进 clip_blobs（按内容哈希寻址），
+# clips 表里只保留开头 BLOB_INLINE_CHARS 个字符供搜索打分使用，全文另建索引（clips_blob_fts），复制时再解压
+BLOB_THRESHOLD = 32 * 1024
+BLOB_INLINE_CHARS = 8 * 1024
+BLOB_CODEC = "zlib"
+# 状态栏菜单：取最近 MENU_RECENT 条，收藏的全部显示，普通的最多 MENU_NORMAL 条
+MENU_RECENT = 10
+MENU_NORMAL = 8
+MENU_FAVORITES = 5
+# 历史窗口：每页 ROW_PAGE_SIZE 行，最多缓存 ROW_CACHE_PAGES 页，
+# 「x 分钟前」之类的时间标签 ROW_TIME_TTL 秒后重新计算
+ROW_PAGE_SIZE = 100
+ROW_CACHE_PAGES = 8
+ROW_TIME_TTL = 60.0
+# 内存热缓存：最近 HOT_CACHE_SIZE 条未收藏记录 + 全部收藏记录，
+# 覆盖菜单、历史窗口第一页和 Web 接口第一页
+HOT_CACHE_SIZE = 200
+WEB_PORT = int(os.environ.get("CLIPFLOW_PORT") or 17890)
+# 实例间同步：每次从对方的 /api/changes 拉取 SYNC_BATCH 条变更，在一个事务里合并；
+# 变更日志里被同一内容更新的记录覆盖的旧条目，每 CHANGES_PRUNE_INTERVAL 秒清理一次，每次最多 CHANGES_PRUNE_CHUNK 条
+SYNC_BATCH = 1000
+SYNC_TIMEOUT = 30.0
+CHANGES_PRUNE_INTERVAL = 3600.0
+CHANGES_PRUNE_CHUNK = 5000
+# 本地已经没有的内容（删除、清空、被保留策略淘汰）的日志条目保留 CHANGES_HORIZON_DAYS 天后清理，
+# 日志的大小因此以历史条数加上这段时间的变更为上限；超过这么久没同步的实例可能让删掉的内容复活
+CHANGES_HORIZON_DAYS = 30
+# 命令行客户端与运行中的应用通过这个 Unix 套接字通信；帧是 4 字节大端长度 + JSON，
+# 单帧最大 CONTROL_MAX_FRAME 字节，客户端等待应答最多 CONTROL_TIMEOUT 秒
+SOCKET_PATH = DB_PATH.parent / "clipflow.sock"
+CONTROL_MAX_FRAME = 64 << 20
+CONTROL_TIMEOUT = 5.0
+SSE_HEARTBEAT = 15.0
+KEEPALIVE_TIMEOUT = 30.0
+GZIP_MIN_SIZE = 1024
+# 登录项状态缓存时间（秒），切换开机启动时立即更新
+LOGIN_ITEM_TTL = 300.0
+# 运行指标（/metrics、/api/stats）：关闭后热路径上只剩一次布尔判断；
+# 延迟直方图使用固定的桶上限（秒），最近 METRICS_RECENT_ERRORS 个异常保留原因
+METRICS_ENABLED = True
+LATENCY_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+                   0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+METRICS_RECENT_ERRORS = 20
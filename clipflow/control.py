@@ -0,0 +1,212 @@
+"""本地命令接口：应用在 Unix 套接字上响应命令行客户端的请求"""
+
+import hashlib
+import os
+import queue
+import socket
+import threading
+
+from .config import SOCKET_PATH, SSE_HEARTBEAT
+from .protocol import ProtocolError, recv_frame, send_frame
+from .store import strip_marks
+from .text import clip_to_json
+
+
+class CommandError(Exception):
+    """请求本身有问题（参数不对、记录不存在、只读时写入），原样返回给客户端"""
+
+
+class ClipCommands:
+    """命令的实现，只依赖 ClipStore；应用里走套接字，应用没有运行时客户端直接对只读库调用
+
+    请求是 {"op": ..., 参数...}，应答是 {"ok": true, 结果...} 或 {"ok": false, "error": ...}。
+    """
+
+    OPS = ("status", "list", "search", "get", "put", "pin", "sync")
+    WRITE_OPS = ("put", "pin", "sync")
+
+    def __init__(self, store, status=None, copy=None, on_change=None):
+        self.store = store
+        self.status = status
+        # 应用提供：写入系统剪贴板、通知界面刷新
+        self.copy = copy
+        self.on_change = on_change
+
+    def call(self, request):
+        op = request.get("op")
+        try:
+            if op not in self.OPS:
+                raise CommandError(f"unknown op {op!r}")
+            if op in self.WRITE_OPS and self.store.readonly:
+                raise CommandError("ClipFlow is not running; history is read-only")
+            return {"ok": True, **getattr(self, "op_" + op)(request)}
+        except CommandError as e:
+            return {"ok": False, "error": str(e)}
+        except (KeyError, TypeError, ValueError) as e:
+            return {"ok": False, "error": f"bad request: {e!r}"}
+
+    def changed(self):
+        if self.on_change:
+            self.on_change()
+
+    def op_status(self, request):
+        if self.status:
+            return self.status()
+        return {"clips": self.store.count(), "revision": self.store.revision, "origin": self.store.origin,
+                "readonly": self.store.readonly}
+
+    def op_list(self, request):
+        limit = min(max(int(request.get("limit", 20)), 1), 1000)
+        rows, next_cursor, rev = self.store.page(request.get("after"), limit)
+        return {"clips": [clip_to_json(row) for row in rows], "next_cursor": next_cursor, "rev": rev}
+
+    def op_search(self, request):
+        limit = min(max(int(request.get("limit", 20)), 1), 1000)
+        offset = max(int(request.get("offset", 0)), 0)
+        results, scanned = self.store.search(str(request["q"]), limit, offset)
+        return {
+            "results": [{
+                "id": clip_id,
+                "snippet": strip_marks(snippet),
+                "created_ms": created_ms,
+                "pinned": bool(pinned),
+            } for clip_id, snippet, created_ms, pinned in results],
+            "partial": scanned is not None,
+            "scanned_rows": scanned,
+        }
+
+    def op_get(self, request):
+        clip_id = int(request["id"])
+        row = self.store.get_clip(clip_id)
+        if row is None:
+            raise CommandError(f"no clip {clip_id}")
+        data = clip_to_json(row[:-1])
+        data["content"] = row[-1]
+        return data
+
+    def op_put(self, request):
+        content = request["content"]
+        if not isinstance(content, str) or not content.strip():
+            raise CommandError("content is empty")
+        content_hash = hashlib.md5(content.encode()).hexdigest()
+        self.store.save_clip(content, content_hash)
+        if request.get("copy") and self.copy:
+            self.copy(content)
+        self.changed()
+        return {"id": self.store.find_clip(content_hash)}
+
+    def op_pin(self, request):
+        clip_id = int(request["id"])
+        pinned = self.store.set_pinned(clip_id, bool(request.get("pinned", True)))
+        if pinned is None:
+            raise CommandError(f"no clip {clip_id}")
+        self.changed()
+        return {"id": clip_id, "pinned": bool(pinned)}
+
+    def op_sync(self, request):
+        from .sync import pull
+        url = str(request["url"])
+        try:
+            result = pull(self.store, url)
+        except (OSError, ValueError) as e:
+            raise CommandError(f"sync with {url} failed: {e}")
+        if result["applied"]:
+            self.changed()
+        return result
+
+
+class ControlServer:
+    """Unix 套接字服务器，每个连接一个线程；一个连接上可以依次发多个请求
+
+    watch 请求之后连接只用来推送 ClipStore 的变更事件，空闲时每 SSE_HEARTBEAT 秒一个 ping。
+    """
+
+    def __init__(self, store, path=SOCKET_PATH, status=None, copy=None, on_change=None):
+        self.store = store
+        self.path = str(path)
+        self.commands = ClipCommands(store, status, copy, on_change)
+        self.metrics = store.metrics
+        self.sock = None
+        self.closed = False
+
+    def start(self):
+        """绑定套接字并开始接受连接；已有另一个实例在监听时抛出 OSError"""
+        if os.path.exists(self.path):
+            probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                probe.connect(self.path)
+                raise OSError(f"another ClipFlow is listening on {self.path}")
+            except (ConnectionRefusedError, FileNotFoundError):
+                # 上次异常退出留下的套接字文件
+                os.unlink(self.path)
+            finally:
+                probe.close()
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        os.chmod(self.path, 0o600)
+        sock.listen(16)
+        self.sock = sock
+        threading.Thread(target=self.serve, name="clipflow-control", daemon=True).start()
+        return self
+
+    def serve(self):
+        while not self.closed:
+            try:
+                conn, _ = self.sock.accept()
+            except OSError:
+                break
+            threading.Thread(target=self.handle, args=(conn,), daemon=True).start()
+
+    def handle(self, conn):
+        try:
+            while True:
+                request = recv_frame(conn)
+                if request is None:
+                    break
+                if request.get("op") == "watch":
+                    self.watch(conn)
+                    break
+                start = self.metrics.start()
+                try:
+                    response = self.commands.call(request)
+                except Exception as e:
+                    self.metrics.error("control", e)
+                    response = {"ok": False, "error": repr(e)}
+                if start:
+                    op = request.get("op") if request.get("op") in ClipCommands.OPS else "other"
+                    self.metrics.histogram("clipflow_control_request_seconds", "命令行请求的处理耗时",
+                                           op=op).since(start)
+                send_frame(conn, response)
+        except (OSError, ProtocolError, ValueError):
+            pass
+        finally:
+            conn.close()
+
+    def watch(self, conn):
+        subscription = self.store.events.subscribe()
+        try:
+            send_frame(conn, {"ok": True, "rev": self.store.revision, "total": self.store.count()})
+            while not self.closed:
+                try:
+                    event = subscription.get(timeout=SSE_HEARTBEAT)
+                except queue.Empty:
+                    # 心跳，用于及时发现已断开的客户端
+                    event = {"type": "ping"}
+                send_frame(conn, event)
+        finally:
+            self.store.events.unsubscribe(subscription)
+
+    def close(self):
+        self.closed = True
+        if self.sock is not None:
+            try:
+                # 唤醒阻塞在 accept() 上的线程
+                self.sock.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            self.sock.close()
+            self.sock = None
+            try:
+                os.unlink(self.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,690 @@
+"""
+macOS 菜单栏应用和历史窗口
+
+只有这个模块导入 rumps / AppKit / Foundation / objc，核心模块可以在没有 GUI 框架的环境里使用。
+"""
+
+import rumps
+import threading
+import hashlib
+import webbrowser
+from pathlib import Path
+from AppKit import (
+    NSWindow, NSWindowStyleMaskTitled, NSWindowStyleMaskClosable,
+    NSWindowStyleMaskResizable, NSBackingStoreBuffered, NSScrollView,
+    NSTableView, NSTableColumn, NSTextField, NSButton, NSBezelStyleRounded,
+    NSView, NSMakeRect, NSColor, NSFont, NSLineBreakByTruncatingTail, NSApp,
+    NSFloatingWindowLevel, NSAppearance, NSSearchField
+)
+from Foundation import NSObject
+import objc
+
+from .config import MAINTENANCE_IDLE, MENU_FAVORITES, MENU_NORMAL, MENU_RECENT, VERSION, WEB_PORT
+from .text import make_preview, shorten
+from .store import ClipStore, toggle_pin
+from .capture import AdaptivePollScheduler, CaptureWriter, ClipboardMonitor, get_backend
+from .maintenance import MaintenanceWorker, RetentionPolicy
+from .system import SystemIntegration
+from .rows import ClipRowSource
+from .control import ControlServer
+
+
+class ClipFlowTableDelegate(NSObject):
+    """TableView 数据源和代理"""
+    
+    def init(self):
+        self = objc.super(ClipFlowTableDelegate, self).init()
+        if self is None:
+            return None
+        self.rows = None
+        self.on_copy = None
+        self.on_refresh = None
+        self.on_search = None
+        return self
+    
+    def numberOfRowsInTableView_(self, tableView):
+        return self.rows.count() if self.rows else 0
+    
+    def tableView_viewForTableColumn_row_(self, tableView, column, row):
+        clip = self.rows.row(row) if self.rows else None
+        if clip is None:
+            return None
+        
+        clip_id, preview, time_ago, pinned = clip
+        
+        identifier = column.identifier()
+        
+        if identifier == "content":
+            # 创建卡片式容器
+            cell = tableView.makeViewWithIdentifier_owner_("content_card", self)
+            if cell is None:
+                cell = NSView.alloc().initWithFrame_(NSMakeRect(0, 0, 400, 45))
+                cell.setIdentifier_("content_card")
+                
+                # 时间标签
+                timeLabel = NSTextField.alloc().initWithFrame_(NSMakeRect(10, 28, 100, 14))
+                timeLabel.setTag_(10)
+                timeLabel.setBordered_(False)
+                timeLabel.setEditable_(False)
+                timeLabel.setBackgroundColor_(NSColor.clearColor())
+                timeLabel.setFont_(NSFont.monospacedSystemFontOfSize_weight_(10, 0.0))
+                timeLabel.setTextColor_(NSColor.grayColor())
+                cell.addSubview_(timeLabel)
+                
+                # 收藏图标
+                starLabel = NSTextField.alloc().initWithFrame_(NSMakeRect(380, 28, 20, 14))
+                starLabel.setTag_(11)
+                starLabel.setBordered_(False)
+                starLabel.setEditable_(False)
+                starLabel.setBackgroundColor_(NSColor.clearColor())
+                starLabel.setFont_(NSFont.systemFontOfSize_(12))
+                cell.addSubview_(starLabel)
+                
+                # 内容标签
+                contentLabel = NSTextField.alloc().initWithFrame_(NSMakeRect(10, 5, 380, 22))
+                contentLabel.setTag_(12)
+                contentLabel.setBordered_(False)
+                contentLabel.setEditable_(False)
+                contentLabel.setBackgroundColor_(NSColor.clearColor())
+                contentLabel.setLineBreakMode_(NSLineBreakByTruncatingTail)
+                contentLabel.setFont_(NSFont.systemFontOfSize_(13))
+                contentLabel.setTextColor_(NSColor.blackColor())
+                cell.addSubview_(contentLabel)
+            
+            # 更新内容
+            for subview in cell.subviews():
+                tag = subview.tag()
+                if tag == 10:
+                    subview.setStringValue_(time_ago)
+                elif tag == 11:
+                    subview.setStringValue_("⭐" if pinned else "")
+                elif tag == 12:
+                    subview.setStringValue_(preview)
+            
+            return cell
+        
+        elif identifier == "actions":
+            cell = tableView.makeViewWithIdentifier_owner_("actions_cell", self)
+            if cell is None:
+                cell = NSView.alloc().initWithFrame_(NSMakeRect(0, 0, 60, 45))
+                cell.setIdentifier_("actions_cell")
+                
+                # 只保留收藏按钮，弱化显示
+                pinBtn = NSButton.alloc().initWithFrame_(NSMakeRect(10, 12, 40, 22))
+                pinBtn.setBezelStyle_(NSBezelStyleRounded)
+                pinBtn.setTag_(1)
+                pinBtn.setFont_(NSFont.systemFontOfSize_(12))
+                cell.addSubview_(pinBtn)
+            
+            # 更新收藏按钮状态
+            for subview in cell.subviews():
+                if subview.tag() == 1:
+                    subview.setTitle_("★" if pinned else "☆")
+                    subview.setTarget_(self)
+                    subview.setAction_(objc.selector(self.pinClicked_, signature=b'v@:@'))
+                    subview.cell().setRepresentedObject_(clip_id)
+            
+            return cell
+        
+        return None
+    
+    def pinClicked_(self, sender):
+        clip_id = sender.cell().representedObject()
+        if clip_id:
+            new_state = toggle_pin(clip_id)
+            if self.on_refresh:
+                self.on_refresh()
+            msg = "已收藏" if new_state else "已取消收藏"
+            SystemIntegration.shared().notify("ClipFlow", "", msg)
+    
+    def searchChanged_(self, sender):
+        if self.on_search:
+            self.on_search(sender.stringValue())
+    
+    def tableViewSelectionDidChange_(self, notification):
+        tableView = notification.object()
+        row = tableView.selectedRow()
+        clip_id = self.rows.clip_id(row) if self.rows and row >= 0 else None
+        if clip_id is not None:
+            # 列表里只有预览，复制时才按 id 读取完整内容
+            content = ClipStore.shared().get_content(clip_id)
+            if content is not None:
+                SystemIntegration.shared().copy_text(
+                    content, lambda ok: ok and self.on_copy and self.on_copy(content))
+
+
+class ClipFlowWindow:
+    """原生 macOS 历史窗口 - 深色主题"""
+    
+    _instance = None
+    
+    def __init__(self):
+        self.window = None
+        self.table = None
+        self.delegate = None
+        self.query = ""
+    
+    @classmethod
+    def shared(cls):
+        if cls._instance is None:
+            cls._instance = cls()
+        return cls._instance
+    
+    def show(self):
+        if self.window is not None:
+            self.window.makeKeyAndOrderFront_(None)
+            self.refresh_data()
+            NSApp.activateIgnoringOtherApps_(True)
+            return
+        
+        # 创建窗口
+        frame = NSMakeRect(0, 0, 600, 500)
+        style = NSWindowStyleMaskTitled | NSWindowStyleMaskClosable | NSWindowStyleMaskResizable
+        self.window = NSWindow.alloc().initWithContentRect_styleMask_backing_defer_(
+            frame, style, NSBackingStoreBuffered, False
+        )
+        self.window.setTitle_(f"ClipFlow v{VERSION}")
+        self.window.center()
+        self.window.setLevel_(NSFloatingWindowLevel)
+        self.window.setMinSize_((500, 400))
+        
+        # 浅色模式
+        lightAppearance = NSAppearance.appearanceNamed_("NSAppearanceNameAqua")
+        self.window.setAppearance_(lightAppearance)
+        
+        # 浅色背景
+        contentView = self.window.contentView()
+        contentView.setWantsLayer_(True)
+        contentView.layer().setBackgroundColor_(NSColor.windowBackgroundColor().CGColor())
+        
+        # 标题区域
+        titleLabel = NSTextField.alloc().initWithFrame_(NSMakeRect(20, 450, 300, 30))
+        titleLabel.setStringValue_("📋 剪贴板历史")
+        titleLabel.setFont_(NSFont.boldSystemFontOfSize_(20))
+        titleLabel.setTextColor_(NSColor.blackColor())
+        titleLabel.setBezeled_(False)
+        titleLabel.setEditable_(False)
+        titleLabel.setBackgroundColor_(NSColor.clearColor())
+        contentView.addSubview_(titleLabel)
+        
+        # 统计信息
+        self.statsLabel = NSTextField.alloc().initWithFrame_(NSMakeRect(330, 455, 250, 20))
+        self.statsLabel.setFont_(NSFont.systemFontOfSize_(12))
+        self.statsLabel.setTextColor_(NSColor.grayColor())
+        self.statsLabel.setBezeled_(False)
+        self.statsLabel.setEditable_(False)
+        self.statsLabel.setAlignment_(2)  # Right align
+        self.statsLabel.setBackgroundColor_(NSColor.clearColor())
+        contentView.addSubview_(self.statsLabel)
+        
+        # 搜索框
+        self.searchField = NSSearchField.alloc().initWithFrame_(NSMakeRect(20, 412, 560, 26))
+        self.searchField.setPlaceholderString_("搜索全部历史")
+        self.searchField.setAutoresizingMask_(10)
+        contentView.addSubview_(self.searchField)
+        
+        # 创建 TableView
+        scrollFrame = NSMakeRect(20, 20, 560, 382)
+        scrollView = NSScrollView.alloc().initWithFrame_(scrollFrame)
+        scrollView.setAutoresizingMask_(18)
+        scrollView.setHasVerticalScroller_(True)
+        scrollView.setBorderType_(0)
+        scrollView.setBackgroundColor_(NSColor.clearColor())
+        scrollView.setDrawsBackground_(False)
+        
+        self.table = NSTableView.alloc().initWithFrame_(scrollView.bounds())
+        self.table.setBackgroundColor_(NSColor.clearColor())
+        self.table.setRowHeight_(50)
+        self.table.setSelectionHighlightStyle_(1)
+        self.table.setGridStyleMask_(0)  # No grid lines
+        self.table.setHeaderView_(None)  # 隐藏表头
+        
+        # 内容列
+        contentCol = NSTableColumn.alloc().initWithIdentifier_("content")
+        contentCol.setWidth_(480)
+        self.table.addTableColumn_(contentCol)
+        
+        # 收藏列（窄一点）
+        actionsCol = NSTableColumn.alloc().initWithIdentifier_("actions")
+        actionsCol.setWidth_(60)
+        self.table.addTableColumn_(actionsCol)
+        
+        # 设置代理
+        self.delegate = ClipFlowTableDelegate.alloc().init()
+        self.delegate.rows = ClipRowSource(ClipStore.shared())
+        self.delegate.on_copy = self.on_clip_copied
+        self.delegate.on_refresh = self.refresh_data
+        self.delegate.on_search = self.on_search
+        self.table.setDelegate_(self.delegate)
+        self.searchField.setTarget_(self.delegate)
+        self.searchField.setAction_(objc.selector(self.delegate.searchChanged_, signature=b'v@:@'))
+        self.table.setDataSource_(self.delegate)
+        
+        scrollView.setDocumentView_(self.table)
+        contentView.addSubview_(scrollView)
+        
+        self.refresh_data()
+        self.window.makeKeyAndOrderFront_(None)
+        NSApp.activateIgnoringOtherApps_(True)
+    
+    def refresh_data(self):
+        if self.table is None:
+            return
+        # 只更新行数，具体的行在绘制时按页读取
+        rows = self.delegate.rows
+        rows.set_query(self.query)
+        count = rows.count()
+        stats = f"找到 {count} 条" if self.query else f"{count} 条记录"
+        if rows.scanned:
+            # 全是单个字符的词时只搜索了最近的记录
+            stats = f"最近 {rows.scanned} 条中找到 {count} 条"
+        if hasattr(self, 'statsLabel') and self.statsLabel:
+            self.statsLabel.setStringValue_(stats)
+        self.table.reloadData()
+    
+    def on_search(self, query):
+        self.query = query.strip()
+        self.refresh_data()
+    
+    def on_clip_copied(self, content):
+        SystemIntegration.shared().notify("ClipFlow", "已复制", make_preview(content, 50))
+
+
+def set_menu_item_hidden(item, hidden):
+    """rumps 没有暴露隐藏接口，直接操作底层 NSMenuItem"""
+    item._menuitem.setHidden_(hidden)
+
+
+class MenuSlot:
+    """菜单里一个可复用的剪贴板条目（带一个收藏子菜单项）"""
+    __slots__ = ("item", "action", "key")
+
+    def __init__(self, item, action):
+        self.item = item
+        self.action = action
+        self.key = None
+
+
+class MenuSlots:
+    """一组预先创建的剪贴板菜单条目
+
+    刷新时按 (id, 标题, 子菜单标题) 复用已显示的条目，只给新出现的行改标题，
+    多余的隐藏，并只移动位置不对的条目，改动量与变化的行数成正比。
+    """
+
+    def __init__(self, parent, count, name, make_copy, make_pin):
+        self.parent = parent
+        self.make_copy = make_copy
+        self.make_pin = make_pin
+        self.slots = []
+        for i in range(count):
+            # 占位标题保证 rumps 的键唯一，真正的标题在 update 中设置
+            item = rumps.MenuItem(f"{name}:{i}")
+            action = rumps.MenuItem(f"{name}:{i}:pin")
+            item.add(action)
+            parent.add(item)
+            set_menu_item_hidden(item, True)
+            self.slots.append(MenuSlot(item, action))
+
+    def update(self, rows):
+        """rows 为 [(clip_id, preview, title, action_title)]，返回改动的条目数"""
+        rows = rows[:len(self.slots)]
+        wanted = {(r[0], r[2], r[3]) for r in rows}
+        kept = {}
+        free = []
+        for slot in self.slots:
+            if slot.key in wanted:
+                kept[slot.key] = slot
+            else:
+                free.append(slot)
+
+        changed = 0
+        order = []
+        for clip_id, preview, title, action_title in rows:
+            key = (clip_id, title, action_title)
+            slot = kept.pop(key, None)
+            if slot is None:
+                slot = free.pop(0)
+                if slot.key is None:
+                    set_menu_item_hidden(slot.item, False)
+                slot.item.title = title
+                slot.item.set_callback(self.make_copy(clip_id, preview))
+                slot.action.title = action_title
+                slot.action.set_callback(self.make_pin(clip_id))
+                slot.key = key
+                changed += 1
+            order.append(slot)
+
+        for slot in free:
+            if slot.key is not None:
+                set_menu_item_hidden(slot.item, True)
+                slot.key = None
+                changed += 1
+        order.extend(free)
+        changed += self._reorder(order)
+        self.slots = order
+        return changed
+
+    def _reorder(self, order):
+        """把条目移动到新顺序；新内容插到顶部时只需移动一个条目"""
+        if order == self.slots:
+            return 0
+        menu = self.parent._menu
+        base = menu.indexOfItem_(self.slots[0].item._menuitem)
+        current = list(self.slots)
+        moved = 0
+        for offset, slot in enumerate(order):
+            if current[offset] is not slot:
+                current.remove(slot)
+                current.insert(offset, slot)
+                menu.removeItem_(slot.item._menuitem)
+                menu.insertItem_atIndex_(slot.item._menuitem, base + offset)
+                moved += 1
+        return moved
+
+
+class ClipFlowApp(rumps.App):
+    def __init__(self):
+        # 使用图标文件
+        icon_path = Path(__file__).parent.parent / "icon.png"
+        super().__init__(name="ClipFlow", icon=str(icon_path) if icon_path.exists() else None, title=None, quit_button=None, template=True)
+        
+        self.store = ClipStore.shared()
+        self.system = SystemIntegration.shared()
+        self.scheduler = AdaptivePollScheduler()
+        self.poll_timer = None
+        self.monitoring = True
+        self.maintenance = MaintenanceWorker(
+            self.store, RetentionPolicy.load(), on_change=self.on_history_trimmed, is_idle=self.is_idle
+        ).start()
+        self.writer = CaptureWriter(self.store, on_batch=self.on_batch_saved).start()
+        self.metrics = self.store.metrics
+        self.monitor = ClipboardMonitor(get_backend(), self.save_clip, metrics=self.metrics)
+        self.menu_seconds = self.metrics.histogram("clipflow_menu_refresh_seconds", "refresh_menu 的耗时")
+        self.metrics.gauge("clipflow_poll_interval_seconds", "当前的剪贴板轮询间隔",
+                           lambda: self.scheduler.interval)
+        self.metrics.gauge("clipflow_capture_queue_depth", "写入队列里等待提交的采集条数",
+                           lambda: self.writer.queue.qsize())
+        self.need_update = False
+        
+        self.visible = {}
+        
+        # 菜单结构只创建一次，之后由 refresh_menu 增量更新
+        self.build_menu()
+        self.refresh_menu()
+        
+        # 默认开启开机启动（后台执行，不等待 AppleScript）
+        self.system.ensure_login_item(self.on_login_state)
+        
+        # 启动 Web 服务器
+        threading.Thread(target=self.start_web_server, daemon=True).start()
+        
+        # 命令行客户端的本地套接字
+        self.control = ControlServer(self.store, status=self.status, copy=self.system.copy_text,
+                                     on_change=self.on_external_change)
+        try:
+            self.control.start()
+        except OSError as e:
+            self.metrics.error("control", e)
+        
+        self.schedule_poll(self.scheduler.interval)
+    
+    def schedule_poll(self, interval):
+        """按新的间隔重建剪贴板轮询定时器"""
+        if self.poll_timer is not None:
+            if self.poll_timer.interval == interval:
+                return
+            self.poll_timer.stop()
+        self.poll_timer = rumps.Timer(self.check_clipboard, interval)
+        self.poll_timer.start()
+    
+    def start_web_server(self):
+        # asyncio 和 Web 模块在后台线程里才导入，不占用启动时间
+        from .web import ClipFlowWebServer
+        try:
+            ClipFlowWebServer(self.store, "127.0.0.1", WEB_PORT, status=self.status).serve_forever()
+        except Exception as e:
+            self.metrics.error("web", e)
+    
+    def check_clipboard(self, _):
+        """定时检查剪贴板，并根据活动情况调整下一次轮询间隔"""
+        try:
+            if self.need_update:
+                self.need_update = False
+                start = self.metrics.start()
+                self.refresh_menu()
+                self.menu_seconds.since(start)
+        except Exception as e:
+            self.metrics.error("menu", e)
+        if not self.monitoring:
+            self.schedule_poll(self.scheduler.ceiling)
+            return
+        
+        try:
+            self.monitor.poll()
+        except Exception as e:
+            self.metrics.error("poll", e)
+        self.schedule_poll(self.scheduler.record(self.monitor.last_delta))
+    
+    def save_clip(self, content, content_hash):
+        if not content.strip():
+            return
+        self.writer.submit(content, content_hash)
+    
+    def on_batch_saved(self, count):
+        """写入线程回调：只做标记，菜单在主线程的下一次 tick 刷新"""
+        self.need_update = True
+        self.maintenance.wake()
+    
+    def on_history_trimmed(self, deleted):
+        """维护线程按保留策略删除了旧记录"""
+        self.need_update = True
+    
+    def on_external_change(self):
+        """命令行客户端写入或收藏了记录"""
+        self.need_update = True
+        self.maintenance.wake()
+    
+    def is_idle(self):
+        """剪贴板一段时间没有变化（或监控已暂停）时才做数据库维护"""
+        return not self.monitoring or self.scheduler.idle_for >= MAINTENANCE_IDLE
+    
+    def status(self):
+        """运行状态：轮询、写入队列和后台维护，供 /api/status 输出"""
+        return {
+            "version": VERSION,
+            "clips": self.store.count(),
+            "revision": self.store.revision,
+            "origin": self.store.origin,
+            "monitoring": self.monitoring,
+            "poll": self.scheduler.stats(),
+            "capture": {
+                "batches": self.writer.batches,
+                "written": self.writer.written,
+                "dropped": self.writer.dropped,
+            },
+            "hot_cache": self.store.hot.stats(),
+            "maintenance": self.maintenance.status(),
+        }
+    
+    def get_recent_clips(self, limit=8):
+        return self.store.recent_clips(limit)
+    
+    def get_clip_count(self):
+        return self.store.count()
+    
+    def add_separator(self, parent):
+        """添加分隔符并返回它，方便之后单独隐藏"""
+        parent.add(rumps.separator)
+        return list(parent.values())[-1]
+    
+    def build_menu(self):
+        """创建全部菜单项：剪贴板条目使用固定数量的可复用位置"""
+        self.header_item = rumps.MenuItem(f"ClipFlow v{VERSION}")
+        self.header_item.set_callback(None)
+        self.menu.add(self.header_item)
+        self.menu.add(rumps.separator)
+        
+        self.pinned_slots = MenuSlots(self.menu, MENU_RECENT, "pinned",
+                                      self.make_copy_callback, self.make_pin_callback)
+        self.pinned_sep = self.add_separator(self.menu)
+        self.normal_slots = MenuSlots(self.menu, MENU_NORMAL, "recent",
+                                      self.make_copy_callback, self.make_pin_callback)
+        self.clips_sep = self.add_separator(self.menu)
+        
+        # 收藏夹子菜单（只显示最近5条）
+        self.favorites_menu = rumps.MenuItem("⭐ 收藏夹")
+        self.favorite_slots = MenuSlots(self.favorites_menu, MENU_FAVORITES, "favorite",
+                                        self.make_copy_callback, self.make_pin_callback)
+        self.more_sep = self.add_separator(self.favorites_menu)
+        self.more_item = rumps.MenuItem("查看全部收藏...", callback=self.open_history_window)
+        self.favorites_menu.add(self.more_item)
+        self.empty_item = rumps.MenuItem("暂无收藏")
+        self.empty_item.set_callback(None)
+        self.favorites_menu.add(self.empty_item)
+        self.menu.add(self.favorites_menu)
+        
+        self.view_all = rumps.MenuItem("📖 查看历史", callback=self.open_history_window)
+        self.view_web = rumps.MenuItem("🌐 网页版", callback=self.open_web_history)
+        self.clear_btn = rumps.MenuItem("🗑️ 清空历史", callback=self.clear_history)
+        self.toggle_btn = rumps.MenuItem("⏸️ 暂停监控", callback=self.toggle_monitoring)
+        self.login_btn = rumps.MenuItem("开机启动：已关闭", callback=self.toggle_login_item)
+        self.quit_btn = rumps.MenuItem("退出", callback=self.quit_app)
+        self.menu.add(self.view_all)
+        self.menu.add(self.view_web)
+        self.menu.add(self.clear_btn)
+        self.menu.add(rumps.separator)
+        self.menu.add(self.toggle_btn)
+        self.menu.add(self.login_btn)
+        self.menu.add(rumps.separator)
+        self.menu.add(rumps.MenuItem("⭐ GitHub", callback=self.open_github))
+        self.menu.add(rumps.separator)
+        self.menu.add(self.quit_btn)
+    
+    def set_visible(self, item, visible):
+        """只在可见状态变化时调用 AppKit"""
+        if self.visible.get(id(item)) != visible:
+            self.visible[id(item)] = visible
+            set_menu_item_hidden(item, not visible)
+    
+    def set_title(self, item, title):
+        if item.title != title:
+            item.title = title
+    
+    def refresh_menu(self):
+        """刷新菜单：只改动与当前显示不同的条目，返回改动数"""
+        clips = self.get_recent_clips(MENU_RECENT)
+        # 先显示收藏的
+        pinned_clips = [c for c in clips if c[3]]
+        normal_clips = [c for c in clips if not c[3]][:MENU_NORMAL]
+        
+        self.set_title(self.header_item, f"ClipFlow v{VERSION} · {self.get_clip_count()} 条记录")
+        changed = self.pinned_slots.update([
+            (clip_id, preview, "⭐ " + shorten(preview), "取消收藏")
+            for clip_id, preview, created_ms, pinned in pinned_clips
+        ])
+        changed += self.normal_slots.update([
+            (clip_id, preview, shorten(preview), "☆ 收藏")
+            for clip_id, preview, created_ms, pinned in normal_clips
+        ])
+        changed += self.favorite_slots.update([
+            (clip_id, preview, shorten(preview), "取消收藏")
+            for clip_id, preview, created_ms, pinned in pinned_clips[:MENU_FAVORITES]
+        ])
+        self.set_visible(self.pinned_sep, bool(pinned_clips))
+        self.set_visible(self.clips_sep, bool(clips))
+        
+        has_more = len(pinned_clips) > MENU_FAVORITES
+        self.set_visible(self.more_sep, has_more)
+        self.set_visible(self.more_item, has_more)
+        if has_more:
+            self.set_title(self.more_item, f"查看全部 {len(pinned_clips)} 条收藏...")
+        self.set_visible(self.empty_item, not pinned_clips)
+        
+        self.set_title(self.toggle_btn, "⏸️ 暂停监控" if self.monitoring else "▶️ 继续监控")
+        self.set_title(self.login_btn, "开机启动：已开启" if self.system.login_enabled else "开机启动：已关闭")
+        # 缓存过期时在后台重新检查，本次先用旧值
+        if self.system.login_stale():
+            self.system.check_login_item(self.on_login_state)
+        return changed
+    
+    def on_login_state(self, enabled):
+        """后台线程回调：登录项状态已更新，下一次 tick 刷新菜单"""
+        self.need_update = True
+    
+    def make_copy_callback(self, clip_id, preview):
+        """创建复制回调函数；菜单里只有预览，点击时才读取全文"""
+        def copied(ok):
+            if ok:
+                self.system.notify("ClipFlow", "已复制", shorten(preview, 50))
+        
+        def callback(sender):
+            content = self.store.get_content(clip_id)
+            if content is None:
+                return
+            # 先记下哈希，避免轮询把自己写入的内容再采集一遍
+            self.monitor.last_hash = hashlib.md5(content.encode()).hexdigest()
+            self.system.copy_text(content, copied)
+            # 更新时间戳，让它排到最上面
+            self.store.touch_clip(clip_id)
+            self.refresh_menu()
+        return callback
+    
+    def make_pin_callback(self, clip_id):
+        """创建收藏回调函数"""
+        def callback(sender):
+            new_state = toggle_pin(clip_id)
+            self.refresh_menu()
+            msg = "已收藏" if new_state else "已取消收藏"
+            self.system.notify("ClipFlow", "", msg)
+        return callback
+    
+    def open_history_window(self, sender):
+        ClipFlowWindow.shared().show()
+    
+    def open_web_history(self, sender):
+        webbrowser.open(f"http://127.0.0.1:{WEB_PORT}")
+    
+    def open_github(self, sender):
+        webbrowser.open("https://github.com/qiaoshouqing/ClipFlow")
+    
+    def quit_app(self, sender):
+        # 先把写入队列里的内容落盘
+        self.writer.close()
+        self.maintenance.close()
+        self.control.close()
+        # 1.6.0 的大库在这里转换为增量 VACUUM：采集已经停止，不会卡住任何写入
+        self.maintenance.convert(lambda message: self.system.notify("ClipFlow", "", message))
+        self.system.close()
+        rumps.quit_application()
+    
+    def toggle_monitoring(self, sender):
+        self.monitoring = not self.monitoring
+        self.refresh_menu()
+        status = "已开启" if self.monitoring else "已暂停"
+        self.system.notify("ClipFlow", "", f"剪贴板监控{status}")
+    
+    def clear_history(self, sender):
+        self.store.clear_history()
+        self.maintenance.wake()
+        self.refresh_menu()
+        self.system.notify("ClipFlow", "", "历史已清空")
+    
+    def toggle_login_item(self, sender):
+        """切换开机启动（后台执行）"""
+        self.system.toggle_login_item(self.on_login_toggled)
+    
+    def on_login_toggled(self, result):
+        before, after = result
+        if before:
+            self.system.notify("ClipFlow", "", "已关闭开机启动")
+        elif after:
+            self.system.notify("ClipFlow", "", "已开启开机启动")
+        else:
+            self.system.notify("ClipFlow", "提示", "请将 ClipFlow.app 放入 Applications 文件夹后重试")
+        self.need_update = True
+
+
+def main():
+    app = ClipFlowApp()
+    app.run()
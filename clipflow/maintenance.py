@@ -0,0 +1,227 @@
+"""保留策略和后台数据库维护"""
+
+import math
+import sqlite3
+import threading
+import time
+import json
+
+from .config import (
+    CHANGES_PRUNE_INTERVAL, CHECKPOINT_INTERVAL, MAINTENANCE_BUDGET, MAINTENANCE_INTERVAL, MAX_HISTORY,
+    MAX_HISTORY_BYTES, MAX_HISTORY_DAYS, MAX_PER_TYPE, OPTIMIZE_INTERVAL, QUICK_CHECK_INTERVAL,
+    RETENTION_CHUNK, RETENTION_PATH, RETENTION_PAUSE, VACUUM_CONVERT_MAX_BYTES, VACUUM_STEP_PAGES,
+)
+
+
+class RetentionPolicy:
+    """历史保留策略：条数、总容量、最长保留天数、按内容类型的条数上限
+
+    每一项为 None 表示不限制；总容量按内容的 UTF-8 字节数计算；收藏的记录不受任何限制。
+    """
+
+    def __init__(self, max_rows=MAX_HISTORY, max_bytes=MAX_HISTORY_BYTES,
+                 max_age_days=MAX_HISTORY_DAYS, per_type=None):
+        self.max_rows = max_rows
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.per_type = dict(MAX_PER_TYPE if per_type is None else per_type)
+
+    @classmethod
+    def load(cls, path=RETENTION_PATH):
+        """从 JSON 文件读取策略；文件不存在或格式不对时使用默认值，类型不对的项各自回退到默认值"""
+        try:
+            with open(path, encoding="utf-8") as f:
+                config = json.load(f)
+        except (OSError, ValueError):
+            return cls()
+        if not isinstance(config, dict):
+            return cls()
+        per_type = config.get("per_type")
+        if isinstance(per_type, dict):
+            # 单个类型的上限不对时按默认策略里这个类型的上限，默认没有就不限
+            per_type = {content_type: cls._limit(per_type, content_type, MAX_PER_TYPE.get(content_type), int)
+                        for content_type in per_type if isinstance(content_type, str)}
+            per_type = {content_type: limit for content_type, limit in per_type.items() if limit is not None}
+        else:
+            per_type = None
+        return cls(
+            max_rows=cls._limit(config, "max_rows", MAX_HISTORY, int),
+            max_bytes=cls._limit(config, "max_bytes", MAX_HISTORY_BYTES, int),
+            max_age_days=cls._limit(config, "max_age_days", MAX_HISTORY_DAYS, (int, float)),
+            per_type=per_type,
+        )
+
+    @staticmethod
+    def _limit(config, key, default, types):
+        """config[key] 是 null 或有限的非负数时返回它，缺失或类型不对时返回 default"""
+        value = config.get(key, default)
+        if value is None:
+            return None
+        if isinstance(value, bool) or not isinstance(value, types) or not 0 <= value < math.inf:
+            return default
+        return value
+
+    def to_json(self):
+        return {
+            "max_rows": self.max_rows,
+            "max_bytes": self.max_bytes,
+            "max_age_days": self.max_age_days,
+            "per_type": self.per_type,
+        }
+
+
+class MaintenanceWorker:
+    """后台维护线程：定期或在有新写入时按保留策略分块删除旧记录，空闲时维护数据库
+
+    每个事务最多删除 chunk 条，两个事务之间让出写锁，采集路径不再做淘汰。
+    数据库维护（增量 VACUUM、WAL 检查点、ANALYZE、完整性检查、清理变更日志）只在 is_idle() 为真时
+    进行，每次运行最多占用 budget 秒，没做完的任务留到下一次。1.6.0 的库超过 convert_max_bytes 时
+    不在这里整库 VACUUM，只把 convert_pending 置为真，由退出流程在采集停止之后调用 convert()。
+    """
+
+    TASKS = ("vacuum", "checkpoint", "optimize", "quick_check", "prune_changes")
+
+    def __init__(self, store, policy=None, interval=MAINTENANCE_INTERVAL,
+                 chunk=RETENTION_CHUNK, pause=RETENTION_PAUSE, on_change=None,
+                 is_idle=None, budget=MAINTENANCE_BUDGET, vacuum_pages=VACUUM_STEP_PAGES,
+                 convert_max_bytes=VACUUM_CONVERT_MAX_BYTES):
+        self.store = store
+        self.policy = policy or RetentionPolicy()
+        self.interval = interval
+        self.chunk = chunk
+        self.pause = pause
+        self.on_change = on_change
+        self.is_idle = is_idle or (lambda: True)
+        self.budget = budget
+        self.vacuum_pages = vacuum_pages
+        self.convert_max_bytes = convert_max_bytes
+        self.convert_pending = False
+        self.wakeup = threading.Event()
+        self.stopped = False
+        self.thread = threading.Thread(target=self._run, name="clipflow-maintenance", daemon=True)
+        self.runs = 0
+        self.deleted = 0
+        # 按间隔执行的任务及下一次到期时间；启动后第一次空闲就全部执行一遍
+        self.intervals = {
+            "checkpoint": CHECKPOINT_INTERVAL,
+            "optimize": OPTIMIZE_INTERVAL,
+            "quick_check": QUICK_CHECK_INTERVAL,
+            "prune_changes": CHANGES_PRUNE_INTERVAL,
+        }
+        self.due = dict.fromkeys(self.intervals, 0.0)
+        # 任务名 -> 最近一次执行的时间、耗时和结果
+        self.tasks = {}
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def wake(self):
+        """有新写入时调用，尽快检查一次策略"""
+        self.wakeup.set()
+
+    def enforce_retention(self):
+        """分块执行保留策略直到满足为止，返回删除的条数"""
+        total = 0
+        while not self.stopped:
+            deleted = self.store.enforce_retention(self.policy, self.chunk)
+            total += deleted
+            if deleted < self.chunk:
+                break
+            time.sleep(self.pause)
+        self.deleted += total
+        return total
+
+    def vacuum(self, deadline):
+        """分步增量 VACUUM，直到没有空闲页或超出预算，返回回收的页数"""
+        stats = self.store.page_stats()
+        free = stats["freelist_count"]
+        if stats["auto_vacuum"] != 2:
+            # 旧库需要一次完整 VACUUM 才能切换模式，之后都是增量回收；整库 VACUUM 期间一直持有写锁，
+            # 只有小库在这里做，大库留给退出流程
+            if stats["page_count"] * stats["page_size"] > self.convert_max_bytes:
+                self.convert_pending = True
+                return 0
+            self.store.vacuum()
+            return free
+        before = free
+        while free and not self.stopped and time.monotonic() < deadline:
+            free = self.store.incremental_vacuum(self.vacuum_pages)
+        return before - free
+
+    def convert(self, progress=None):
+        """退出时调用：维护线程已停止、采集已落盘，对留下来的大库整库 VACUUM，返回是否执行了
+
+        progress(message) 在开始和结束时各调用一次，界面用它提示用户。
+        """
+        if not self.convert_pending:
+            return False
+        if progress:
+            progress("正在整理数据库，完成后退出…")
+        started = time.monotonic()
+        self.store.vacuum()
+        self.convert_pending = False
+        if progress:
+            progress(f"数据库整理完成（{time.monotonic() - started:.1f} 秒）")
+        return True
+
+    def maintain(self):
+        """在时间预算内依次执行到期的维护任务，返回执行了的任务名"""
+        deadline = time.monotonic() + self.budget
+        ran = []
+        for name in self.TASKS:
+            if self.stopped or time.monotonic() >= deadline:
+                break
+            if time.monotonic() < self.due.get(name, 0.0):
+                continue
+            task = (lambda: self.vacuum(deadline)) if name == "vacuum" else getattr(self.store, name)
+            started = time.monotonic()
+            entry = {"at": time.time()}
+            try:
+                entry["result"] = task()
+            except sqlite3.Error as e:
+                entry["error"] = str(e)
+            entry["ms"] = round((time.monotonic() - started) * 1000, 2)
+            self.tasks[name] = entry
+            if name in self.intervals:
+                self.due[name] = time.monotonic() + self.intervals[name]
+            ran.append(name)
+        return ran
+
+    def run_once(self):
+        self.runs += 1
+        deleted = self.enforce_retention()
+        if deleted and self.on_change:
+            self.on_change(deleted)
+        if self.is_idle():
+            self.maintain()
+        return deleted
+
+    def status(self):
+        """维护状态，供 /api/status 输出"""
+        return {
+            "runs": self.runs,
+            "deleted": self.deleted,
+            "idle": bool(self.is_idle()),
+            "convert_pending": self.convert_pending,
+            "policy": self.policy.to_json(),
+            "pages": self.store.page_stats(),
+            "tasks": {name: dict(entry) for name, entry in self.tasks.items()},
+        }
+
+    def close(self, timeout=5.0):
+        self.stopped = True
+        self.wakeup.set()
+        if self.thread.is_alive():
+            self.thread.join(timeout)
+
+    def _run(self):
+        while not self.stopped:
+            self.wakeup.wait(self.interval)
+            self.wakeup.clear()
+            if self.stopped:
+                break
+            try:
+                self.run_once()
+            except Exception as e:
+                self.store.metrics.error("maintenance", e)
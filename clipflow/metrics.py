@@ -0,0 +1,190 @@
+"""运行指标：计数器、固定桶延迟直方图和按需计算的仪表，导出为 Prometheus 文本或 JSON"""
+
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+
+from .config import LATENCY_BUCKETS, METRICS_ENABLED, METRICS_RECENT_ERRORS
+
+
+def series_name(name, labels):
+    """Prometheus 的序列名，例如 clipflow_errors_total{where="poll"}"""
+    if not labels:
+        return name
+    return name + "{" + ",".join(f'{k}="{v}"' for k, v in labels) + "}"
+
+
+class Counter:
+    def __init__(self, name, labels=()):
+        self.name = name
+        self.labels = labels
+        self.value = 0
+        self.lock = threading.Lock()
+
+    def inc(self, amount=1):
+        with self.lock:
+            self.value += amount
+
+
+class Histogram:
+    """固定桶直方图；counts[i] 是落在 (buckets[i-1], buckets[i]] 里的次数，最后一格是 +Inf"""
+
+    def __init__(self, name, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.labels = labels
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def observe(self, seconds):
+        i = bisect_left(self.buckets, seconds)
+        with self.lock:
+            self.counts[i] += 1
+            self.sum += seconds
+            self.count += 1
+
+    def since(self, start):
+        """记录从 start（Metrics.start() 的返回值）到现在的耗时；关闭时 start 为 0，什么也不做"""
+        if start:
+            self.observe(time.perf_counter() - start)
+
+    def quantile(self, q):
+        """按桶估计分位数，返回所在桶的上限；落在 +Inf 桶时返回最大的有限上限"""
+        with self.lock:
+            counts, total = list(self.counts), self.count
+        if not total:
+            return None
+        rank, seen = q * total, 0
+        for bound, n in zip(self.buckets, counts):
+            seen += n
+            if seen >= rank:
+                return bound
+        return self.buckets[-1]
+
+    def snapshot(self):
+        with self.lock:
+            counts, total, sum_ = list(self.counts), self.count, self.sum
+        return {
+            "count": total,
+            "sum": round(sum_, 6),
+            "p50": self.quantile(0.5),
+            "p99": self.quantile(0.99),
+            "buckets": {str(bound): n for bound, n in zip(self.buckets + ("+Inf",), counts)},
+        }
+
+
+class Metrics:
+    """进程内的指标注册表
+
+    热路径的写法是 start = metrics.start() ... histogram.since(start)：关闭时 start()
+    直接返回 0，不读时钟、不加锁。计数器和直方图按 (名字, 标签) 创建一次后复用。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, enabled=METRICS_ENABLED):
+        self.enabled = enabled
+        self.lock = threading.Lock()
+        self.series = {}
+        self.help = {}
+        self.gauges = {}
+        self.errors = deque(maxlen=METRICS_RECENT_ERRORS)
+        self.started = time.time()
+
+    @classmethod
+    def shared(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def start(self):
+        return time.perf_counter() if self.enabled else 0
+
+    def _get(self, kind, name, doc, labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            metric = self.series.get(key)
+            if metric is None:
+                metric = self.series[key] = kind(name, key[1])
+                self.help.setdefault(name, doc)
+            return metric
+
+    def counter(self, name, doc="", **labels):
+        return self._get(Counter, name, doc, labels)
+
+    def histogram(self, name, doc="", **labels):
+        return self._get(Histogram, name, doc, labels)
+
+    def gauge(self, name, doc, fn):
+        """注册按需计算的仪表；同名的旧仪表会被替换"""
+        with self.lock:
+            self.gauges[name] = fn
+            self.help[name] = doc
+
+    def error(self, where, exc):
+        """记录一个被吞掉的异常：计数并保留最近几次的原因（异常很少，关闭指标时也记录）"""
+        self.counter("clipflow_errors_total", "被捕获并忽略的异常", where=where).inc()
+        self.errors.append({"time": round(time.time(), 3), "where": where, "error": repr(exc)})
+
+    def _gauge_values(self):
+        with self.lock:
+            gauges = list(self.gauges.items())
+        values = {}
+        for name, fn in gauges:
+            try:
+                values[name] = fn()
+            except Exception:
+                pass
+        return values
+
+    def prometheus(self):
+        """Prometheus 文本格式（0.0.4）"""
+        with self.lock:
+            series = sorted(self.series.values(), key=lambda m: (m.name, m.labels))
+        lines, described = [], set()
+
+        def describe(name, kind):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {self.help.get(name) or name}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        for name, value in self._gauge_values().items():
+            describe(name, "gauge")
+            lines.append(f"{name} {value}")
+        for metric in series:
+            if isinstance(metric, Counter):
+                describe(metric.name, "counter")
+                lines.append(f"{series_name(metric.name, metric.labels)} {metric.value}")
+                continue
+            describe(metric.name, "histogram")
+            with metric.lock:
+                counts, total, sum_ = list(metric.counts), metric.count, metric.sum
+            cumulative = 0
+            for bound, n in zip(metric.buckets + ("+Inf",), counts):
+                cumulative += n
+                labels = metric.labels + (("le", str(bound)),)
+                lines.append(f"{series_name(metric.name + '_bucket', labels)} {cumulative}")
+            lines.append(f"{series_name(metric.name + '_sum', metric.labels)} {sum_:.6f}")
+            lines.append(f"{series_name(metric.name + '_count', metric.labels)} {total}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        """JSON 形式：计数器的值、直方图的次数 / 总耗时 / 估计分位数，以及最近的异常"""
+        with self.lock:
+            series = list(self.series.values())
+        return {
+            "enabled": self.enabled,
+            "uptime": round(time.time() - self.started, 1),
+            "gauges": self._gauge_values(),
+            "counters": {series_name(m.name, m.labels): m.value
+                         for m in series if isinstance(m, Counter)},
+            "histograms": {series_name(m.name, m.labels): m.snapshot()
+                           for m in series if isinstance(m, Histogram)},
+            "recent_errors": list(self.errors),
+        }
@@ -0,0 +1,47 @@
+"""命令行客户端和应用之间的帧格式：4 字节大端长度 + UTF-8 JSON 对象"""
+
+import json
+import struct
+
+from .config import CONTROL_MAX_FRAME
+
+HEADER = struct.Struct(">I")
+
+
+class ProtocolError(Exception):
+    pass
+
+
+def send_frame(sock, message):
+    data = json.dumps(message, ensure_ascii=False, separators=(",", ":")).encode()
+    if len(data) > CONTROL_MAX_FRAME:
+        raise ProtocolError(f"frame of {len(data)} bytes exceeds {CONTROL_MAX_FRAME}")
+    sock.sendall(HEADER.pack(len(data)) + data)
+
+
+def _recv_exactly(sock, n):
+    chunks = []
+    while n:
+        chunk = sock.recv(min(n, 1 << 20))
+        if not chunk:
+            return None
+        chunks.append(chunk)
+        n -= len(chunk)
+    return b"".join(chunks)
+
+
+def recv_frame(sock):
+    """读取一帧；对端在帧边界上关闭时返回 None"""
+    header = _recv_exactly(sock, HEADER.size)
+    if header is None:
+        return None
+    (size,) = HEADER.unpack(header)
+    if size > CONTROL_MAX_FRAME:
+        raise ProtocolError(f"frame of {size} bytes exceeds {CONTROL_MAX_FRAME}")
+    data = _recv_exactly(sock, size)
+    if data is None:
+        raise ProtocolError("connection closed inside a frame")
+    message = json.loads(data)
+    if not isinstance(message, dict):
+        raise ProtocolError("frame is not a JSON object")
+    return message
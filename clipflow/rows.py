@@ -0,0 +1,108 @@
+"""历史窗口的行数据源"""
+
+import time
+from collections import OrderedDict
+
+from .config import ROW_CACHE_PAGES, ROW_PAGE_SIZE, ROW_TIME_TTL
+from .text import get_time_ago, shorten, truncate_text
+from .store import ClipStore, strip_marks
+
+
+class ClipRowSource:
+    """历史窗口的行数据源
+
+    按需读取 page_size 行的预览（不含全文），放进 LRU 页缓存；
+    数据库修订号变化时整体失效。搜索结果本身有上限，一次取回。
+    行格式为 (id, 预览, 时间标签, pinned)，绘制时不再做任何计算。
+    """
+
+    def __init__(self, store, page_size=ROW_PAGE_SIZE, max_pages=ROW_CACHE_PAGES):
+        self.store = store
+        self.page_size = page_size
+        self.max_pages = max_pages
+        # 页号 -> (读取时间, 最后一行的排序键, rows)
+        self.pages = OrderedDict()
+        self.query = ""
+        self.results = None
+        # 搜索只检查了最近多少条记录（全是单个字符的词时），搜索了全部历史时为 None
+        self.scanned = None
+        self.revision = None
+        self.synced = 0.0
+        self.total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def set_query(self, query):
+        if query != self.query:
+            self.query = query
+            self.revision = None
+
+    def invalidate(self):
+        self.revision = None
+
+    def _sync(self):
+        now = time.monotonic()
+        if self.revision == self.store.revision and (
+                self.results is None or now - self.synced < ROW_TIME_TTL):
+            return
+        self.revision = self.store.revision
+        self.synced = now
+        self.pages.clear()
+        if self.query:
+            results, self.scanned = self.store.search(self.query, ClipStore.SEARCH_CANDIDATES)
+            self.results = [
+                self._display(clip_id, truncate_text(strip_marks(snippet), 60), created_ms, pinned)
+                for clip_id, snippet, created_ms, pinned in results
+            ]
+            self.total = len(self.results)
+        else:
+            self.results = None
+            self.scanned = None
+            self.total = self.store.count()
+
+    @staticmethod
+    def _display(clip_id, preview, created_ms, pinned):
+        return clip_id, shorten(preview, 60), get_time_ago(created_ms), pinned
+
+    def count(self):
+        self._sync()
+        return self.total
+
+    def row(self, index):
+        """第 index 行，越界返回 None"""
+        self._sync()
+        if not 0 <= index < self.total:
+            return None
+        if self.results is not None:
+            return self.results[index]
+        number, offset = divmod(index, self.page_size)
+        rows = self._page(number)
+        return rows[offset] if offset < len(rows) else None
+
+    def clip_id(self, index):
+        row = self.row(index)
+        return row[0] if row else None
+
+    def _page(self, number):
+        now = time.monotonic()
+        entry = self.pages.get(number)
+        if entry is not None and now - entry[0] < ROW_TIME_TTL:
+            self.pages.move_to_end(number)
+            self.hits += 1
+            return entry[2]
+        self.misses += 1
+        # 顺序滚动时上一页通常还在缓存里，用它的最后一行做键集分页，避免 OFFSET 扫描
+        previous = self.pages.get(number - 1)
+        if previous is not None and previous[1] is not None:
+            raw = self.store.preview_rows(self.page_size, after=previous[1])
+        else:
+            raw = self.store.preview_rows(self.page_size, offset=number * self.page_size)
+        last = None
+        if len(raw) == self.page_size:
+            clip_id, _, created_ms, pinned = raw[-1]
+            last = (pinned, created_ms, clip_id)
+        rows = [self._display(*r) for r in raw]
+        self.pages[number] = (now, last, rows)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        return rows
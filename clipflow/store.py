@@ -0,0 +1,1521 @@
+"""SQLite 存储：ClipStore、热缓存和变更事件"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+from pathlib import Path
+import re
+import json
+import html
+import queue
+from collections import deque
+from contextlib import contextmanager
+
+from .config import (
+    ANALYSIS_LIMIT, BLOB_INLINE_CHARS, BLOB_THRESHOLD, CHANGES_HORIZON_DAYS, CHANGES_PRUNE_CHUNK, DB_PATH,
+    EXPORT_CHUNK,
+    HOT_CACHE_SIZE, IMPORT_BATCH, IMPORT_BLOB_LEVEL, MIGRATION_CHUNK, RETENTION_CHUNK, SYNC_BATCH,
+    VACUUM_STEP_PAGES,
+)
+from .metrics import Metrics
+from .text import (
+    clip_metadata, clip_to_json, decode_cursor, encode_cursor, inflate_content, now_ms,
+    pack_blob,
+)
+
+
+class EventBus:
+    """进程内的发布 / 订阅，每个订阅者一个有界队列"""
+
+    MAX_PENDING = 256
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscribers = set()
+
+    def subscribe(self, q=None):
+        """订阅事件；q 可以是任何实现了 put_nowait 的对象，默认新建一个有界队列"""
+        if q is None:
+            q = queue.Queue(maxsize=self.MAX_PENDING)
+        with self._lock:
+            self._subscribers.add(q)
+        return q
+
+    def unsubscribe(self, q):
+        with self._lock:
+            self._subscribers.discard(q)
+
+    def publish(self, event):
+        with self._lock:
+            subscribers = list(self._subscribers)
+        for q in subscribers:
+            try:
+                q.put_nowait(event)
+            except queue.Full:
+                # 消费太慢的订阅者：丢掉积压，只让它重新加载一次
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait({"type": "reset", "rev": event.get("rev")})
+
+
+class HotCache:
+    """最近 size 条未收藏记录和全部收藏记录（LIST_COLUMNS 行），提交后同步更新
+
+    revision 等于 ClipStore.revision 时内容是最新的；为 None 时由读者从数据库重新加载。
+    行按 pinned DESC, created_ms DESC, id DESC 排列，与列表 SQL 的顺序相同。
+    """
+
+    def __init__(self, size=HOT_CACHE_SIZE):
+        self.size = size
+        self.lock = threading.Lock()
+        self.revision = None
+        self.pinned = []
+        self.unpinned = []
+        self.rows = []
+        # 缓存中是否就是整张表，是的话任何范围都能直接回答
+        self.complete = False
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+
+    @staticmethod
+    def sort_key(row):
+        return row[6], row[5], row[0]
+
+    def invalidate(self):
+        with self.lock:
+            self.revision = None
+
+    def load(self, revision, pinned, unpinned):
+        with self.lock:
+            self.pinned = list(pinned)
+            self.unpinned = list(unpinned)
+            self.complete = len(self.unpinned) < self.size
+            self.rows = self.pinned + self.unpinned
+            self.revision = revision
+            self.reloads += 1
+
+    def apply(self, start_rev, revision, changes, pinned_count, unpinned_count):
+        """写事务提交后调用；changes 为 ("upsert", row) / ("delete", ids) / ("reset", None)
+
+        缓存不是在 start_rev 上建立的，或者删除后缺了行、无法只靠内存补齐时，标记为需要重新加载。
+        """
+        with self.lock:
+            if self.revision is None or self.revision != start_rev:
+                self.revision = None
+                return
+            for op, arg in changes:
+                if op == "upsert":
+                    self._remove({arg[0]})
+                    target = self.pinned if arg[6] else self.unpinned
+                    target.append(arg)
+                    target.sort(key=self.sort_key, reverse=True)
+                elif op == "delete":
+                    self._remove(set(arg))
+                else:
+                    self.unpinned = []
+            del self.unpinned[self.size:]
+            if len(self.pinned) != pinned_count or len(self.unpinned) < min(self.size, unpinned_count):
+                self.revision = None
+                return
+            self.complete = len(self.unpinned) == unpinned_count
+            self.rows = self.pinned + self.unpinned
+            self.revision = revision
+
+    def _remove(self, ids):
+        self.pinned = [row for row in self.pinned if row[0] not in ids]
+        self.unpinned = [row for row in self.unpinned if row[0] not in ids]
+
+    def slice(self, limit, offset=0, after=None):
+        """取第 offset 行起（或排在 after 之后）的 limit 行；超出缓存覆盖的范围时返回 None"""
+        with self.lock:
+            rows = self.rows
+            if after is not None:
+                after = tuple(after)
+                offset = next((i for i, row in enumerate(rows) if self.sort_key(row) < after), len(rows))
+            if offset + limit > len(rows) and not self.complete:
+                self.misses += 1
+                return None
+            self.hits += 1
+            return rows[offset:offset + limit]
+
+    def stats(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "size": len(self.rows),
+                "capacity": self.size,
+                "pinned": len(self.pinned),
+                "revision": self.revision,
+                "hits": self.hits,
+                "misses": self.misses,
+                "reloads": self.reloads,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
+
+
+class ClipStore:
+    """SQLite 存储引擎：一个长连接写连接 + 小型只读连接池（WAL 模式）"""
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    # 每个连接都会执行的 pragma：WAL 下 synchronous=NORMAL 既安全又省去每次提交的 fsync
+    PRAGMAS = (
+        "PRAGMA synchronous=NORMAL",
+        "PRAGMA cache_size=-8000",        # 8 MiB 页缓存
+        "PRAGMA mmap_size=67108864",      # 64 MiB 内存映射读
+        "PRAGMA temp_store=MEMORY",
+    )
+    MAX_READERS = 4
+    # 内存中保留的删除记录条数，供 changes_since() 返回增量删除
+    MAX_TOMBSTONES = 1000
+
+    # 固定的 SQL 文本会被 sqlite3 按连接缓存为预编译语句
+    SQL_FIND_HASH = "SELECT id FROM clips WHERE content_hash = ?"
+    SQL_FIND_HASHES = "SELECT content_hash FROM clips WHERE content_hash IN ({marks})"
+    # created_at 文本列只为兼容回退到 1.6.0 而保留，排序和显示都用整数毫秒 created_ms
+    SQL_INSERT = """
+        INSERT INTO clips (content, content_hash, preview, length, line_count, content_type, size_bytes,
+                           created_at, created_ms, rev, in_blob)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime('now', 'localtime'), ?, ?, ?)
+    """
+    # 导入保留原来的时间和收藏状态；content_hash 已存在时什么也不做
+    SQL_IMPORT = """
+        INSERT INTO clips (content, content_hash, preview, length, line_count, content_type, size_bytes,
+                           created_at, created_ms, pinned, rev, in_blob)
+        VALUES (?, ?, ?, ?, ?, ?, ?, datetime(?, 'unixepoch', 'localtime'), ?, ?, ?, ?)
+        ON CONFLICT(content_hash) DO NOTHING
+    """
+    SQL_PUT_BLOB = "INSERT OR REPLACE INTO clip_blobs (hash, codec, size, data) VALUES (?, ?, ?, ?)"
+    SQL_MOVE_TO_BLOB = "UPDATE clips SET content = ?, in_blob = 1 WHERE id = ?"
+    SQL_SET_METADATA = "UPDATE clips SET preview = ?, length = ?, line_count = ?, content_type = ? WHERE id = ?"
+    # 列表接口只读这些列，不读全文
+    LIST_COLUMNS = "id, preview, length, line_count, content_type, created_ms, pinned, rev"
+    # 只淘汰最旧的未收藏记录，走 idx_clips_pinned_created_ms 索引，不做全表扫描；
+    # 按容量淘汰看的是 size_bytes（UTF-8 字节数），length 是字符数
+    SQL_EVICT = """
+        SELECT id, size_bytes FROM clips WHERE pinned = 0
+        ORDER BY created_ms, id LIMIT ?
+    """
+    SQL_EXPIRED = """
+        SELECT id, size_bytes FROM clips WHERE pinned = 0 AND created_ms < ?
+        ORDER BY created_ms, id LIMIT ?
+    """
+    SQL_COUNT_TYPE = "SELECT COUNT(*) FROM clips WHERE content_type = ? AND pinned = 0"
+    SQL_EVICT_TYPE = """
+        SELECT id, size_bytes FROM clips WHERE content_type = ? AND pinned = 0
+        ORDER BY created_ms, id LIMIT ?
+    """
+    SQL_RECENT = """
+        SELECT id, preview, created_ms, pinned
+        FROM clips ORDER BY pinned DESC, created_ms DESC, id DESC LIMIT ?
+    """
+    # 键集分页：按 (pinned, created_ms, id) 倒序，游标是上一页最后一行的这三个值
+    SQL_PAGE_FIRST = f"""
+        SELECT {LIST_COLUMNS} FROM clips
+        ORDER BY pinned DESC, created_ms DESC, id DESC LIMIT ?
+    """
+    SQL_PAGE_AFTER = f"""
+        SELECT {LIST_COLUMNS} FROM clips
+        WHERE (pinned, created_ms, id) < (?, ?, ?)
+        ORDER BY pinned DESC, created_ms DESC, id DESC LIMIT ?
+    """
+    SQL_PREVIEW_OFFSET = """
+        SELECT id, preview, created_ms, pinned FROM clips
+        ORDER BY pinned DESC, created_ms DESC, id DESC LIMIT ? OFFSET ?
+    """
+    SQL_PREVIEW_AFTER = """
+        SELECT id, preview, created_ms, pinned FROM clips
+        WHERE (pinned, created_ms, id) < (?, ?, ?)
+        ORDER BY pinned DESC, created_ms DESC, id DESC LIMIT ?
+    """
+    SQL_CHANGED = f"""
+        SELECT {LIST_COLUMNS} FROM clips
+        WHERE rev > ? ORDER BY rev LIMIT ?
+    """
+    SQL_COUNTS = """
+        SELECT COUNT(*), COALESCE(SUM(pinned != 0), 0),
+               COALESCE(SUM(CASE WHEN pinned = 0 THEN size_bytes ELSE 0 END), 0)
+        FROM clips
+    """
+    SQL_GET_PINNED = "SELECT pinned, size_bytes FROM clips WHERE id = ?"
+    SQL_SET_PINNED = "UPDATE clips SET pinned = ?, rev = ? WHERE id = ?"
+    SQL_TOUCH = """
+        UPDATE clips SET created_at = datetime('now', 'localtime'), created_ms = ?, rev = ? WHERE id = ?
+    """
+    SQL_GET_META = "SELECT value FROM meta WHERE key = ?"
+    SQL_SET_META = "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)"
+    SQL_DELETE = "DELETE FROM clips WHERE id = ?"
+    SQL_CLEAR = "DELETE FROM clips WHERE pinned = 0"
+    # 大内容在 clip_blobs 里：codec / data 非空时解压 data，否则直接用 content
+    SQL_CONTENT = """
+        SELECT content, codec, data FROM clips
+        LEFT JOIN clip_blobs ON in_blob AND hash = content_hash WHERE id = ?
+    """
+    SQL_EXPORT = """
+        SELECT content_hash, created_ms, pinned, content, codec, data FROM clips
+        LEFT JOIN clip_blobs ON in_blob AND hash = content_hash ORDER BY id
+    """
+    SQL_ROW = f"SELECT {LIST_COLUMNS} FROM clips WHERE id = ?"
+    SQL_HOT_PINNED = f"""
+        SELECT {LIST_COLUMNS} FROM clips WHERE pinned != 0
+        ORDER BY pinned DESC, created_ms DESC, id DESC
+    """
+    SQL_HOT_RECENT = f"""
+        SELECT {LIST_COLUMNS} FROM clips WHERE pinned = 0
+        ORDER BY created_ms DESC, id DESC LIMIT ?
+    """
+    # 迁移：按 id 分块回填；1.6.0 的 created_at 是本地时间文本，'utc' 修饰符换算成 UTC
+    SQL_MIGRATE_IDS = "SELECT id FROM clips WHERE id > ? ORDER BY id LIMIT ?"
+    # 文本库里 CAST(content AS BLOB) 就是 UTF-8 编码；移进 blob 表的内容要解压后才能计算
+    SQL_BACKFILL_SIZE = """
+        UPDATE clips SET size_bytes = length(CAST(content AS BLOB))
+        WHERE id BETWEEN ? AND ? AND in_blob = 0 AND size_bytes IS NULL
+    """
+    SQL_BACKFILL_BLOB_SIZE = """
+        SELECT id, content, codec, data FROM clips LEFT JOIN clip_blobs ON hash = content_hash
+        WHERE id BETWEEN ? AND ? AND in_blob AND size_bytes IS NULL
+    """
+    SQL_SET_SIZE = "UPDATE clips SET size_bytes = ? WHERE id = ?"
+    SQL_BACKFILL_CREATED = """
+        UPDATE clips SET created_ms = COALESCE(
+            CAST(round((julianday(created_at, 'utc') - 2440587.5) * 86400000) AS INTEGER), 0)
+        WHERE id BETWEEN ? AND ? AND created_ms IS NULL
+    """
+    SQL_BACKFILL_METADATA = "SELECT id, content FROM clips WHERE id BETWEEN ? AND ? AND preview IS NULL"
+    SQL_LARGE_INLINE = """
+        SELECT id, content, content_hash FROM clips
+        WHERE in_blob = 0 AND length > ? AND id > ? ORDER BY id LIMIT ?
+    """
+    SQL_FILL_FTS = """
+        INSERT INTO clips_fts(rowid, content) SELECT id, content || char(10) FROM clips
+        WHERE id BETWEEN ? AND ? AND in_blob = 0
+    """
+    SQL_FILL_BLOB_FTS = """
+        SELECT id, content, codec, data FROM clips
+        LEFT JOIN clip_blobs ON hash = content_hash WHERE id BETWEEN ? AND ? AND in_blob
+    """
+    SQL_PUT_BLOB_FTS = "INSERT INTO clips_blob_fts(rowid, content) VALUES (?, ?)"
+    SQL_BACKFILL_CHANGES = """
+        INSERT INTO changes (rev, op, content_hash, created_ms, pinned, changed_ms, origin)
+        SELECT rev, 'insert', content_hash, created_ms, pinned, created_ms, ? FROM clips c
+        WHERE id BETWEEN ? AND ? AND NOT EXISTS (SELECT 1 FROM changes WHERE content_hash = c.content_hash)
+    """
+    # PRAGMA user_version 记录库结构的版本，MIGRATIONS[i] 把库从版本 i 升级到 i + 1
+    MIGRATIONS = ("_migrate_v1", "_migrate_v2", "_migrate_v3", "_migrate_v4", "_migrate_v5")
+    SQL_CLIP = f"""
+        SELECT {LIST_COLUMNS}, content, codec, data FROM clips
+        LEFT JOIN clip_blobs ON in_blob AND hash = content_hash WHERE id = ?
+    """
+
+    # 变更日志：插入、更新时间、收藏、删除、清空各追加一条，记下变更之后这条内容的状态和版本 (changed_ms, origin)。
+    # 每条内容有两个各自「最后写入者获胜」的寄存器：时间（created_ms 和是否存在）和收藏状态；
+    # 插入两者都写，收藏只写收藏状态，其余只写时间。清空只删除未收藏的，被任何一方收藏的内容不会因此消失
+    TIME_OPS = ("insert", "touch", "delete", "clear")
+    PIN_OPS = ("insert", "pin")
+    DELETE_OPS = ("delete", "clear")
+    SQL_LOG_CLIP = """
+        INSERT INTO changes (rev, op, content_hash, created_ms, pinned, changed_ms, origin)
+        SELECT ?, ?, content_hash, created_ms, pinned, ?, ? FROM clips WHERE id = ?
+    """
+    SQL_LOG_CLEAR = """
+        INSERT INTO changes (rev, op, content_hash, created_ms, pinned, changed_ms, origin)
+        SELECT ?, 'clear', content_hash, created_ms, pinned, ?, ? FROM clips WHERE pinned = 0
+    """
+    SQL_LOG_IMPORT = """
+        INSERT INTO changes (rev, op, content_hash, created_ms, pinned, changed_ms, origin)
+        SELECT rev, 'insert', content_hash, created_ms, pinned, ?, ? FROM clips WHERE id >= ?
+    """
+    SQL_LOG_MERGED = """
+        INSERT INTO changes (rev, op, content_hash, created_ms, pinned, changed_ms, origin)
+        VALUES (?, ?, ?, ?, ?, ?, ?)
+    """
+    SQL_TIME_VERSION = """
+        SELECT changed_ms, origin, op, created_ms FROM changes
+        WHERE content_hash = ? AND op != 'pin' ORDER BY changed_ms DESC, origin DESC LIMIT 1
+    """
+    SQL_PIN_VERSION = """
+        SELECT changed_ms, origin, pinned FROM changes
+        WHERE content_hash = ? AND op IN ('insert', 'pin') ORDER BY changed_ms DESC, origin DESC LIMIT 1
+    """
+    SQL_MERGE_UPDATE = """
+        UPDATE clips SET created_at = datetime(?, 'unixepoch', 'localtime'), created_ms = ?, pinned = ?, rev = ?
+        WHERE id = ?
+    """
+    # 删除的条目不带内容；清空的条目在内容被收藏、因而还在时带上它；内容已经不在本地时 content 为 NULL
+    SQL_CHANGE_LOG = """
+        SELECT ch.seq, ch.op, ch.content_hash, ch.created_ms, ch.pinned, ch.changed_ms, ch.origin,
+               c.content, b.codec, b.data
+        FROM changes ch
+        LEFT JOIN clips c ON ch.op != 'delete' AND c.content_hash = ch.content_hash
+        LEFT JOIN clip_blobs b ON c.in_blob AND b.hash = ch.content_hash
+        WHERE ch.seq > ? AND ch.origin != ? ORDER BY ch.seq LIMIT ?
+    """
+    SQL_LAST_SEQ = "SELECT COALESCE(MAX(seq), 0) FROM changes"
+    # 写的每个寄存器都已有同一内容的更新版本时，这个条目不再决定任何状态，可以删掉
+    SQL_PRUNE_CHANGES = """
+        DELETE FROM changes WHERE seq IN (
+            SELECT seq FROM changes old
+            WHERE (old.op = 'pin' OR EXISTS (
+                SELECT 1 FROM changes new WHERE new.content_hash = old.content_hash AND new.op != 'pin'
+                AND (new.changed_ms, new.origin) > (old.changed_ms, old.origin)))
+            AND (old.op NOT IN ('insert', 'pin') OR EXISTS (
+                SELECT 1 FROM changes new WHERE new.content_hash = old.content_hash AND new.op IN ('insert', 'pin')
+                AND (new.changed_ms, new.origin) > (old.changed_ms, old.origin)))
+            LIMIT ?
+        )
+    """
+    # 内容已经不在本地、版本早于同步期限的条目：淘汰不写日志，否则每条采集过的内容都会永远留下一条
+    SQL_PRUNE_GONE = """
+        DELETE FROM changes WHERE seq IN (
+            SELECT seq FROM changes ch WHERE ch.changed_ms < ?
+            AND NOT EXISTS (SELECT 1 FROM clips c WHERE c.content_hash = ch.content_hash)
+            LIMIT ?
+        )
+    """
+
+    # 全文索引，trigram 分词可以匹配中文子串。内联的内容用外部内容表 + 触发器同步；
+    # blob 层的内容在 clips 里只有开头 BLOB_INLINE_CHARS 个字符，全文另存一份在 clips_blob_fts，
+    # 保存时由代码写入，删除时由触发器清除。两张表的 rowid 都是 clips.id。
+    # 索引的文本末尾多一个换行：两个字符的词每出现一次，都是某个 trigram 的开头，
+    # 从 *_terms 词表查出这些 trigram 就能走索引（见 _match()）
+    SQL_FTS_TABLES = (
+        "CREATE VIEW IF NOT EXISTS clips_inline AS "
+        "SELECT id, content || char(10) AS content FROM clips WHERE in_blob = 0",
+        "CREATE VIRTUAL TABLE clips_fts USING fts5("
+        "content, content='clips_inline', content_rowid='id', tokenize='{tokenizer}')",
+        "CREATE VIRTUAL TABLE clips_blob_fts USING fts5(content, tokenize='{tokenizer}')",
+        "CREATE VIRTUAL TABLE clips_fts_terms USING fts5vocab(clips_fts, row)",
+        "CREATE VIRTUAL TABLE clips_blob_fts_terms USING fts5vocab(clips_blob_fts, row)",
+    )
+    SQL_FTS_TRIGGERS = (
+        """CREATE TRIGGER IF NOT EXISTS clips_fts_ai AFTER INSERT ON clips WHEN new.in_blob = 0 BEGIN
+            INSERT INTO clips_fts(rowid, content) VALUES (new.id, new.content || char(10));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clips_fts_ad AFTER DELETE ON clips WHEN old.in_blob = 0 BEGIN
+            INSERT INTO clips_fts(clips_fts, rowid, content) VALUES ('delete', old.id, old.content || char(10));
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clips_fts_au AFTER UPDATE OF content, in_blob ON clips BEGIN
+            INSERT INTO clips_fts(clips_fts, rowid, content)
+            SELECT 'delete', old.id, old.content || char(10) WHERE old.in_blob = 0;
+            INSERT INTO clips_fts(rowid, content) SELECT new.id, new.content || char(10) WHERE new.in_blob = 0;
+        END""",
+        """CREATE TRIGGER IF NOT EXISTS clips_blob_fts_ad AFTER DELETE ON clips WHEN old.in_blob BEGIN
+            DELETE FROM clips_blob_fts WHERE rowid = old.id;
+        END""",
+    )
+    # 先按时间取最近的候选，再在候选内打分排序；bm25() 需要统计整个倒排表的文档频率，
+    # 常见词会扫完全部命中行，所以这里不用它。最近的 SEARCH_CANDIDATES 条命中打分排序，
+    # 之后的命中接着按 rowid 倒序：每一页都从同一个全序里切片，OFFSET 翻页不会重复或漏掉
+    # 两张表各自按 rowid 倒序给出命中，UNION ALL 归并后仍是一个全序
+    SQL_SEARCH = "{arms} ORDER BY 1 DESC LIMIT ? OFFSET ?"
+    SQL_SEARCH_ARM = """
+        SELECT f.rowid, c.created_ms, c.pinned, substr(c.content, 1, 4000), c.length
+        FROM {table} f JOIN clips c ON c.id = f.rowid
+        WHERE {table} MATCH ?{where}
+    """
+    # (全文索引表, 单字过滤看的列)：blob 层用索引里存的全文，而不是 clips 里内联的开头
+    FTS_TABLES = (("clips_fts", "c.content"), ("clips_blob_fts", "f.content"))
+    # 以某两个字符开头的 trigram；词表里的词已经转成小写
+    SQL_GRAMS = "SELECT term FROM {table}_terms WHERE term >= ? AND term < ?"
+    # rowid IN (...) 会让 FTS5 先展开全部命中；用区间约束，只对当前页的行计算摘要
+    SQL_SNIPPETS = """
+        SELECT rowid, CASE WHEN rowid IN ({ids}) THEN snippet({table}, 0, ?, ?, '…', 24) END
+        FROM {table} WHERE {table} MATCH ? AND rowid BETWEEN ? AND ?
+    """
+    SQL_SEARCH_LIKE = """
+        SELECT id, {text}, created_ms, pinned FROM clips
+        WHERE (created_ms, id) >= (?, ?) AND {where}
+        ORDER BY created_ms DESC, id DESC LIMIT ? OFFSET ?
+    """
+    # blob 层的内容在 clips_blob_fts 里有全文（末尾多一个换行），逐行 LIKE 时看它而不是内联的开头
+    SQL_LIKE_TEXT = """CASE WHEN in_blob
+        THEN (SELECT substr(content, 1, length(content) - 1) FROM clips_blob_fts WHERE rowid = id)
+        ELSE content END"""
+    # 最近第 SEARCH_SCAN_ROWS 条记录的 (created_ms, id)，LIKE 扫描到这里为止；有第二行说明更早的记录没有检查
+    SQL_SCAN_FLOOR = "SELECT created_ms, id FROM clips ORDER BY created_ms DESC, id DESC LIMIT 2 OFFSET ?"
+    SEARCH_CANDIDATES = 100
+    # 全是单个字符的词（trigram 用不上，也没有以它开头的 trigram 可以展开）时只能逐行 LIKE，
+    # 最多检查最近的这么多条记录，罕见的字也不会扫完整个库；这时 search() 报告结果不完整。
+    # 和更长的词混合时单字只过滤全文索引的命中，不受此限
+    SEARCH_SCAN_ROWS = 3000
+    # _grams() 缓存的条数上限
+    GRAM_CACHE_SIZE = 1024
+    # 高亮标记使用控制字符，由界面层决定如何渲染
+    MARK_OPEN = "\x02"
+    MARK_CLOSE = "\x03"
+
+    def __init__(self, db_path=DB_PATH, blob_threshold=BLOB_THRESHOLD, metrics=None, readonly=False):
+        """readonly=True 时只读打开已有的库：不建表、不迁移，任何写入都会失败"""
+        self.db_path = str(db_path)
+        self.readonly = readonly
+        self.blob_threshold = blob_threshold
+        self.metrics = metrics or Metrics.shared()
+        self.save_seconds = self.metrics.histogram(
+            "clipflow_save_seconds", "save_clip / save_clips 的耗时（含计算元数据、压缩和提交）")
+        self.saved_clips = self.metrics.counter("clipflow_saved_clips_total", "写入的剪贴板记录条数")
+        if not readonly:
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._write_lock = threading.Lock()
+        self._readers = queue.LifoQueue(maxsize=self.MAX_READERS)
+        self._writer = self._connect(readonly)
+        if not readonly:
+            # 新库启用增量 VACUUM（必须在建表之前设置），旧库由 MaintenanceWorker 空闲时转换
+            self._writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._writer.execute("PRAGMA journal_mode=WAL")
+            # 检查点之后把 WAL 文件截断到 4 MiB 以内
+            self._writer.execute("PRAGMA journal_size_limit=4194304")
+        self._deleted = deque(maxlen=self.MAX_TOMBSTONES)
+        self._pending_deleted = []
+        self._pending_events = []
+        # 菜单、窗口和 Web 接口共用的热缓存，写事务提交后按 _pending_hot 同步
+        self.hot = HotCache()
+        self._pending_hot = []
+        self.revision = 0
+        # revision 在写事务里就已加一；committed_revision 之前的修改都已提交、删除记录也已登记，
+        # 返回给客户端作为下一次增量起点的修订号取它
+        self.committed_revision = 0
+        # (全文索引表, 两个字符的词) -> (修订号, 以它开头的 trigram)
+        self._gram_cache = {}
+        # 提交成功后把变更推送给订阅者（SSE 等）
+        self.events = EventBus()
+        # 迁移完成之前表结构不全，写事务回滚时不重新加载计数
+        self.schema_version = None
+        if readonly:
+            self._check_schema()
+        else:
+            self._init_schema()
+        # 这个库的实例标识，写进自己产生的每条变更，同步时用来区分来源
+        self.origin = self._writer.execute(self.SQL_GET_META, ("origin",)).fetchone()[0]
+        # 见过的最大版本时间，本实例的版本总是比它大（对方时钟走得快时也是）
+        row = self._writer.execute(self.SQL_GET_META, ("clock",)).fetchone()
+        self._clock = row[0] if row else 0
+        self._load_state()
+        # 早于这个版本的增量请求无法从内存里的删除记录还原，需要客户端整页重载
+        self._tombstone_floor = self.revision
+
+    @classmethod
+    def shared(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def _connect(self, readonly=False):
+        # isolation_level=None：事务由 _write() 显式控制；只读的库用 mode=ro 打开，不存在时不会被创建
+        target = Path(self.db_path).resolve().as_uri() + "?mode=ro" if self.readonly else self.db_path
+        conn = sqlite3.connect(
+            target, timeout=5, isolation_level=None,
+            check_same_thread=False, cached_statements=128, uri=self.readonly
+        )
+        for pragma in self.PRAGMAS:
+            conn.execute(pragma)
+        if readonly:
+            conn.execute("PRAGMA query_only=ON")
+        return conn
+
+    def _init_schema(self):
+        with self._write() as conn:
+            # 1.6.0 的表结构；之后的所有变化都由迁移完成，新库和旧库走同一条路径
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clips (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    content TEXT NOT NULL,
+                    content_hash TEXT UNIQUE NOT NULL,
+                    content_type TEXT DEFAULT 'text',
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    pinned INTEGER DEFAULT 0
+                )
+            """)
+        self._migrate()
+        with self._write() as conn:
+            self.fts_tokenizer = self._init_fts(conn)
+        self._fill_fts()
+        # 索引补建完之后再移动：触发器从 clips_fts 删除的条目必须已经在索引里
+        self._move_large_to_blobs()
+
+    def _check_schema(self):
+        """只读打开时不能迁移：库必须已经由当前版本的 ClipFlow 升级过"""
+        self.schema_version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+        if self.schema_version < len(self.MIGRATIONS):
+            raise sqlite3.DatabaseError(
+                f"schema version {self.schema_version} is older than {len(self.MIGRATIONS)}; start ClipFlow once to upgrade")
+        self.fts_tokenizer = self._fts_tokenizer(self._writer)
+
+    def _migrate(self, chunk=MIGRATION_CHUNK):
+        """按 PRAGMA user_version 依次执行尚未执行的迁移
+
+        迁移的每一步都可以重复执行：中途退出后，下次启动从头重跑当前版本的迁移即可。
+        """
+        version = self._writer.execute("PRAGMA user_version").fetchone()[0]
+        for target in range(version + 1, len(self.MIGRATIONS) + 1):
+            getattr(self, self.MIGRATIONS[target - 1])(chunk)
+            with self._write() as conn:
+                conn.execute(f"PRAGMA user_version = {target}")
+        self.schema_version = max(version, len(self.MIGRATIONS))
+
+    def _migrate_v1(self, chunk):
+        """1.6.0 -> 1：补齐新功能需要的列和表，created_at 文本换成带索引的整数毫秒 created_ms"""
+        with self._write() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS meta (
+                    key TEXT PRIMARY KEY,
+                    value
+                )
+            """)
+            for name, ddl in (("rev", "INTEGER NOT NULL DEFAULT 0"), ("preview", "TEXT"),
+                              ("length", "INTEGER"), ("line_count", "INTEGER"),
+                              ("in_blob", "INTEGER NOT NULL DEFAULT 0"), ("created_ms", "INTEGER")):
+                self._ensure_column(conn, name, ddl)
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS clip_blobs (
+                    hash TEXT PRIMARY KEY,
+                    codec TEXT NOT NULL,
+                    size INTEGER NOT NULL,
+                    data BLOB NOT NULL
+                )
+            """)
+            # 记录被删除（淘汰、清空）时一并回收压缩内容
+            conn.execute("""
+                CREATE TRIGGER IF NOT EXISTS clips_blob_ad AFTER DELETE ON clips WHEN old.in_blob BEGIN
+                    DELETE FROM clip_blobs WHERE hash = old.content_hash;
+                END
+            """)
+        # 回填时间戳和元数据：按 id 分块，每块一个短事务，大库也不会长时间持有写锁
+        last = 0
+        while True:
+            with self._write() as conn:
+                ids = [row[0] for row in conn.execute(self.SQL_MIGRATE_IDS, (last, chunk))]
+                if not ids:
+                    break
+                first, last = ids[0], ids[-1]
+                conn.execute(self.SQL_BACKFILL_CREATED, (first, last))
+                old = conn.execute(self.SQL_BACKFILL_METADATA, (first, last)).fetchall()
+                conn.executemany(self.SQL_SET_METADATA,
+                                 [(*clip_metadata(content), clip_id) for clip_id, content in old])
+        with self._write() as conn:
+            for index in ("idx_clips_type", "idx_clips_pinned_created", "idx_clips_created"):
+                conn.execute(f"DROP INDEX IF EXISTS {index}")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_type_created_ms ON clips(content_type, pinned, created_ms)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_pinned_created_ms ON clips(pinned, created_ms)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_created_ms ON clips(created_ms)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_clips_rev ON clips(rev)")
+
+    def _migrate_v2(self, chunk):
+        """1 -> 2：变更日志和实例标识；已有的记录各补一条 insert，版本取它的 created_ms"""
+        with self._write() as conn:
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS changes (
+                    seq INTEGER PRIMARY KEY AUTOINCREMENT,
+                    rev INTEGER NOT NULL,
+                    op TEXT NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    created_ms INTEGER,
+                    pinned INTEGER,
+                    changed_ms INTEGER NOT NULL,
+                    origin TEXT NOT NULL
+                )
+            """)
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_changes_hash ON changes(content_hash, seq)")
+            row = conn.execute(self.SQL_GET_META, ("origin",)).fetchone()
+            origin = row[0] if row else os.urandom(8).hex()
+            conn.execute(self.SQL_SET_META, ("origin", origin))
+        last = 0
+        while True:
+            with self._write() as conn:
+                ids = [row[0] for row in conn.execute(self.SQL_MIGRATE_IDS, (last, chunk))]
+                if not ids:
+                    break
+                conn.execute(self.SQL_BACKFILL_CHANGES, (origin, ids[0], ids[-1]))
+                last = ids[-1]
+
+    def _migrate_v3(self, chunk):
+        """2 -> 3：按 UTF-8 字节数记录内容大小，容量上限按它计算（length 是字符数，中文要差约 3 倍）"""
+        with self._write() as conn:
+            self._ensure_column(conn, "size_bytes", "INTEGER")
+        last = 0
+        while True:
+            with self._write() as conn:
+                ids = [row[0] for row in conn.execute(self.SQL_MIGRATE_IDS, (last, chunk))]
+                if not ids:
+                    break
+                first, last = ids[0], ids[-1]
+                conn.execute(self.SQL_BACKFILL_SIZE, (first, last))
+                blobs = conn.execute(self.SQL_BACKFILL_BLOB_SIZE, (first, last)).fetchall()
+                conn.executemany(self.SQL_SET_SIZE, [
+                    (len(inflate_content(content, codec, data).encode()), clip_id)
+                    for clip_id, content, codec, data in blobs
+                ])
+
+    def _migrate_v4(self, chunk):
+        """3 -> 4：blob 层的内容按全文建索引；旧索引只覆盖了内联的开头，删掉后由 _init_fts() 重建"""
+        with self._write() as conn:
+            for trigger in ("clips_fts_ai", "clips_fts_ad", "clips_fts_au"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            conn.execute("DROP TABLE IF EXISTS clips_fts")
+            conn.execute("DELETE FROM meta WHERE key = 'fts_backfill'")
+
+    def _migrate_v5(self, chunk):
+        """4 -> 5：索引的文本末尾加一个换行，两个字符的词也能走全文索引；删掉旧索引后由 _init_fts() 重建"""
+        with self._write() as conn:
+            for trigger in ("clips_fts_ai", "clips_fts_ad", "clips_fts_au", "clips_blob_fts_ad"):
+                conn.execute(f"DROP TRIGGER IF EXISTS {trigger}")
+            for table in ("clips_fts_terms", "clips_blob_fts_terms", "clips_fts", "clips_blob_fts"):
+                conn.execute(f"DROP TABLE IF EXISTS {table}")
+            conn.execute("DROP VIEW IF EXISTS clips_inline")
+            conn.execute("DELETE FROM meta WHERE key = 'fts_backfill'")
+
+    def _move_large_to_blobs(self, chunk=64):
+        """把超过 blob_threshold 的内联内容移进 blob 表（阈值可配置，每次启动检查），每块一个事务"""
+        last = 0
+        while True:
+            with self._write() as conn:
+                large = conn.execute(self.SQL_LARGE_INLINE, (self.blob_threshold, last, chunk)).fetchall()
+                for clip_id, content, content_hash in large:
+                    codec, data = pack_blob(content)
+                    conn.execute(self.SQL_MOVE_TO_BLOB, (content[:BLOB_INLINE_CHARS], clip_id))
+                    self._put_blob(conn, clip_id, content_hash, (codec, len(content), data, content))
+            if len(large) < chunk:
+                break
+            last = large[-1][0]
+
+    def _ensure_column(self, conn, name, ddl):
+        """给旧版本（1.6.0）创建的库补列"""
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(clips)")}
+        if name not in columns:
+            conn.execute(f"ALTER TABLE clips ADD COLUMN {name} {ddl}")
+
+    def _init_fts(self, conn):
+        """创建全文索引，返回使用的分词器；SQLite 不支持 FTS5 时返回 None"""
+        existing = self._fts_tokenizer(conn)
+        if existing:
+            return existing
+        for tokenizer in ("trigram", "unicode61"):
+            try:
+                conn.execute("SAVEPOINT fts")
+                for sql in self.SQL_FTS_TABLES:
+                    conn.execute(sql.format(tokenizer=tokenizer))
+                for sql in self.SQL_FTS_TRIGGERS:
+                    conn.execute(sql)
+                # 之后的写入由触发器同步；已有的历史由 _fill_fts() 分块补建，进度记在 meta 里
+                upto = conn.execute("SELECT COALESCE(MAX(id), 0) FROM clips").fetchone()[0]
+                conn.execute(self.SQL_SET_META, ("fts_backfill", json.dumps([0, upto])))
+                conn.execute("RELEASE fts")
+                return tokenizer
+            except sqlite3.OperationalError:
+                conn.execute("ROLLBACK TO fts")
+                conn.execute("RELEASE fts")
+        return None
+
+    def _fts_tokenizer(self, conn):
+        """已有全文索引使用的分词器，没有索引（或只有 4 版之前的索引）时返回 None"""
+        tables = dict(conn.execute(
+            "SELECT name, sql FROM sqlite_master WHERE type = 'table' AND name IN ('clips_fts', 'clips_blob_fts')"
+        ))
+        if len(tables) == 2:
+            return "trigram" if "trigram" in tables["clips_fts"] else "unicode61"
+        return None
+
+    def _fill_fts(self, chunk=MIGRATION_CHUNK):
+        """为建索引之前已有的历史分块建立全文索引；中途退出后下次启动继续"""
+        row = self._writer.execute(self.SQL_GET_META, ("fts_backfill",)).fetchone()
+        if row is None:
+            return
+        last, upto = json.loads(row[0])
+        while True:
+            with self._write() as conn:
+                ids = [r[0] for r in conn.execute(self.SQL_MIGRATE_IDS, (last, chunk)) if r[0] <= upto]
+                if not ids:
+                    conn.execute("DELETE FROM meta WHERE key = 'fts_backfill'")
+                    break
+                conn.execute(self.SQL_FILL_FTS, (ids[0], ids[-1]))
+                conn.executemany(self.SQL_PUT_BLOB_FTS, [
+                    (clip_id, inflate_content(content, codec, data) + "\n")
+                    for clip_id, content, codec, data in conn.execute(self.SQL_FILL_BLOB_FTS, (ids[0], ids[-1]))
+                ])
+                last = ids[-1]
+                conn.execute(self.SQL_SET_META, ("fts_backfill", json.dumps([last, upto])))
+
+    def _load_state(self):
+        # 维护中的行数，避免每次写入都 COUNT(*) 全表
+        total, pinned, unpinned_bytes = self._writer.execute(self.SQL_COUNTS).fetchone()
+        self._pinned_count = pinned
+        self._unpinned_count = total - pinned
+        # 未收藏记录的总大小（UTF-8 字节数），供按容量淘汰使用
+        self._unpinned_bytes = unpinned_bytes
+        row = self._writer.execute(self.SQL_GET_META, ("revision",)).fetchone()
+        self.revision = self.committed_revision = row[0] if row else 0
+        self.hot.invalidate()
+
+    def _bump(self, conn):
+        """分配下一个修订号，和数据修改在同一个事务里持久化"""
+        self.revision += 1
+        conn.execute(self.SQL_SET_META, ("revision", self.revision))
+        return self.revision
+
+    @contextmanager
+    def _write(self):
+        """串行化的写事务，所有线程共用同一个写连接"""
+        with self._write_lock:
+            self._writer.execute("BEGIN IMMEDIATE")
+            start_rev = self.revision
+            try:
+                yield self._writer
+            except BaseException:
+                self._writer.execute("ROLLBACK")
+                self._pending_deleted.clear()
+                self._pending_events.clear()
+                self._pending_hot.clear()
+                if self.schema_version is not None:
+                    self._load_state()
+                raise
+            self._writer.execute("COMMIT")
+            if self._pending_hot or self.revision != start_rev:
+                self.hot.apply(start_rev, self.revision, self._pending_hot,
+                               self._pinned_count, self._unpinned_count)
+                self._pending_hot.clear()
+            for tombstone in self._pending_deleted:
+                if len(self._deleted) == self._deleted.maxlen:
+                    self._tombstone_floor = max(self._tombstone_floor, self._deleted[0][0])
+                self._deleted.append(tombstone)
+            self._pending_deleted.clear()
+            self.committed_revision = self.revision
+            for event in self._pending_events:
+                event["rev"] = self.revision
+                event["total"] = self.count()
+                self.events.publish(event)
+            self._pending_events.clear()
+
+    def _emit_upsert(self, conn, clip_id):
+        row = conn.execute(self.SQL_ROW, (clip_id,)).fetchone()
+        if row:
+            self._pending_events.append({"type": "upsert", "clip": clip_to_json(row)})
+            self._pending_hot.append(("upsert", row))
+
+    def _emit_delete(self, rev, ids):
+        self._pending_deleted.extend((rev, i) for i in ids)
+        self._pending_events.append({"type": "delete", "ids": ids})
+        self._pending_hot.append(("delete", ids))
+
+    def _hot_rows(self, limit, offset=0, after=None):
+        """从热缓存取 LIST_COLUMNS 行；缓存过期时先从数据库重新加载，覆盖不到请求的范围时返回 None"""
+        if self.hot.revision is None or self.hot.revision != self.revision:
+            revision = self.revision
+            with self._read() as conn:
+                pinned = conn.execute(self.SQL_HOT_PINNED).fetchall()
+                unpinned = conn.execute(self.SQL_HOT_RECENT, (self.hot.size,)).fetchall()
+            self.hot.load(revision, pinned, unpinned)
+        return self.hot.slice(limit, offset, after)
+
+    @contextmanager
+    def _read(self):
+        """从连接池借出一个只读连接，用完归还"""
+        try:
+            conn = self._readers.get_nowait()
+        except queue.Empty:
+            conn = self._connect(readonly=True)
+        try:
+            yield conn
+        finally:
+            try:
+                self._readers.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    def save_clip(self, content, content_hash):
+        self.save_clips([(content, content_hash)])
+
+    def save_clips(self, clips):
+        """在一个事务里保存一批 (content, content_hash)，只 fsync 一次"""
+        start = self.metrics.start()
+        # 计算元数据、压缩大内容都在事务之外完成，不占用写锁
+        prepared = [self._prepare(content, content_hash) for content, content_hash in clips]
+        with self._write() as conn:
+            for item in prepared:
+                self._save(conn, *item)
+        if start:
+            self.save_seconds.since(start)
+            self.saved_clips.inc(len(prepared))
+
+    def _prepare(self, content, content_hash, level=None):
+        """返回 (内联内容, content_hash, 元数据, blob)；小内容的 blob 为 None，level 是 blob 的压缩级别
+
+        元数据是 clip_metadata() 之后再加 UTF-8 字节数，顺序与 SQL_INSERT 的列相同。
+        blob 是 (codec, 字符数, 压缩后的数据, 全文)，全文用来建全文索引。
+        """
+        metadata = (*clip_metadata(content), len(content.encode()))
+        if len(content) <= self.blob_threshold:
+            return content, content_hash, metadata, None
+        codec, data = pack_blob(content, level=level)
+        return content[:BLOB_INLINE_CHARS], content_hash, metadata, (codec, len(content), data, content)
+
+    def _save(self, conn, content, content_hash, metadata, blob):
+        row = conn.execute(self.SQL_FIND_HASH, (content_hash,)).fetchone()
+        rev = self._bump(conn)
+        ms = now_ms()
+        if row:
+            clip_id = row[0]
+            conn.execute(self.SQL_TOUCH, (ms, rev, clip_id))
+        else:
+            clip_id = conn.execute(
+                self.SQL_INSERT, (content, content_hash, *metadata, ms, rev, blob is not None)
+            ).lastrowid
+            if blob is not None:
+                self._put_blob(conn, clip_id, content_hash, blob)
+            self._unpinned_count += 1
+            self._unpinned_bytes += metadata[4]
+        self._log(conn, rev, "touch" if row else "insert", clip_id, ms)
+        self._emit_upsert(conn, clip_id)
+
+    def _put_blob(self, conn, clip_id, content_hash, blob):
+        """写入 _prepare() 给出的 blob，并为全文建索引"""
+        codec, size, data, content = blob
+        conn.execute(self.SQL_PUT_BLOB, (content_hash, codec, size, data))
+        if self.fts_tokenizer:
+            conn.execute(self.SQL_PUT_BLOB_FTS, (clip_id, content + "\n"))
+
+    def _log(self, conn, rev, op, clip_id, changed_ms=None):
+        """把 clip_id 当前的状态作为本实例的一条变更追加到变更日志"""
+        conn.execute(self.SQL_LOG_CLIP, (rev, op, self._tick(conn, changed_ms), self.origin, clip_id))
+
+    def _tick(self, conn, ms=None):
+        """本实例下一条变更的版本时间：严格递增，并且晚于见过的所有版本"""
+        wall = ms or now_ms()
+        self._clock = max(wall, self._clock + 1)
+        if self._clock > wall:
+            conn.execute(self.SQL_SET_META, ("clock", self._clock))
+        return self._clock
+
+    def export_clips(self, chunk=EXPORT_CHUNK):
+        """按 id 顺序逐块产出全部记录 {content, content_hash, created_ms, pinned}
+
+        整个导出读同一个快照，内存里只有当前一块；用单独的连接，不占用读连接池。
+        """
+        conn = self._connect(readonly=True)
+        try:
+            conn.execute("BEGIN")
+            cursor = conn.execute(self.SQL_EXPORT)
+            while True:
+                rows = cursor.fetchmany(chunk)
+                if not rows:
+                    break
+                yield [{
+                    "content": inflate_content(content, codec, data),
+                    "content_hash": content_hash,
+                    "created_ms": created_ms,
+                    "pinned": bool(pinned),
+                } for content_hash, created_ms, pinned, content, codec, data in rows]
+        finally:
+            conn.close()
+
+    def import_clips(self, clips, batch=IMPORT_BATCH):
+        """批量写入 (content, created_ms, pinned)，每 batch 条一个事务
+
+        按 content_hash 去重：库里已有的和同一次导入里重复的都跳过，可以重复导入同一个文件。
+        下一批的哈希、元数据和压缩与上一批的事务并行（sqlite 执行语句时释放 GIL）。
+        返回 (写入条数, 跳过条数)。
+        """
+        from concurrent.futures import ThreadPoolExecutor
+        imported = total = 0
+        pending, writing = [], None
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipflow-import") as executor:
+            for clip in clips:
+                pending.append(clip)
+                if len(pending) >= batch:
+                    prepared = self._prepare_import(pending)
+                    total += len(pending)
+                    imported += writing.result() if writing else 0
+                    writing = executor.submit(self._write_import, prepared)
+                    pending = []
+            prepared = self._prepare_import(pending)
+            total += len(pending)
+            imported += writing.result() if writing else 0
+            imported += self._write_import(prepared)
+        return imported, total - imported
+
+    def _prepare_import(self, clips):
+        # 先按哈希查出库里已有的，只为新内容计算元数据和压缩；空白内容和采集时一样不保存
+        hashed = [(hashlib.md5(content.encode()).hexdigest(), content, created_ms, pinned)
+                  for content, created_ms, pinned in clips if content.strip()]
+        existing = self._existing_hashes(item[0] for item in hashed)
+        return [(*self._prepare(content, content_hash, IMPORT_BLOB_LEVEL), created_ms, pinned)
+                for content_hash, content, created_ms, pinned in hashed if content_hash not in existing]
+
+    def _existing_hashes(self, hashes):
+        """hashes 中库里已有的那些"""
+        hashes = list(hashes)
+        existing = set()
+        with self._read() as conn:
+            for i in range(0, len(hashes), 500):
+                chunk = hashes[i:i + 500]
+                existing.update(row[0] for row in conn.execute(
+                    self.SQL_FIND_HASHES.format(marks=",".join("?" * len(chunk))), chunk))
+        return existing
+
+    def _write_import(self, prepared):
+        if not prepared:
+            return 0
+        added = 0
+        with self._write() as conn:
+            # 整批共用一个修订号，只有真的写入了才分配
+            rev = self.revision + 1
+            first = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM clips").fetchone()[0]
+            # 逐行触发器更新全文索引占了大半时间：事务内先停用，写完后对新行一次性补建
+            if self.fts_tokenizer:
+                conn.execute("DROP TRIGGER clips_fts_ai")
+            for content, content_hash, metadata, blob, created_ms, pinned in prepared:
+                cursor = conn.execute(self.SQL_IMPORT, (
+                    content, content_hash, *metadata, created_ms / 1000, created_ms,
+                    1 if pinned else 0, rev, blob is not None,
+                ))
+                if not cursor.rowcount:
+                    continue
+                if blob is not None:
+                    self._put_blob(conn, cursor.lastrowid, content_hash, blob)
+                added += 1
+                if pinned:
+                    self._pinned_count += 1
+                else:
+                    self._unpinned_count += 1
+                    self._unpinned_bytes += metadata[4]
+            if self.fts_tokenizer:
+                # AUTOINCREMENT 的新 id 都大于写入前的最大 id
+                conn.execute(self.SQL_FILL_FTS, (first, 1 << 62))
+                conn.execute(self.SQL_FTS_TRIGGERS[0])
+            if added:
+                self._bump(conn)
+                conn.execute(self.SQL_LOG_IMPORT, (self._tick(conn), self.origin, first))
+                # 导入的行散布在整个时间线上，不逐条推送，让页面和热缓存整页重载
+                self._pending_events.append({"type": "reset"})
+                self._pending_hot.append(("reset", None))
+        return added
+
+    def enforce_retention(self, policy, chunk=RETENTION_CHUNK):
+        """在一个短事务里按策略删除最多 chunk 条未收藏记录，返回删除的条数
+
+        返回值小于 chunk 说明已经满足策略；调用方在两次调用之间让出写锁。
+        """
+        deleted = 0
+        rev = None
+        with self._write() as conn:
+            for select in (self._expired_rows, self._over_type_rows,
+                           self._over_count_rows, self._over_bytes_rows):
+                if deleted >= chunk:
+                    break
+                rows = select(conn, policy, chunk - deleted)
+                if rows:
+                    rev = rev or self._bump(conn)
+                    self._delete_unpinned(conn, rev, rows)
+                    deleted += len(rows)
+        return deleted
+
+    def _delete_unpinned(self, conn, rev, rows):
+        # 保留策略是每个实例自己的设置，淘汰不写变更日志，也就不会传到其他实例
+        ids = [clip_id for clip_id, _ in rows]
+        conn.executemany(self.SQL_DELETE, [(i,) for i in ids])
+        self._emit_delete(rev, ids)
+        self._unpinned_count -= len(ids)
+        self._unpinned_bytes -= sum(size or 0 for _, size in rows)
+
+    def _expired_rows(self, conn, policy, limit):
+        if policy.max_age_days is None:
+            return []
+        cutoff = now_ms() - int(policy.max_age_days * 86400 * 1000)
+        return conn.execute(self.SQL_EXPIRED, (cutoff, limit)).fetchall()
+
+    def _over_type_rows(self, conn, policy, limit):
+        rows = []
+        for content_type, max_rows in policy.per_type.items():
+            overflow = conn.execute(self.SQL_COUNT_TYPE, (content_type,)).fetchone()[0] - max_rows
+            if overflow > 0 and len(rows) < limit:
+                rows += conn.execute(
+                    self.SQL_EVICT_TYPE, (content_type, min(overflow, limit - len(rows)))
+                ).fetchall()
+        return rows
+
+    def _over_count_rows(self, conn, policy, limit):
+        if policy.max_rows is None:
+            return []
+        overflow = self._unpinned_count - policy.max_rows
+        if overflow <= 0:
+            return []
+        return conn.execute(self.SQL_EVICT, (min(overflow, limit),)).fetchall()
+
+    def _over_bytes_rows(self, conn, policy, limit):
+        if policy.max_bytes is None:
+            return []
+        excess = self._unpinned_bytes - policy.max_bytes
+        rows = []
+        if excess > 0:
+            for clip_id, size in conn.execute(self.SQL_EVICT, (limit,)):
+                rows.append((clip_id, size))
+                excess -= size or 0
+                if excess <= 0:
+                    break
+        return rows
+
+    def recent_clips(self, limit=8):
+        rows = self._hot_rows(limit)
+        if rows is not None:
+            return [(row[0], row[1], row[5], row[6]) for row in rows]
+        with self._read() as conn:
+            return conn.execute(self.SQL_RECENT, (limit,)).fetchall()
+
+    def count(self):
+        return self._pinned_count + self._unpinned_count
+
+    def page(self, cursor=None, limit=50):
+        """键集分页，返回 (rows, next_cursor, rev)；rows 的列见 LIST_COLUMNS
+
+        rev 在读取之前取得：rows 至少包含到 rev 为止的全部修改，客户端之后从 rev 起请求增量不会漏掉变更。
+        """
+        revision = self.committed_revision
+        after = None if cursor is None else decode_cursor(cursor)
+        rows = self._hot_rows(limit, after=after)
+        if rows is None:
+            with self._read() as conn:
+                if after is None:
+                    rows = conn.execute(self.SQL_PAGE_FIRST, (limit,)).fetchall()
+                else:
+                    rows = conn.execute(self.SQL_PAGE_AFTER, (*after, limit)).fetchall()
+        next_cursor = None
+        if len(rows) == limit:
+            clip_id, created_ms, pinned = rows[-1][0], rows[-1][5], rows[-1][6]
+            next_cursor = encode_cursor(pinned, created_ms, clip_id)
+        return rows, next_cursor, revision
+
+    def preview_rows(self, limit, offset=0, after=None):
+        """列表用的轻量行 (id, preview, created_ms, pinned)，不读全文
+
+        after 为上一页最后一行的 (pinned, created_ms, id)，给出时走键集分页，否则用 OFFSET。
+        """
+        rows = self._hot_rows(limit, offset, after)
+        if rows is not None:
+            return [(row[0], row[1], row[5], row[6]) for row in rows]
+        with self._read() as conn:
+            if after is not None:
+                return conn.execute(self.SQL_PREVIEW_AFTER, (*after, limit)).fetchall()
+            return conn.execute(self.SQL_PREVIEW_OFFSET, (limit, offset)).fetchall()
+
+    def changes_since(self, since, limit=500):
+        """返回修订号大于 since 的增量：changed 行、deleted id、是否需要整页重载，以及这些增量截止的 rev
+
+        deleted 只包含 rev 之前已登记的删除，changed 可能多出 rev 之后提交的行；下一次从 rev 起请求。
+        """
+        revision = self.committed_revision
+        if since < self._tombstone_floor or since > revision:
+            return {"reset": True, "changed": [], "deleted": [], "rev": revision}
+        deleted = [clip_id for rev, clip_id in list(self._deleted) if since < rev <= revision]
+        with self._read() as conn:
+            changed = conn.execute(self.SQL_CHANGED, (since, limit + 1)).fetchall()
+        if len(changed) > limit:
+            return {"reset": True, "changed": [], "deleted": [], "rev": revision}
+        return {"reset": False, "changed": changed, "deleted": deleted, "rev": revision}
+
+    def get_content(self, clip_id):
+        """完整内容；存在 blob 表里的在这里解压"""
+        with self._read() as conn:
+            row = conn.execute(self.SQL_CONTENT, (clip_id,)).fetchone()
+        return inflate_content(*row) if row else None
+
+    def get_clip(self, clip_id):
+        """单条记录：LIST_COLUMNS 之后再加全文"""
+        with self._read() as conn:
+            row = conn.execute(self.SQL_CLIP, (clip_id,)).fetchone()
+        return (*row[:-3], inflate_content(*row[-3:])) if row else None
+
+    def search(self, query, limit=20, offset=0):
+        """全文搜索，返回 (结果, scanned)
+
+        结果是 [(id, snippet, created_ms, pinned)]，snippet 中的命中词用 MARK_OPEN/MARK_CLOSE 包围。
+        trigram 下两个字符的词展开成以它开头的 trigram，和更长的词一起走全文索引；单个字符的词
+        在它们的命中里过滤。全是单字时只在最近的 SEARCH_SCAN_ROWS 条记录里 LIKE（没有全文索引时扫全表）。
+        scanned 为 None 表示搜索了全部历史，否则是实际检查过的最近记录条数，更早的记录没有搜索。
+        """
+        terms = query.split()
+        if not terms:
+            return [], None
+        trigram = self.fts_tokenizer == "trigram"
+        indexed = [t for t in terms if len(t) >= 2 or not trigram] if self.fts_tokenizer else []
+        if not indexed:
+            return self._search_like(terms, limit, offset)
+        single = [t for t in terms if len(t) < 2] if trigram else []
+        window = self.SEARCH_CANDIDATES
+        with self._read() as conn:
+            # 每张表一路；有词在某张表里不可能命中时这一路整个省掉
+            arms = []
+            for table, column in self.FTS_TABLES:
+                match = self._match(conn, table, indexed)
+                if match:
+                    where, params = self._like_filter(single, column)
+                    arms.append((table, match, where and " AND " + where, params))
+            if not arms:
+                return [], None
+            sql = self.SQL_SEARCH.format(arms=" UNION ALL ".join(
+                self.SQL_SEARCH_ARM.format(table=table, where=where) for table, _, where, _ in arms))
+            bound = [value for _, match, _, params in arms for value in (match, *params)]
+            rows, more = [], True
+            if offset < window:
+                candidates = conn.execute(sql, (*bound, window, 0)).fetchall()
+                rows = self._rank(candidates, terms)[offset:offset + limit]
+                more = len(candidates) == window
+            if more and len(rows) < limit:
+                tail = conn.execute(sql, (*bound, limit - len(rows), max(offset, window)))
+                rows += [row[:3] for row in tail]
+            if not rows:
+                return [], None
+            ids = [r[0] for r in rows]
+            marks = ",".join("?" * len(ids))
+            sql = " UNION ALL ".join(self.SQL_SNIPPETS.format(ids=marks, table=table) for table, *_ in arms)
+            snippets = dict(row for row in conn.execute(sql, [
+                value for _, match, _, _ in arms
+                for value in (*ids, self.MARK_OPEN, self.MARK_CLOSE, match, min(ids), max(ids))
+            ]) if row[1] is not None)
+        # 展开的 trigram 会把词后面的一个字符也标出来，单字不在索引里：这两种情况按原词重新标记
+        short = trigram and any(len(t) < 3 for t in terms)
+        results = []
+        for cid, created_ms, pinned in rows:
+            snippet = snippets.get(cid) or ""
+            # 去掉索引文本末尾的换行
+            snippet = self._mark(strip_marks(snippet).rstrip("\n"), terms) if short else snippet.rstrip("\n")
+            results.append((cid, snippet, created_ms, pinned))
+        return results, None
+
+    def _match(self, conn, table, terms):
+        """terms 在 table 上的 MATCH 表达式；两个字符的词在这张表里没有以它开头的 trigram 时返回 None"""
+        parts = []
+        for term in terms:
+            if len(term) >= 3 or self.fts_tokenizer != "trigram":
+                parts.append('"' + term.replace('"', '""') + '"')
+                continue
+            grams = self._grams(conn, table, term.lower())
+            if not grams:
+                return None
+            parts.append("(" + " OR ".join('"' + g.replace('"', '""') + '"' for g in grams) + ")")
+        return " AND ".join(parts)
+
+    def _grams(self, conn, table, pair):
+        """table 的词表里以 pair 开头的 trigram；按修订号缓存，之后没有新的写入时不再查词表"""
+        key = (table, pair)
+        revision = self.committed_revision
+        cached = self._gram_cache.get(key)
+        if cached and cached[0] == revision:
+            return cached[1]
+        grams = [row[0] for row in conn.execute(self.SQL_GRAMS.format(table=table), (pair, pair + "\U0010ffff"))]
+        if len(self._gram_cache) >= self.GRAM_CACHE_SIZE:
+            self._gram_cache.clear()
+        self._gram_cache[key] = (revision, grams)
+        return grams
+
+    def _rank(self, candidates, terms, k1=1.2, b=0.75):
+        """候选内的 BM25 词频打分（不含 IDF），同分时越新越靠前"""
+        if not candidates:
+            return []
+        terms = [t.lower() for t in terms]
+        avg_len = sum(c[4] for c in candidates) / len(candidates) or 1
+        scored = []
+        for order, (cid, created_ms, pinned, head, length) in enumerate(candidates):
+            head = head.lower()
+            norm = k1 * (1 - b + b * length / avg_len)
+            score = 0.0
+            for term in terms:
+                tf = head.count(term)
+                score += tf * (k1 + 1) / (tf + norm)
+            scored.append((-score, order, (cid, created_ms, pinned)))
+        scored.sort()
+        return [row for _, _, row in scored]
+
+    def _like_filter(self, terms, column):
+        """每个词一个 LIKE 条件，返回 (where, params)"""
+        where = " AND ".join([f"{column} LIKE ? ESCAPE '\\'"] * len(terms))
+        return where, ["%" + re.sub(r"([%_\\])", r"\\\1", t) + "%" for t in terms]
+
+    def _search_like(self, terms, limit, offset):
+        text = self.SQL_LIKE_TEXT if self.fts_tokenizer else "content"
+        where, params = self._like_filter(terms, text)
+        with self._read() as conn:
+            floor, scanned = (0, 0), None
+            if self.fts_tokenizer:
+                edge = conn.execute(self.SQL_SCAN_FLOOR, (self.SEARCH_SCAN_ROWS - 1,)).fetchall()
+                if edge:
+                    floor = edge[0]
+                if len(edge) == 2:
+                    scanned = self.SEARCH_SCAN_ROWS
+            rows = conn.execute(
+                self.SQL_SEARCH_LIKE.format(text=text, where=where), (*floor, *params, limit, offset)
+            ).fetchall()
+        return [(cid, self._make_snippet(content, terms), created_ms, pinned)
+                for cid, content, created_ms, pinned in rows], scanned
+
+    def _make_snippet(self, content, terms, width=48):
+        lowered = content.lower()
+        pos = min((lowered.find(t.lower()) for t in terms if t.lower() in lowered), default=0)
+        start = max(0, pos - width // 3)
+        text = self._mark(content[start:start + width], terms)
+        return ("…" if start else "") + text + ("…" if start + width < len(content) else "")
+
+    def _mark(self, text, terms):
+        # 一次替换所有词，长的优先：互相包含的词不会产生嵌套的标记
+        pattern = "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True))
+        return re.sub(pattern, lambda m: self.MARK_OPEN + m.group(0) + self.MARK_CLOSE, text, flags=re.IGNORECASE)
+
+    def toggle_pin(self, clip_id):
+        return self.set_pinned(clip_id, None)
+
+    def set_pinned(self, clip_id, pinned):
+        """设置收藏状态，pinned 为 None 时切换；返回新的状态，记录不存在时返回 None"""
+        with self._write() as conn:
+            current = conn.execute(self.SQL_GET_PINNED, (clip_id,)).fetchone()
+            if current is None:
+                return None
+            new_state = (0 if current[0] else 1) if pinned is None else (1 if pinned else 0)
+            if new_state == (1 if current[0] else 0):
+                return new_state
+            rev = self._bump(conn)
+            conn.execute(self.SQL_SET_PINNED, (new_state, rev, clip_id))
+            self._log(conn, rev, "pin", clip_id)
+            delta = 1 if new_state else -1
+            self._pinned_count += delta
+            self._unpinned_count -= delta
+            # 取消收藏后由后台维护任务重新参与淘汰
+            self._unpinned_bytes -= delta * (current[1] or 0)
+            self._emit_upsert(conn, clip_id)
+            return new_state
+
+    def find_clip(self, content_hash):
+        """按内容哈希查 id，没有时返回 None"""
+        with self._read() as conn:
+            row = conn.execute(self.SQL_FIND_HASH, (content_hash,)).fetchone()
+        return row[0] if row else None
+
+    def touch_clip(self, clip_id):
+        """更新时间戳，让它排到最上面"""
+        with self._write() as conn:
+            rev, ms = self._bump(conn), now_ms()
+            conn.execute(self.SQL_TOUCH, (ms, rev, clip_id))
+            self._log(conn, rev, "touch", clip_id, ms)
+            self._emit_upsert(conn, clip_id)
+
+    def delete_clip(self, clip_id):
+        with self._write() as conn:
+            current = conn.execute(self.SQL_GET_PINNED, (clip_id,)).fetchone()
+            if current is None:
+                return
+            rev = self._bump(conn)
+            self._log(conn, rev, "delete", clip_id)
+            conn.execute(self.SQL_DELETE, (clip_id,))
+            self._emit_delete(rev, [clip_id])
+            if current[0]:
+                self._pinned_count -= 1
+            else:
+                self._unpinned_count -= 1
+                self._unpinned_bytes -= current[1] or 0
+
+    def clear_history(self):
+        """删除所有未收藏的记录"""
+        with self._write() as conn:
+            rev = self._bump(conn)
+            conn.execute(self.SQL_LOG_CLEAR, (rev, self._tick(conn), self.origin))
+            conn.execute(self.SQL_CLEAR)
+            self._unpinned_count = 0
+            self._unpinned_bytes = 0
+            # 批量删除不逐条记录，让更早的增量请求直接整页重载
+            self._tombstone_floor = rev
+            self._pending_events.append({"type": "reset"})
+            self._pending_hot.append(("reset", None))
+
+    def change_log(self, since=0, limit=SYNC_BATCH, exclude=None):
+        """变更日志里 seq 大于 since 的条目，返回 (changes, next, more)
+
+        origin 为 exclude 的条目不返回（请求方自己产生的变更不必传回去）；删除以外的条目带上当前全文，
+        本地已经没有这条内容时为 None。下一次请求用 next 作为 since。
+        """
+        with self._read() as conn:
+            # 两条查询读同一个快照，next 不会越过还没返回的条目
+            conn.execute("BEGIN")
+            try:
+                rows = conn.execute(self.SQL_CHANGE_LOG, (since, exclude or "", limit)).fetchall()
+                last = conn.execute(self.SQL_LAST_SEQ).fetchone()[0]
+            finally:
+                conn.execute("COMMIT")
+        changes = []
+        for seq, op, content_hash, created_ms, pinned, changed_ms, origin, content, codec, data in rows:
+            change = {"seq": seq, "op": op, "content_hash": content_hash, "created_ms": created_ms,
+                      "pinned": bool(pinned), "changed_ms": changed_ms, "origin": origin}
+            if op != "delete":
+                change["content"] = None if content is None else inflate_content(content, codec, data)
+            changes.append(change)
+        more = len(rows) == limit
+        return changes, rows[-1][0] if more else max(last, since), more
+
+    def sync_cursor(self, peer):
+        """上次从 peer 合并到的位置 (对方的 origin, seq)，没有同步过时为 (None, 0)"""
+        with self._read() as conn:
+            row = conn.execute(self.SQL_GET_META, ("sync:" + peer,)).fetchone()
+        return tuple(json.loads(row[0])) if row else (None, 0)
+
+    def merge_changes(self, changes, cursor=None):
+        """合并另一个实例的一批变更（change_log() 的格式），返回 (应用的条数, 跳过的条数)
+
+        变更的版本 (changed_ms, origin) 比本地同一 content_hash 的同一寄存器的版本新时才应用，
+        所以重复合并同一批没有任何效果。应用的变更保留原来的 origin 追加到本地日志，可以继续传给下一个实例。
+        cursor 为 (peer, origin, seq) 时同步进度和合并在同一个事务里提交。
+        """
+        items = []
+        try:
+            existing = self._existing_hashes(change["content_hash"] for change in changes)
+            for change in changes:
+                op, content_hash = change["op"], change["content_hash"]
+                content = change.get("content") if op != "delete" else None
+                prepared = None
+                # 本地没有的内容才需要校验、计算元数据和压缩，都在事务之外完成
+                if content is not None and content_hash not in existing:
+                    if hashlib.md5(content.encode()).hexdigest() != content_hash:
+                        raise ValueError(f"content does not match {content_hash}")
+                    prepared = self._prepare(content, content_hash)
+                created_ms = int(change["created_ms"])
+                version = (int(change["changed_ms"]), str(change["origin"]))
+                items.append((op, content_hash, created_ms, 1 if change.get("pinned") else 0, version, prepared))
+        except (KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"malformed change: {e!r}") from None
+        with self._write() as conn:
+            applied = self._write_merge(conn, items)
+            conn.execute(self.SQL_SET_META, ("clock", self._clock))
+            if cursor is not None:
+                peer, origin, seq = cursor
+                conn.execute(self.SQL_SET_META, ("sync:" + peer, json.dumps([origin, seq])))
+        return applied, len(items) - applied
+
+    def _write_merge(self, conn, items):
+        rev = self.revision + 1
+        applied = 0
+        for op, content_hash, created_ms, pinned, version, prepared in items:
+            self._clock = max(self._clock, version[0])
+            time_reg = conn.execute(self.SQL_TIME_VERSION, (content_hash,)).fetchone()
+            pin_reg = conn.execute(self.SQL_PIN_VERSION, (content_hash,)).fetchone()
+            time_won = op in self.TIME_OPS and (time_reg is None or version > tuple(time_reg[:2]))
+            pin_won = op in self.PIN_OPS and (pin_reg is None or version > tuple(pin_reg[:2]))
+            if not (time_won or pin_won):
+                continue
+            # 合并之后两个寄存器的值决定这条内容是否存在、时间和收藏状态
+            if time_won:
+                time_op, at = op, created_ms
+            else:
+                time_op, at = time_reg[2:] if time_reg else (None, None)
+            state = pinned if pin_won else (pin_reg[2] if pin_reg else 0)
+            alive = time_op is not None and (time_op not in self.DELETE_OPS or (time_op == "clear" and state))
+            row = conn.execute(self.SQL_FIND_HASH, (content_hash,)).fetchone()
+            if alive and row:
+                conn.execute(self.SQL_MERGE_UPDATE, (at / 1000, at, state, rev, row[0]))
+            elif alive:
+                if not prepared:
+                    # 对方也已经没有全文（被它的保留策略淘汰了），无从恢复
+                    continue
+                content, content_hash, metadata, blob = prepared
+                clip_id = conn.execute(self.SQL_IMPORT, (
+                    content, content_hash, *metadata, at / 1000, at, state, rev, blob is not None,
+                )).lastrowid
+                if blob is not None:
+                    self._put_blob(conn, clip_id, content_hash, blob)
+            elif row:
+                conn.execute(self.SQL_DELETE, (row[0],))
+            # 本地没有这条内容时也记下删除，之后收到更旧的插入不会让它复活；
+            # 插入只赢了一个寄存器时按它实际写入的那个记录
+            if op == "insert" and not (time_won and pin_won):
+                op = "touch" if time_won else "pin"
+            conn.execute(self.SQL_LOG_MERGED, (rev, op, content_hash, created_ms, pinned, *version))
+            applied += 1
+        if applied:
+            self._bump(conn)
+            total, pinned_count, unpinned_bytes = conn.execute(self.SQL_COUNTS).fetchone()
+            self._pinned_count = pinned_count
+            self._unpinned_count = total - pinned_count
+            self._unpinned_bytes = unpinned_bytes
+            # 合并的行散布在整个时间线上，和导入一样让页面和热缓存整页重载
+            self._tombstone_floor = self.revision
+            self._pending_events.append({"type": "reset"})
+            self._pending_hot.append(("reset", None))
+        return applied
+
+    def prune_changes(self, limit=CHANGES_PRUNE_CHUNK, horizon_days=CHANGES_HORIZON_DAYS):
+        """清理变更日志，最多删除 limit 条，返回删除的条数
+
+        先删已被同一内容的新条目覆盖的旧条目：同步只看每条内容最新的版本，对方从任何位置继续拉取结果都一样。
+        再删内容已经不在本地、版本早于 horizon_days 天的条目：这期间同步过的实例都已经收到了它们。
+        """
+        cutoff = now_ms() - int(horizon_days * 86400 * 1000)
+        with self._write() as conn:
+            pruned = conn.execute(self.SQL_PRUNE_CHANGES, (limit,)).rowcount
+            if pruned < limit:
+                pruned += conn.execute(self.SQL_PRUNE_GONE, (cutoff, limit - pruned)).rowcount
+            return pruned
+
+    def page_stats(self):
+        """数据库文件的页数、空闲页数、页大小和 auto_vacuum 模式"""
+        with self._read() as conn:
+            return {name: conn.execute(f"PRAGMA {name}").fetchone()[0]
+                    for name in ("page_count", "freelist_count", "page_size", "auto_vacuum")}
+
+    def incremental_vacuum(self, pages=VACUUM_STEP_PAGES):
+        """回收最多 pages 个空闲页，返回剩余的空闲页数"""
+        with self._write_lock:
+            self._writer.execute(f"PRAGMA incremental_vacuum({int(pages)})").fetchall()
+            return self._writer.execute("PRAGMA freelist_count").fetchone()[0]
+
+    def vacuum(self):
+        """整库 VACUUM；1.6.0 创建的库切换到 auto_vacuum=INCREMENTAL 时需要执行一次"""
+        with self._write_lock:
+            self._writer.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            self._writer.execute("VACUUM")
+
+    def checkpoint(self):
+        """PASSIVE 检查点，不等待读者；返回 (busy, WAL 页数, 已写回的页数)"""
+        with self._write_lock:
+            return list(self._writer.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchone())
+
+    def optimize(self, analysis_limit=ANALYSIS_LIMIT):
+        """刷新查询规划器的统计信息；从未分析过的库先做一次 ANALYZE"""
+        with self._write_lock:
+            self._writer.execute(f"PRAGMA analysis_limit={int(analysis_limit)}")
+            analyzed = self._writer.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+            ).fetchone()
+            self._writer.execute("PRAGMA optimize" if analyzed else "ANALYZE")
+
+    def quick_check(self):
+        """在只读连接上做完整性检查，不占用写锁；返回发现的问题，正常时为空列表"""
+        with self._read() as conn:
+            rows = [row[0] for row in conn.execute("PRAGMA quick_check")]
+        return [] if rows == ["ok"] else rows
+
+    def close(self):
+        with self._write_lock:
+            self._writer.close()
+        while True:
+            try:
+                self._readers.get_nowait().close()
+            except queue.Empty:
+                break
+
+
+def toggle_pin(clip_id):
+    """切换收藏状态"""
+    return ClipStore.shared().toggle_pin(clip_id)
+
+
+def delete_clip(clip_id):
+    """删除剪贴板记录"""
+    ClipStore.shared().delete_clip(clip_id)
+
+
+def highlight_html(snippet):
+    """把搜索摘要里的高亮标记转成 <mark>，其余内容做 HTML 转义"""
+    return (html.escape(snippet)
+            .replace(ClipStore.MARK_OPEN, "<mark>")
+            .replace(ClipStore.MARK_CLOSE, "</mark>"))
+
+
+def strip_marks(snippet):
+    return snippet.replace(ClipStore.MARK_OPEN, "").replace(ClipStore.MARK_CLOSE, "")
@@ -0,0 +1,49 @@
+"""
+实例间同步：从另一个 ClipFlow 的 /api/changes 拉取变更日志的增量，按 content_hash 合并
+
+  clipflow sync http://127.0.0.1:17891
+
+Web 接口只监听本机，另一台机器上的实例经 SSH 端口转发访问（ssh -L 17891:127.0.0.1:17890 other-mac）。
+只有拉取：双向同步就是两边各拉一次对方。进度（对方的 origin 和已合并到的 seq）存在本地库里，
+和合并在同一个事务中提交，之后每次只传上次以来的变更；请求带上本地的 origin，
+对方不会把从这里拉过去的变更再传回来。对方换了库（origin 变了）时从头同步，合并是幂等的。
+"""
+
+import json
+from urllib.parse import quote
+from urllib.request import urlopen
+
+from .config import SYNC_BATCH, SYNC_TIMEOUT
+
+
+def fetch_changes(url, since, exclude, limit=SYNC_BATCH, timeout=SYNC_TIMEOUT):
+    """请求 url 上的实例的 /api/changes，返回解析后的 JSON"""
+    target = f"{url.rstrip('/')}/api/changes?since={since}&limit={limit}&exclude={quote(exclude)}"
+    with urlopen(target, timeout=timeout) as response:
+        return json.load(response)
+
+
+def pull(store, url, limit=SYNC_BATCH, fetch=fetch_changes):
+    """把 url 上的实例自上次同步以来的变更合并进 store
+
+    返回 {"applied", "skipped", "batches", "next"}；网络错误抛出 OSError，对方的数据有问题时抛出 ValueError。
+    """
+    peer = url.rstrip("/")
+    origin, since = store.sync_cursor(peer)
+    applied = skipped = batches = 0
+    while True:
+        data = fetch(peer, since, store.origin, limit)
+        if data["origin"] == store.origin:
+            raise ValueError(f"{peer} is this instance")
+        if data["origin"] != origin:
+            if since:
+                origin, since = data["origin"], 0
+                continue
+            origin = data["origin"]
+        done, rejected = store.merge_changes(data["changes"], cursor=(peer, origin, data["next"]))
+        applied += done
+        skipped += rejected
+        batches += 1
+        since = data["next"]
+        if not data["more"]:
+            return {"applied": applied, "skipped": skipped, "batches": batches, "next": since}
@@ -0,0 +1,219 @@
+"""登录项、通知和写剪贴板等会阻塞的系统调用"""
+
+import threading
+import time
+import subprocess
+import sys
+import os
+
+from .config import LOGIN_ITEM_TTL
+from .capture import set_clipboard
+
+
+def get_app_path():
+    """获取应用程序路径"""
+    if getattr(sys, 'frozen', False):
+        # PyInstaller 打包后
+        return os.path.dirname(os.path.dirname(os.path.dirname(sys.executable)))
+    else:
+        # 开发模式：入口脚本 clipboard_manager.py
+        return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "clipboard_manager.py")
+
+
+def rumps_notification(title, subtitle, message, sound=False):
+    """系统通知；rumps 在第一次发通知时才导入"""
+    import rumps
+    rumps.notification(title, subtitle, message, sound=sound)
+
+
+LOGIN_ITEMS_SCRIPT = '''
+    tell application "System Events"
+        get the name of every login item
+    end tell
+'''
+
+
+class CommandRunner:
+    """执行外部命令（osascript 等）的接口，返回标准输出"""
+
+    def run(self, args, timeout=5):
+        raise NotImplementedError
+
+
+class SubprocessRunner(CommandRunner):
+    def run(self, args, timeout=5):
+        return subprocess.run(args, capture_output=True, text=True, timeout=timeout).stdout
+
+
+class FakeCommandRunner(CommandRunner):
+    """按 osascript 脚本内容模拟登录项，可加延迟模拟 AppleScript 的耗时，用于 Linux 上测试"""
+
+    def __init__(self, login_items=(), delay=0.0):
+        self.login_items = set(login_items)
+        self.delay = delay
+        self.calls = []
+
+    def run(self, args, timeout=5):
+        self.calls.append(args)
+        if self.delay:
+            time.sleep(self.delay)
+        script = args[-1]
+        if "get the name of every login item" in script:
+            return ", ".join(sorted(self.login_items)) + "\n"
+        if "make login item" in script:
+            self.login_items.add("ClipFlow")
+        elif "delete login item" in script:
+            self.login_items.discard("ClipFlow")
+        return ""
+
+
+def is_login_item(runner=None):
+    """检查是否已设置开机启动"""
+    runner = runner or SubprocessRunner()
+    try:
+        return 'ClipFlow' in runner.run(['osascript', '-e', LOGIN_ITEMS_SCRIPT])
+    except:
+        return False
+
+
+def add_login_item(runner=None, app_path=None):
+    """添加开机启动"""
+    runner = runner or SubprocessRunner()
+    app_path = app_path or get_app_path()
+    if app_path.endswith('.app'):
+        try:
+            runner.run(['osascript', '-e', f'''
+                tell application "System Events"
+                    make login item at end with properties {{path:"{app_path}", hidden:false}}
+                end tell
+            '''])
+            return True
+        except:
+            return False
+    return False
+
+
+def remove_login_item(runner=None):
+    """移除开机启动"""
+    runner = runner or SubprocessRunner()
+    try:
+        runner.run(['osascript', '-e', '''
+            tell application "System Events"
+                delete login item "ClipFlow"
+            end tell
+        '''])
+        return True
+    except:
+        return False
+
+
+class SystemIntegration:
+    """在后台线程里执行会阻塞的系统调用：登录项、通知、写剪贴板
+
+    所有任务在同一个线程里按提交顺序执行；回调也在这个线程里运行，
+    界面需要自己回到主线程刷新。登录项状态缓存 ttl 秒，
+    只有 toggle_login_item 改变状态时才会更新缓存。
+    """
+
+    _instance = None
+    _instance_lock = threading.Lock()
+
+    def __init__(self, runner=None, notifier=None, app_path=None, ttl=LOGIN_ITEM_TTL):
+        from concurrent.futures import ThreadPoolExecutor
+        self.runner = runner or SubprocessRunner()
+        self.notifier = notifier or rumps_notification
+        self.app_path = app_path or get_app_path()
+        self.ttl = ttl
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="clipflow-system")
+        self.lock = threading.Lock()
+        self.login_enabled = None
+        self.login_checked = None
+        self.login_pending = False
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def shared(cls):
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+
+    def submit(self, fn, *args, callback=None):
+        """在后台线程执行 fn(*args)，成功后把结果交给 callback"""
+        future = self.executor.submit(fn, *args)
+        if callback is not None:
+            def done(f):
+                if not f.cancelled() and f.exception() is None:
+                    callback(f.result())
+            future.add_done_callback(done)
+        return future
+
+    def login_stale(self):
+        """缓存过期且没有正在进行的检查"""
+        with self.lock:
+            if self.login_pending:
+                return False
+            return self.login_checked is None or time.monotonic() - self.login_checked >= self.ttl
+
+    def _store_login(self, enabled):
+        with self.lock:
+            self.login_enabled = enabled
+            self.login_checked = time.monotonic()
+            self.login_pending = False
+
+    def _cached_login_item(self):
+        with self.lock:
+            fresh = self.login_checked is not None and time.monotonic() - self.login_checked < self.ttl
+            if fresh:
+                self.hits += 1
+                self.login_pending = False
+                return self.login_enabled
+            self.misses += 1
+        enabled = is_login_item(self.runner)
+        self._store_login(enabled)
+        return enabled
+
+    def check_login_item(self, callback=None):
+        """读取登录项状态（命中缓存时不调用 osascript）"""
+        with self.lock:
+            self.login_pending = True
+        return self.submit(self._cached_login_item, callback=callback)
+
+    def ensure_login_item(self, callback=None):
+        """默认开启开机启动：不是登录项时尝试添加"""
+        def work():
+            if self._cached_login_item():
+                return True
+            enabled = add_login_item(self.runner, self.app_path)
+            self._store_login(enabled)
+            return enabled
+        return self.submit(work, callback=callback)
+
+    def toggle_login_item(self, callback=None):
+        """切换开机启动，callback 收到 (切换前, 切换后) 的状态"""
+        def work():
+            before = self._cached_login_item()
+            if before:
+                remove_login_item(self.runner)
+                after = False
+            else:
+                after = add_login_item(self.runner, self.app_path)
+            self._store_login(after)
+            return before, after
+        return self.submit(work, callback=callback)
+
+    def notify(self, title, subtitle, message):
+        def work():
+            try:
+                self.notifier(title, subtitle, message, sound=False)
+            except:
+                pass
+        return self.submit(work)
+
+    def copy_text(self, text, callback=None):
+        """写入系统剪贴板，callback 收到是否成功"""
+        return self.submit(set_clipboard, text, callback=callback)
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
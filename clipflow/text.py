@@ -0,0 +1,146 @@
+"""预览、内容类型、blob 压缩、游标和时间标签等纯函数"""
+
+import time
+from datetime import datetime
+import re
+import json
+import zlib
+import lzma
+import base64
+import binascii
+
+from .config import BLOB_CODEC, MAX_DISPLAY_LENGTH, PREVIEW_LENGTH
+
+
+def encode_cursor(pinned, created_ms, clip_id):
+    raw = json.dumps([pinned, created_ms, clip_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """解析分页游标，格式不对时抛出 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        pinned, created_ms, clip_id = json.loads(raw)
+    except (TypeError, ValueError, binascii.Error):
+        raise ValueError(f"invalid cursor: {cursor!r}")
+    return int(pinned), int(created_ms), int(clip_id)
+
+
+def truncate_text(text, max_len=MAX_DISPLAY_LENGTH):
+    text = text.replace("\n", " ↵ ").replace("\t", " ").strip()
+    text = re.sub(r"\s+", " ", text)
+    if len(text) > max_len:
+        return text[:max_len] + "…"
+    return text
+
+
+def make_preview(content, max_len=PREVIEW_LENGTH):
+    """单行预览：只处理开头一段，耗时与全文长度无关"""
+    head = content[:max_len * 4]
+    preview = truncate_text(head, max_len)
+    if len(content) > len(head) and not preview.endswith("…"):
+        preview += "…"
+    return preview
+
+
+def shorten(preview, max_len=MAX_DISPLAY_LENGTH):
+    """截短已经规范化过的预览，不再做正则处理"""
+    if len(preview) > max_len:
+        return preview[:max_len] + "…"
+    return preview
+
+
+CONTENT_TYPE_PATTERNS = (
+    ("url", re.compile(r"(https?|ftp)://\S+|www\.\S+\.\S+", re.I)),
+    ("email", re.compile(r"[\w.+-]+@[\w-]+(\.[\w-]+)+")),
+    ("color", re.compile(r"#(?:[0-9a-f]{3}|[0-9a-f]{6}|[0-9a-f]{8})|rgba?\([\d\s.,%]+\)", re.I)),
+    ("number", re.compile(r"[-+]?[\d,]*\.?\d+(e[-+]?\d+)?", re.I)),
+    ("path", re.compile(r"(~|\.{1,2})?/[^\n]*")),
+)
+CODE_PATTERN = re.compile(
+    r"[{};]\s*$|^\s*(def|class|import|from|function|const|let|var|return|if|for|#include|SELECT)\b|=>",
+    re.M,
+)
+
+
+def detect_content_type(content):
+    """粗略判断内容类型：url / email / color / number / path / code / text"""
+    head = content[:4096].strip()
+    if "\n" not in head:
+        if len(head) < 2048:
+            for name, pattern in CONTENT_TYPE_PATTERNS:
+                if pattern.fullmatch(head):
+                    return name
+    elif len(CODE_PATTERN.findall(head)) >= 2:
+        return "code"
+    return "text"
+
+
+# 解压与压缩级别无关，级别不记在库里
+BLOB_CODECS = {
+    "zlib": (lambda data, level=6: zlib.compress(data, level), zlib.decompress),
+    "lzma": (lambda data, level=6: lzma.compress(data, preset=level), lzma.decompress),
+}
+
+
+def pack_blob(content, codec=BLOB_CODEC, level=None):
+    """压缩大内容，返回 (codec, data)；level 为 None 时用编码的默认级别"""
+    compress = BLOB_CODECS[codec][0]
+    data = content.encode()
+    return codec, compress(data) if level is None else compress(data, level)
+
+
+def inflate_content(content, codec, data):
+    """content 为内联内容；codec / data 非空时说明全文在 blob 表里"""
+    if data is None:
+        return content
+    return BLOB_CODECS[codec][1](data).decode()
+
+
+def clip_metadata(content):
+    """采集时计算一次：(preview, length, line_count, content_type)"""
+    return make_preview(content), len(content), content.count("\n") + 1, detect_content_type(content)
+
+
+def clip_to_json(row):
+    """LIST_COLUMNS 行转成接口 JSON；不含全文"""
+    clip_id, preview, length, line_count, content_type, created_ms, pinned, rev = row
+    return {
+        "id": clip_id,
+        "preview": preview,
+        "length": length,
+        "line_count": line_count,
+        "content_type": content_type,
+        "created_at": format_ms(created_ms),
+        "created_ms": created_ms,
+        "pinned": bool(pinned),
+        "rev": rev,
+        "time_ago": get_time_ago(created_ms),
+    }
+
+
+def now_ms():
+    return int(time.time() * 1000)
+
+
+def format_ms(created_ms):
+    """毫秒时间戳转成本地时间文本，与 1.6.0 接口里的 created_at 格式相同"""
+    if created_ms is None:
+        return None
+    return datetime.fromtimestamp(created_ms / 1000).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def get_time_ago(created_ms):
+    """created_ms 为毫秒时间戳，只做整数运算，不再逐行解析时间文本"""
+    if created_ms is None:
+        return ""
+    seconds = max(0, int(time.time() - created_ms / 1000))
+    if seconds >= 86400:
+        return f"{seconds // 86400}天前"
+    elif seconds >= 3600:
+        return f"{seconds // 3600}小时前"
+    elif seconds >= 60:
+        return f"{seconds // 60}分钟前"
+    else:
+        return "刚刚"
@@ -0,0 +1,127 @@
+"""
+历史记录的 NDJSON 导出 / 导入
+
+每行一条记录：{"content": ..., "content_hash": ..., "created_ms": ..., "pinned": ...}。
+导出从一个读快照逐块编码，内存占用与历史大小无关；导入按 content_hash 去重，
+大批量事务写入。命令行用法：
+  clipflow export [-o history.ndjson.gz] [--gzip] [--db PATH]
+  clipflow import history.ndjson.gz [--db PATH]
+导入请在 ClipFlow 退出后进行，正在运行的应用不会察觉其他进程写入的记录；导出可以随时进行，
+它只读打开数据库，不建表也不迁移。
+"""
+
+import json
+import sqlite3
+import sys
+import time
+import zlib
+
+from .config import DB_PATH, EXPORT_CHUNK, IMPORT_BATCH
+from .store import ClipStore
+from .text import now_ms
+
+GZIP_MAGIC = b"\x1f\x8b"
+
+
+def export_chunks(store, compress=False, chunk=EXPORT_CHUNK):
+    """逐块产出编码好的 NDJSON 字节；compress 为 True 时产出的是一个 gzip 流"""
+    # wbits=31：带 gzip 头和校验的 deflate 流；级别 1 的压缩率已经足够，吞吐是级别 6 的数倍
+    compressor = zlib.compressobj(1, zlib.DEFLATED, 31) if compress else None
+    for records in store.export_clips(chunk):
+        data = "".join(json.dumps(record, ensure_ascii=False) + "\n" for record in records).encode()
+        if compressor:
+            data = compressor.compress(data)
+            if not data:
+                continue
+        yield data
+    if compressor:
+        yield compressor.flush()
+
+
+def read_records(lines):
+    """解析 NDJSON 行，产出 (content, created_ms, pinned)；空行跳过，格式错误时抛出带行号的 ValueError"""
+    for n, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+            content = record["content"]
+            if not isinstance(content, str):
+                raise TypeError("content is not a string")
+            created_ms = int(record.get("created_ms") or now_ms())
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            raise ValueError(f"line {n}: {e!r}") from None
+        yield content, created_ms, bool(record.get("pinned"))
+
+
+def open_input(path):
+    """以二进制打开导入文件（- 为标准输入），按文件头识别 gzip"""
+    f = sys.stdin.buffer if path == "-" else open(path, "rb")
+    if f.peek(2)[:2] == GZIP_MAGIC:
+        import gzip
+        return gzip.GzipFile(fileobj=f)
+    return f
+
+
+def export_file(store, path, compress=False):
+    """导出到文件（- 为标准输出），返回写出的字节数"""
+    f = sys.stdout.buffer if path == "-" else open(path, "wb")
+    written = 0
+    try:
+        for data in export_chunks(store, compress):
+            f.write(data)
+            written += len(data)
+    finally:
+        if f is sys.stdout.buffer:
+            f.flush()
+        else:
+            f.close()
+    return written
+
+
+def import_file(store, path, batch=IMPORT_BATCH):
+    """从文件导入，返回 (写入条数, 跳过条数)"""
+    f = open_input(path)
+    try:
+        return store.import_clips(read_records(f), batch)
+    finally:
+        if f is not sys.stdin.buffer:
+            f.close()
+
+
+def main(argv=None):
+    import argparse
+    parser = argparse.ArgumentParser(prog="clipflow", description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--db", default=str(DB_PATH), help="数据库路径")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="把全部历史导出为 NDJSON")
+    export.add_argument("-o", "--output", default="-", help="输出文件，默认标准输出")
+    export.add_argument("--gzip", action="store_true", help="gzip 压缩（输出文件名以 .gz 结尾时默认开启）")
+    imp = commands.add_parser("import", help="导入 NDJSON（可以是 gzip），按内容去重")
+    imp.add_argument("input", help="输入文件，- 为标准输入")
+    imp.add_argument("--batch", type=int, default=IMPORT_BATCH, help="每个事务写入的条数")
+    args = parser.parse_args(argv)
+
+    try:
+        store = ClipStore(args.db, readonly=args.command == "export")
+    except sqlite3.Error as e:
+        print(f"cannot open {args.db}: {e}", file=sys.stderr)
+        return 1
+    started = time.perf_counter()
+    try:
+        if args.command == "export":
+            written = export_file(store, args.output, args.gzip or args.output.endswith(".gz"))
+            print(f"exported {store.count()} clips ({written} bytes) in {time.perf_counter() - started:.1f} s",
+                  file=sys.stderr)
+        else:
+            try:
+                imported, skipped = import_file(store, args.input, args.batch)
+            except ValueError as e:
+                print(f"import failed: {e}", file=sys.stderr)
+                return 1
+            print(f"imported {imported} clips, skipped {skipped} duplicates "
+                  f"in {time.perf_counter() - started:.1f} s", file=sys.stderr)
+    finally:
+        store.close()
+    return 0
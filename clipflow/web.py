@@ -0,0 +1,688 @@
+"""本地 Web 界面和 HTTP / SSE 接口"""
+
+import hashlib
+import json
+import asyncio
+import gzip
+from concurrent.futures import ThreadPoolExecutor
+from http import HTTPStatus
+from urllib.parse import urlsplit, parse_qs
+
+from .config import GZIP_MIN_SIZE, KEEPALIVE_TIMEOUT, SSE_HEARTBEAT, SYNC_BATCH, VERSION, WEB_PORT
+from .text import clip_to_json, format_ms, get_time_ago
+from .store import EventBus, highlight_html
+from .transfer import export_chunks
+
+
+class AsyncSubscription:
+    """EventBus 到 asyncio 的桥：发布线程把事件投递进事件循环里的队列"""
+
+    def __init__(self, loop, maxsize):
+        self.loop = loop
+        self.queue = asyncio.Queue(maxsize)
+
+    def put_nowait(self, event):
+        self.loop.call_soon_threadsafe(self._put, event)
+
+    def _put(self, event):
+        try:
+            self.queue.put_nowait(event)
+        except asyncio.QueueFull:
+            # 与 EventBus 相同的策略：丢掉积压，只让它重新加载一次
+            while not self.queue.empty():
+                self.queue.get_nowait()
+            self.queue.put_nowait({"type": "reset", "rev": event.get("rev")})
+
+
+WEB_PAGE_HTML = r'''<!DOCTYPE html>
+<html lang="zh">
+<head>
+    <meta charset="UTF-8">
+    <meta name="viewport" content="width=device-width, initial-scale=1.0">
+    <title>ClipFlow</title>
+    <style>
+        * { margin: 0; padding: 0; box-sizing: border-box; }
+        body {
+            font-family: -apple-system, BlinkMacSystemFont, "SF Pro Text", sans-serif;
+            background: #0d0d0d;
+            color: #e0e0e0;
+            min-height: 100vh;
+            padding: 40px;
+        }
+        .container { max-width: 700px; margin: 0 auto; }
+        header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 30px;
+            padding-bottom: 20px;
+            border-bottom: 1px solid #222;
+        }
+        h1 { font-size: 24px; font-weight: 600; color: #fff; }
+        .stats { font-size: 14px; color: #666; }
+        .clip-list { display: flex; flex-direction: column; gap: 12px; }
+        .clip-item {
+            background: #161616;
+            border: 1px solid #222;
+            border-radius: 10px;
+            padding: 16px;
+            transition: all 0.2s ease;
+            cursor: pointer;
+        }
+        .clip-item:hover { background: #1a1a1a; border-color: #333; }
+        .clip-item:active { background: #222; }
+        .clip-header {
+            display: flex;
+            justify-content: space-between;
+            align-items: center;
+            margin-bottom: 10px;
+        }
+        .clip-time {
+            font-size: 12px;
+            color: #555;
+            font-family: "SF Mono", monospace;
+        }
+        .clip-meta { font-size: 12px; color: #444; }
+        .clip-content {
+            font-family: "SF Mono", Monaco, monospace;
+            font-size: 13px;
+            line-height: 1.6;
+            color: #ccc;
+            white-space: pre-wrap;
+            word-break: break-all;
+            max-height: 200px;
+            overflow-y: auto;
+        }
+        .empty { text-align: center; padding: 60px; color: #444; }
+        .toast {
+            position: fixed;
+            bottom: 30px;
+            left: 50%;
+            transform: translateX(-50%);
+            background: #0066cc;
+            color: #fff;
+            padding: 12px 24px;
+            border-radius: 8px;
+            font-size: 14px;
+            opacity: 0;
+            transition: opacity 0.3s ease;
+            pointer-events: none;
+        }
+        .toast.show { opacity: 1; }
+    </style>
+</head>
+<body>
+    <div class="container">
+        <header>
+            <h1>📋 ClipFlow <span style="font-size:14px;color:#666">v1.1.2</span></h1>
+            <span class="stats" id="stats">加载中...</span>
+        </header>
+        <div class="clip-list" id="clipList"></div>
+        <div id="sentinel"></div>
+    </div>
+    <div class="toast" id="toast">已复制到剪贴板</div>
+    <script>
+        const PAGE_SIZE = 50;
+        const clips = new Map();
+        let rev = null;
+        let nextCursor = null;
+        let boundary = null;
+        let total = 0;
+        let busy = false;
+        let sentinelVisible = false;
+        let catchUp = false;
+
+        // 加载期间收到的事件在加载结束后统一用 since 补齐
+        function settle() {
+            if (catchUp && !busy) {
+                catchUp = false;
+                setTimeout(poll, 0);
+            }
+        }
+
+        // 与服务端相同的排序：pinned DESC, created_ms DESC, id DESC
+        function compare(a, b) {
+            if (a.pinned !== b.pinned) return a.pinned ? -1 : 1;
+            if (a.created_ms !== b.created_ms) return a.created_ms < b.created_ms ? 1 : -1;
+            return b.id - a.id;
+        }
+
+        async function loadPage(cursor) {
+            busy = true;
+            try {
+                let url = '/api/clips?limit=' + PAGE_SIZE;
+                if (cursor) url += '&after=' + encodeURIComponent(cursor);
+                const data = await (await fetch(url)).json();
+                if (!cursor) {
+                    clips.clear();
+                    rev = data.rev;
+                }
+                data.clips.forEach(clip => clips.set(clip.id, clip));
+                nextCursor = data.next_cursor;
+                boundary = nextCursor ? data.clips[data.clips.length - 1] : null;
+                total = data.total;
+                render();
+            } finally {
+                busy = false;
+            }
+            settle();
+            // 一页不足以填满屏幕时继续加载
+            setTimeout(loadMore, 0);
+        }
+
+        function loadMore() {
+            if (sentinelVisible && nextCursor && !busy) loadPage(nextCursor);
+        }
+
+        async function poll() {
+            if (busy || rev === null) return;
+            busy = true;
+            let data;
+            try {
+                data = await (await fetch('/api/clips?since=' + rev)).json();
+            } finally {
+                busy = false;
+            }
+            settle();
+            if (data.reset) return loadPage(null);
+            data.deleted.forEach(id => clips.delete(id));
+            data.changed.forEach(upsert);
+            rev = data.rev;
+            total = data.total;
+            if (data.changed.length || data.deleted.length) render();
+        }
+
+        function upsert(clip) {
+            // 排在已加载窗口之外的行交给滚动加载
+            if (boundary && compare(clip, boundary) > 0) clips.delete(clip.id);
+            else clips.set(clip.id, clip);
+        }
+
+        // 服务端推送的增量事件；同一事务内的事件共享同一个 rev
+        function applyEvent(event) {
+            if (rev !== null && event.rev < rev) return;
+            if (rev === null || busy || event.rev > rev + 1) {
+                catchUp = true;
+                return settle();
+            }
+            if (event.type === 'reset') return loadPage(null);
+            if (event.type === 'upsert') upsert(event.clip);
+            if (event.type === 'delete') event.ids.forEach(id => clips.delete(id));
+            rev = event.rev;
+            total = event.total;
+            render();
+        }
+
+        function render() {
+            document.getElementById('stats').textContent = total + ' 条记录';
+            const list = document.getElementById('clipList');
+            if (clips.size === 0) {
+                list.innerHTML = '<div class="empty">暂无剪贴板记录</div>';
+                return;
+            }
+            list.innerHTML = [...clips.values()].sort(compare).map(clip => {
+                const escaped = clip.preview
+                    .replace(/&/g, '&amp;')
+                    .replace(/</g, '&lt;')
+                    .replace(/>/g, '&gt;');
+                let meta = clip.length + ' 字';
+                if (clip.line_count > 1) meta += ' · ' + clip.line_count + ' 行';
+                if (clip.content_type !== 'text') meta += ' · ' + clip.content_type;
+                return '<div class="clip-item" data-id="' + clip.id + '">' +
+                    '<div class="clip-header"><span class="clip-time">' + (clip.time_ago || clip.created_at) + '</span>' +
+                    '<span class="clip-meta">' + meta + '</span></div>' +
+                    '<div class="clip-content">' + escaped + '</div></div>';
+            }).join('');
+        }
+
+        // 列表里只有预览，复制时按 id 取全文
+        function fetchContent(id) {
+            return fetch('/api/clips/' + id).then(r => r.json()).then(clip => clip.content);
+        }
+
+        function copyClip(id) {
+            // Safari 要求在点击事件里同步调用剪贴板接口，所以把请求包在 ClipboardItem 里
+            if (window.ClipboardItem && navigator.clipboard.write) {
+                const blob = fetchContent(id).then(text => new Blob([text], {type: 'text/plain'}));
+                return navigator.clipboard.write([new ClipboardItem({'text/plain': blob})]);
+            }
+            return fetchContent(id).then(text => navigator.clipboard.writeText(text));
+        }
+
+        document.getElementById('clipList').addEventListener('click', e => {
+            const el = e.target.closest('.clip-item');
+            if (!el) return;
+            copyClip(Number(el.dataset.id)).then(() => showToast('已复制到剪贴板'));
+        });
+
+        // 滚动到底部时加载下一页
+        new IntersectionObserver(entries => {
+            sentinelVisible = entries[0].isIntersecting;
+            loadMore();
+        }).observe(document.getElementById('sentinel'));
+
+        function showToast(msg) {
+            const toast = document.getElementById('toast');
+            toast.textContent = msg;
+            toast.classList.add('show');
+            setTimeout(() => toast.classList.remove('show'), 2000);
+        }
+        loadPage(null);
+        if (window.EventSource) {
+            const source = new EventSource('/api/events');
+            // 首次连接或断线重连后，用 since 补齐期间错过的变更
+            source.addEventListener('hello', () => poll());
+            source.addEventListener('change', e => applyEvent(JSON.parse(e.data)));
+        } else {
+            setInterval(poll, 3000);
+        }
+    </script>
+</body>
+</html>'''
+
+
+def accepts_gzip(accept_encoding):
+    for part in accept_encoding.split(","):
+        name, _, params = part.strip().partition(";")
+        if name.strip().lower() in ("gzip", "*"):
+            return params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000")
+    return False
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 使用弱比较"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    strip = lambda tag: tag.strip().removeprefix("W/")
+    return any(strip(tag) == strip(etag) for tag in if_none_match.split(","))
+
+
+class HTTPRequest:
+    """解析后的 HTTP 请求"""
+
+    def __init__(self, method, target, version, headers):
+        self.method = method
+        self.version = version
+        self.headers = headers
+        url = urlsplit(target)
+        self.path = url.path
+        self.params = parse_qs(url.query)
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get("connection", "").lower()
+        if self.version == "HTTP/1.0":
+            return connection == "keep-alive"
+        return connection != "close"
+
+
+class HTTPResponse:
+    """HTTP 响应；stream 为异步生成器时按流输出（SSE、导出），此时不复用连接
+
+    chunked 为 True 时流按 Transfer-Encoding: chunked 分块发送，客户端能区分正常结束和中途断开。
+    """
+
+    def __init__(self, status=200, body=b"", content_type="text/plain; charset=utf-8",
+                 headers=None, stream=None, compressible=False, gzip_body=None, chunked=False):
+        self.status = status
+        self.body = body
+        self.headers = {"Content-Type": content_type}
+        self.headers.update(headers or {})
+        self.stream = stream
+        self.chunked = chunked
+        # compressible: 超过阈值时按 Accept-Encoding 协商 gzip；gzip_body: 预先压缩好的正文
+        self.compressible = compressible
+        self.gzip_body = gzip_body
+
+    @classmethod
+    def json(cls, data, status=200, etag=None):
+        body = json.dumps(data, ensure_ascii=False).encode()
+        headers = {"Cache-Control": "no-cache"}
+        if etag:
+            headers["ETag"] = etag
+        return cls(status, body, "application/json", headers, compressible=True)
+
+    @classmethod
+    def not_modified(cls, etag):
+        return cls(304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+
+    @classmethod
+    def error(cls, status):
+        return cls(status, f"{status} {HTTPStatus(status).phrase}".encode())
+
+
+class ClipFlowWebHandler:
+    """Web 路由；数据库访问都放到有界线程池里，事件循环本身从不阻塞"""
+
+    # 指标里的路由标签，避免按 id 产生无穷多的序列
+    ROUTES = ("/", "/index.html", "/api/clips", "/api/search", "/api/events",
+              "/api/status", "/api/stats", "/api/export", "/api/changes", "/metrics")
+
+    def __init__(self, store, executor, status=None):
+        self.store = store
+        self.executor = executor
+        self.metrics = store.metrics
+        self.metrics.gauge("clipflow_clips", "剪贴板记录总数", store.count)
+        self.metrics.gauge("clipflow_revision", "数据库修订号", lambda: store.revision)
+        # 应用提供的运行状态；单独运行服务器时只有存储的信息
+        self.status = status or self.store_status
+        # 页面是静态的：启动时编码、压缩一次，之后只按 ETag 校验
+        self.page_body = WEB_PAGE_HTML.encode()
+        self.page_gzip = gzip.compress(self.page_body, compresslevel=9, mtime=0)
+        self.page_etag = '"' + hashlib.sha1(self.page_body).hexdigest()[:20] + '"'
+
+    async def run_db(self, func, *args):
+        return await asyncio.get_running_loop().run_in_executor(self.executor, func, *args)
+
+    async def dispatch(self, request):
+        start = self.metrics.start()
+        try:
+            response = await self.route(request)
+        except Exception as e:
+            self.metrics.error("http", e)
+            response = HTTPResponse.error(500)
+        response = self.negotiate(request, response)
+        if start:
+            route = self.route_label(request.path)
+            self.metrics.histogram("clipflow_http_request_seconds", "HTTP 请求的处理耗时（流式响应只算到开始输出）",
+                                   route=route).since(start)
+            self.metrics.counter("clipflow_http_requests_total", "HTTP 请求数",
+                                 route=route, status=response.status).inc()
+        return response
+
+    def route_label(self, path):
+        if path in self.ROUTES:
+            return path
+        if path.startswith("/api/clips/"):
+            return "/api/clips/{id}"
+        return "other"
+
+    def negotiate(self, request, response):
+        """处理 If-None-Match 和 gzip 协商"""
+        etag = response.headers.get("ETag")
+        if etag and response.status == 200 and etag_matches(request.headers.get("if-none-match"), etag):
+            return HTTPResponse.not_modified(etag)
+        if response.gzip_body is not None or response.compressible:
+            response.headers["Vary"] = "Accept-Encoding"
+            if accepts_gzip(request.headers.get("accept-encoding", "")):
+                if response.gzip_body is not None:
+                    response.body = response.gzip_body
+                    response.headers["Content-Encoding"] = "gzip"
+                elif len(response.body) >= GZIP_MIN_SIZE:
+                    response.body = gzip.compress(response.body, compresslevel=5)
+                    response.headers["Content-Encoding"] = "gzip"
+        return response
+
+    async def route(self, request):
+        if request.method not in ("GET", "HEAD"):
+            return HTTPResponse.error(405)
+        try:
+            if request.path == "/" or request.path == "/index.html":
+                return self.send_html_page()
+            elif request.path == "/api/clips":
+                return await self.send_clips_json(request)
+            elif request.path.startswith("/api/clips/"):
+                return await self.send_clip_json(request, int(request.path[len("/api/clips/"):]))
+            elif request.path == "/api/search":
+                return await self.send_search_json(request.params)
+            elif request.path == "/api/events":
+                return self.send_event_stream()
+            elif request.path == "/api/export":
+                return self.send_export(request)
+            elif request.path == "/api/changes":
+                return await self.send_changes_json(request.params)
+            elif request.path == "/api/status":
+                return HTTPResponse.json(await self.run_db(self.status))
+            elif request.path == "/api/stats":
+                return HTTPResponse.json(await self.run_db(self.metrics.snapshot))
+            elif request.path == "/metrics":
+                return self.send_metrics(await self.run_db(self.metrics.prometheus))
+            return HTTPResponse.error(404)
+        except ValueError:
+            return HTTPResponse.error(400)
+
+    def store_status(self):
+        return {
+            "version": VERSION,
+            "clips": self.store.count(),
+            "revision": self.store.revision,
+            "origin": self.store.origin,
+            "pages": self.store.page_stats(),
+            "hot_cache": self.store.hot.stats(),
+        }
+
+    def send_metrics(self, text):
+        return HTTPResponse(200, text.encode(), "text/plain; version=0.0.4; charset=utf-8",
+                            headers={"Cache-Control": "no-cache"}, compressible=True)
+
+    def send_html_page(self):
+        return HTTPResponse(
+            200, self.page_body, "text/html; charset=utf-8",
+            headers={"ETag": self.page_etag, "Cache-Control": "no-cache"},
+            gzip_body=self.page_gzip,
+        )
+
+    async def send_clips_json(self, request):
+        params = request.params
+        limit = min(max(int(params.get("limit", ["50"])[0]), 1), 200)
+        # 同一 URL 的响应只随数据库修订号变化；先比对再查库，未变化时直接 304
+        etag = f'W/"r{self.store.committed_revision}"'
+        if etag_matches(request.headers.get("if-none-match"), etag):
+            return HTTPResponse.not_modified(etag)
+        if "since" in params:
+            changes = await self.run_db(self.store.changes_since, int(params["since"][0]))
+            data = {
+                "reset": changes["reset"],
+                "changed": [clip_to_json(c) for c in changes["changed"]],
+                "deleted": changes["deleted"],
+                "rev": changes["rev"],
+            }
+        else:
+            rows, next_cursor, rev = await self.run_db(
+                self.store.page, params.get("after", [None])[0], limit
+            )
+            data = {"clips": [clip_to_json(c) for c in rows], "next_cursor": next_cursor, "rev": rev}
+        # rev 和 ETag 都取查询时的快照：查询之后才提交的修改留给下一次从 rev 起的增量
+        data["total"] = self.store.count()
+        return HTTPResponse.json(data, etag=f'W/"r{data["rev"]}"')
+
+    async def send_clip_json(self, request, clip_id):
+        """单条记录的全文，列表接口里只有预览"""
+        row = await self.run_db(self.store.get_clip, clip_id)
+        if row is None:
+            return HTTPResponse.error(404)
+        data = clip_to_json(row[:-1])
+        data["content"] = row[-1]
+        # 内容不会变，只有收藏状态等元数据随该行的修订号变化
+        return HTTPResponse.json(data, etag=f'W/"c{clip_id}r{data["rev"]}"')
+
+    async def send_search_json(self, params):
+        query = params.get("q", [""])[0]
+        limit = min(max(int(params.get("limit", ["20"])[0]), 1), 100)
+        offset = max(int(params.get("offset", ["0"])[0]), 0)
+        results, scanned = await self.run_db(self.store.search, query, limit, offset)
+        return HTTPResponse.json({
+            "query": query,
+            "limit": limit,
+            "offset": offset,
+            # 全是单个字符的词时只检查了最近 scanned_rows 条记录
+            "partial": scanned is not None,
+            "scanned_rows": scanned,
+            "results": [{
+                "id": clip_id,
+                "snippet": highlight_html(snippet),
+                "created_at": format_ms(created_ms),
+                "created_ms": created_ms,
+                "pinned": bool(pinned),
+                "time_ago": get_time_ago(created_ms),
+            } for clip_id, snippet, created_ms, pinned in results],
+        })
+
+    async def send_changes_json(self, params):
+        """变更日志的增量，供其他实例同步（见 clipflow.sync）；exclude 为请求方自己的 origin"""
+        since = max(int(params.get("since", ["0"])[0]), 0)
+        limit = min(max(int(params.get("limit", [str(SYNC_BATCH)])[0]), 1), 10 * SYNC_BATCH)
+        exclude = params.get("exclude", [None])[0]
+        changes, next_seq, more = await self.run_db(self.store.change_log, since, limit, exclude)
+        return HTTPResponse.json({
+            "origin": self.store.origin,
+            "changes": changes,
+            "next": next_seq,
+            "more": more,
+            "rev": self.store.revision,
+        })
+
+    def send_event_stream(self):
+        """Server-Sent Events：把 ClipStore 的变更实时推给页面，空闲时只有心跳"""
+        async def stream():
+            subscription = AsyncSubscription(asyncio.get_running_loop(), EventBus.MAX_PENDING)
+            self.store.events.subscribe(subscription)
+            try:
+                hello = {"rev": self.store.committed_revision, "total": self.store.count()}
+                yield f"retry: 2000\nevent: hello\ndata: {json.dumps(hello)}\n\n".encode()
+                while True:
+                    try:
+                        event = await asyncio.wait_for(subscription.queue.get(), SSE_HEARTBEAT)
+                    except asyncio.TimeoutError:
+                        # 心跳，用于及时发现已断开的连接
+                        yield b": ping\n\n"
+                        continue
+                    payload = json.dumps(event, ensure_ascii=False)
+                    yield f"event: change\ndata: {payload}\n\n".encode()
+            finally:
+                self.store.events.unsubscribe(subscription)
+
+        return HTTPResponse(
+            200, content_type="text/event-stream; charset=utf-8",
+            headers={"Cache-Control": "no-cache"}, stream=stream(),
+        )
+
+    def send_export(self, request):
+        """全部历史的 NDJSON，按块从读快照编码后分块发送；接受 gzip 时整个流压缩"""
+        compress = accepts_gzip(request.headers.get("accept-encoding", ""))
+
+        async def stream():
+            chunks = export_chunks(self.store, compress)
+            try:
+                while True:
+                    # 读库、编码和压缩都在线程池里，每次只取一块，由 drain() 控制节奏
+                    data = await self.run_db(next, chunks, None)
+                    if data is None:
+                        break
+                    yield data
+            finally:
+                await self.run_db(chunks.close)
+
+        headers = {
+            "Cache-Control": "no-store",
+            "Content-Disposition": 'attachment; filename="clipflow-export.ndjson"',
+            "Vary": "Accept-Encoding",
+        }
+        if compress:
+            headers["Content-Encoding"] = "gzip"
+        return HTTPResponse(200, content_type="application/x-ndjson; charset=utf-8",
+                            headers=headers, stream=stream(), chunked=True)
+
+
+class ClipFlowWebServer:
+    """基于 asyncio 的 HTTP/1.1 服务器（仅标准库），支持 keep-alive 和并发连接"""
+
+    MAX_HEADERS = 100
+    MAX_BODY = 1 << 20
+
+    def __init__(self, store, host="127.0.0.1", port=WEB_PORT, db_workers=4, status=None):
+        self.host = host
+        self.port = port
+        self.executor = ThreadPoolExecutor(max_workers=db_workers, thread_name_prefix="clipflow-db")
+        self.handler = ClipFlowWebHandler(store, self.executor, status)
+        self.loop = None
+        self.server = None
+
+    def serve_forever(self):
+        asyncio.run(self.serve())
+
+    async def serve(self):
+        self.loop = asyncio.get_running_loop()
+        self.server = await asyncio.start_server(self.handle_connection, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+        async with self.server:
+            await self.server.serve_forever()
+
+    def shutdown(self):
+        if self.loop and self.server:
+            self.loop.call_soon_threadsafe(self.server.close)
+        self.executor.shutdown(wait=False)
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request = await self.read_request(reader)
+                if request is None:
+                    break
+                response = await self.handler.dispatch(request)
+                keep_alive = request.keep_alive and response.stream is None
+                await self.write_response(writer, request, response, keep_alive)
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.LimitOverrunError,
+                asyncio.TimeoutError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader):
+        """读取一个请求；空闲超时或对端关闭时返回 None"""
+        try:
+            line = await asyncio.wait_for(reader.readline(), KEEPALIVE_TIMEOUT)
+        except asyncio.TimeoutError:
+            return None
+        if not line:
+            return None
+        method, target, version = line.decode("latin-1").split()
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= self.MAX_HEADERS:
+                raise ValueError("too many headers")
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        length = int(headers.get("content-length", 0))
+        if length > self.MAX_BODY:
+            raise ValueError("request body too large")
+        if length:
+            await reader.readexactly(length)
+        return HTTPRequest(method, target, version, headers)
+
+    async def write_response(self, writer, request, response, keep_alive):
+        status = HTTPStatus(response.status)
+        headers = dict(response.headers)
+        headers["Connection"] = "keep-alive" if keep_alive else "close"
+        if response.stream is None and response.status != 304:
+            headers["Content-Length"] = str(len(response.body))
+        elif response.stream is not None and response.chunked:
+            headers["Transfer-Encoding"] = "chunked"
+        head = f"HTTP/1.1 {status.value} {status.phrase}\r\n"
+        head += "".join(f"{name}: {value}\r\n" for name, value in headers.items())
+        writer.write(head.encode("latin-1") + b"\r\n")
+        if response.stream is not None:
+            try:
+                async for chunk in response.stream:
+                    if response.chunked:
+                        if not chunk:
+                            continue
+                        chunk = b"%x\r\n%s\r\n" % (len(chunk), chunk)
+                    writer.write(chunk)
+                    await writer.drain()
+                if response.chunked:
+                    writer.write(b"0\r\n\r\n")
+                    await writer.drain()
+            finally:
+                await response.stream.aclose()
+            return
+        if request.method != "HEAD":
+            writer.write(response.body)
+        await writer.drain()
@@ -13,6 +13,9 @@ mkdir -p "$INSTALL_DIR"
 
 # Copy files
 cp clipboard_manager.py "$INSTALL_DIR/"
+rm -rf "$INSTALL_DIR/clipflow"
+cp -R clipflow "$INSTALL_DIR/"
+rm -rf "$INSTALL_DIR/clipflow/__pycache__"
 cp icon.png "$INSTALL_DIR/"
 cp requirements.txt "$INSTALL_DIR/"
 
@@ -31,6 +34,14 @@ exec python clipboard_manager.py
 EOF
 chmod +x "$INSTALL_DIR/run.sh"
 
+# Create the clipflow command-line client
+mkdir -p "$INSTALL_DIR/bin"
+cat > "$INSTALL_DIR/bin/clipflow" << EOF
+#!/bin/bash
+PYTHONPATH="$INSTALL_DIR" exec "$INSTALL_DIR/venv/bin/python" -m clipflow "\$@"
+EOF
+chmod +x "$INSTALL_DIR/bin/clipflow"
+
 # Create LaunchAgent for auto-start
 cat > "$LAUNCH_AGENT" << EOF
 <?xml version="1.0" encoding="UTF-8"?>
@@ -63,5 +74,6 @@ echo ""
 echo "📍 Install location: $INSTALL_DIR"
 echo "🚀 ClipFlow will start automatically on login"
 echo "📋 Look for the clipboard icon in your menu bar"
+echo "⌨️  Command-line client: $INSTALL_DIR/bin/clipflow (add it to your PATH)"
 echo ""
 echo "To uninstall, run: ~/.clipflow/app/uninstall.sh"